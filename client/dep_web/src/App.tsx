@@ -9,12 +9,18 @@ declare var __API_DOMAIN__: string;
 
 var domain: string = __API_DOMAIN__
 
+// Identifies this editor to /api/parse, which only parses again what changed since the editor's last request
+const PARSE_SESSION_ID = Math.random().toString(36).slice(2) + Date.now().toString(36);
+// The code is checked for syntax errors once it stops changing for this long
+const SYNTAX_CHECK_DELAY_MS = 300;
+
 function App() {
   const [codeText, setCodeText] = React.useState('print("hello world!")');
   const [output, setOutput] = React.useState('');
   const [isLoading, setIsLoading] = React.useState(false);
   const [error, setError] = React.useState('');
   const [serverMessage, setServerMessage] = React.useState('');
+  const [syntaxError, setSyntaxError] = React.useState('');
 
   const [showTutorial, setShowTutorial] = React.useState(false);
 
@@ -22,6 +28,22 @@ function App() {
     setCodeText(val);
   }, []);
 
+  useEffect(() => {
+    // A check started for an older version of the code is ignored once it is answered
+    let isCurrent = true;
+    const timeout = setTimeout(async () => {
+      const error = await checkSyntax(codeText + '\n');
+      if (isCurrent && error !== null) {
+        setSyntaxError(error);
+      }
+    }, SYNTAX_CHECK_DELAY_MS);
+
+    return () => {
+      isCurrent = false;
+      clearTimeout(timeout);
+    }
+  }, [codeText]);
+
   useEffect(() => {
     const handleKeyDown = (event: KeyboardEvent) => {
       if (event.key === "F5") {
@@ -73,6 +95,9 @@ function App() {
             value={codeText}
             onChange={onCodeTextChange}
           />
+          {syntaxError && (
+            <div className="syntax-error">{syntaxError}</div>
+          )}
         </div>
 
         <div className="right-side">
@@ -92,8 +117,12 @@ function App() {
   )
 }
 
-// Submit a task to the server
-async function submitTask(taskData: string, isDebug: boolean) {
+// How long each request for a task's result waits on the server for the task to finish
+const RESULT_WAIT_SECONDS = 10;
+
+// Submit a task to the server. Quick tasks are answered with their result right away,
+// others with {"status": "accepted", "task_id": ...}
+async function submitTask(taskData: string, isDebug: boolean): Promise<any> {
   try {
     console.log(domain);
     const response = await fetch(`${domain}/api/submit`, {
@@ -107,8 +136,12 @@ async function submitTask(taskData: string, isDebug: boolean) {
     const result = await response.json();
 
     if (response.ok) {
-      console.log(`Task submitted successfully with ID: ${result.task_id}`);
-      return result.task_id;
+      console.log(`Task submitted successfully with status: ${result.status}`);
+      return result;
+    } else if (response.status == 429 || response.status == 503) {
+      // Turned away while the server (or this client) has too many tasks
+      const retryAfter = response.headers.get('Retry-After');
+      return { status: "error", message: `${result.message} (retry in ${retryAfter || '?'} seconds)` };
     } else {
       console.error(`Error submitting task: ${result.message}`);
       return null;
@@ -119,10 +152,30 @@ async function submitTask(taskData: string, isDebug: boolean) {
   }
 }
 
+// Check the code for syntax errors, returns the first one, '' when there is none, or null when the server
+// couldn't be reached
+async function checkSyntax(code: string): Promise<string | null> {
+  try {
+    const response = await fetch(`${domain}/api/parse`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json'
+      },
+      body: JSON.stringify({ session_id: PARSE_SESSION_ID, data: code })
+    });
+    const result = await response.json();
+
+    return result.status === 'ok' ? '' : result.message;
+  } catch (error) {
+    console.error('Failed to check syntax:', error);
+    return null;
+  }
+}
+
 // Check the status of a submitted task
 async function checkTaskStatus(taskId: string): Promise<any> {
   try {
-    const response = await fetch(`${domain}/api/result/${taskId}`);
+    const response = await fetch(`${domain}/api/result/${taskId}?wait=${RESULT_WAIT_SECONDS}`);
     const result = await response.json();
 
     return result;
@@ -132,8 +185,8 @@ async function checkTaskStatus(taskId: string): Promise<any> {
   }
 }
 
-// Poll for task results until completion
-async function pollForResults(taskId: string, pollingInterval = 1000): Promise<any> {
+// Poll for task results until completion, each request returns as soon as the task is done
+async function pollForResults(taskId: string, pollingInterval = 0): Promise<any> {
   return new Promise((resolve, reject) => {
     const poll = async () => {
       try {
@@ -163,14 +216,17 @@ async function pollForResults(taskId: string, pollingInterval = 1000): Promise<a
 async function fetchData(text: string, isDebug: boolean): Promise<any> {
   try {
     // Submit the task
-    const taskId = await submitTask(text, isDebug);
+    const submitted = await submitTask(text, isDebug);
 
-    if (!taskId) {
+    if (!submitted) {
       return { status: "error", message: 'Failed to submit task' };
     }
+    if (submitted.status !== 'accepted') {
+      return submitted;
+    }
 
     // Poll for results until completion
-    const result = await pollForResults(taskId, 1000);
+    const result = await pollForResults(submitted.task_id);
 
     return result;
   } catch (error) {
@@ -38,6 +38,18 @@ const EVENT_TYPES: Record<string, {
     descriptionFormatter: (event) =>
       `${event.var_name} ← ${event.after} (was ${event.before})`
   },
+  ARRAY_MODIFICATION: {
+    friendlyName: "Array Update",
+    icon: Variable,
+    descriptionFormatter: (event) =>
+      `${event.var_name}[${event.index}] ← ${event.after} (was ${event.before})`
+  },
+  BUILTIN_CALL: {
+    friendlyName: "Builtin Call",
+    icon: Code,
+    descriptionFormatter: (event) =>
+      `${event.name}(${event.params ? event.params.join(', ') : ''}) → ${event.result}`
+  },
   FOR: {
     friendlyName: "Loop Start",
     icon: Repeat,
@@ -88,6 +100,14 @@ const EVENT_TYPES: Record<string, {
     descriptionFormatter: (event) =>
       `${event.var_names[0]} ↔ ${event.var_names[1]}`
   },
+  ELIDED: {
+    friendlyName: "Elided",
+    icon: undefined,
+    descriptionFormatter: (event) =>
+      event.iterations
+        ? `${event.events} events (${event.iterations} iterations) not shown`
+        : `${event.events} events not shown`
+  },
   DEFAULT: {
     friendlyName: "Event",
     icon: undefined
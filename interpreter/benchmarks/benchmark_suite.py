@@ -0,0 +1,192 @@
+"""
+Times each stage of running a corpus of DEP programs: scanning, parsing, evaluating (on every execution engine)
+and serializing the journal, the last two with the server's run and debug journal settings.
+
+Results are written as JSON, and a previous run's results can be compared against to spot regressions.
+Run from the repository root:
+    python -m interpreter.benchmarks.benchmark_suite --output results.json
+    python -m interpreter.benchmarks.benchmark_suite --compare results.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+from interpreter.src.ast_cache import AstCache
+from interpreter.src.interpreter_handler import Engine, Interpreter
+from interpreter.src.journal.journal import JournalSettings
+from interpreter.src.journal.journal_events import ErrorEvent, PrintEvent
+from interpreter.src.parser import Parser
+from interpreter.src.Scanner import Scanner
+
+REPEATS = 5
+# Slower than this (as a fraction of the compared time) is reported as a regression
+REGRESSION_THRESHOLD = 0.10
+
+TESTS_DIR = os.path.join(os.path.dirname(__file__), "..", "tests")
+
+LOOP_ITERATIONS = 20_000
+# The tree walker recurses in Python, much deeper calls exceed its recursion limit
+RECURSION_DEPTH = 100
+RECURSION_REPEATS = 50
+ARRAY_LENGTH = 10_000
+LONG_SOURCE_STATEMENTS = 5_000
+
+SRC_LOOP = """
+i <- 0
+total <- 0
+while (i < {iterations})
+    if (mod(i, 3) = 0)
+        total <- total + i
+    i <- i + 1
+print(total)
+""".format(iterations=LOOP_ITERATIONS)
+
+SRC_RECURSION = """
+function depth(n)
+    if (n = 0)
+        return 0
+    return 1 + depth(n - 1)
+
+total <- 0
+i <- 0
+while (i < {repeats})
+    total <- total + depth({depth})
+    i <- i + 1
+print(total)
+""".format(depth=RECURSION_DEPTH, repeats=RECURSION_REPEATS)
+
+SRC_ARRAY_LITERAL = """
+arr <- [{values}]
+print(length(arr))
+""".format(values=", ".join(str(value) for value in random.Random(0).choices(range(1000), k=ARRAY_LENGTH)))
+
+# Straight-line code, most of the time goes to the front end
+SRC_LONG = "".join(
+    "x{i} <- {i} * 2 + {j}\nif (x{i} > {j})\n    y <- x{i} - 1\n".format(i=i, j=i % 7)
+    for i in range(LONG_SOURCE_STATEMENTS)
+) + "print(x0)\n"
+
+
+def read_program(name: str) -> str:
+    with open(os.path.join(TESTS_DIR, name), "r", encoding="utf-8") as file:
+        return file.read()
+
+
+PROGRAMS = {
+    "quicksort": read_program("quicksort.txt"),
+    "merge search": read_program("merge_search_test.txt"),
+    f"loop ({LOOP_ITERATIONS})": SRC_LOOP,
+    f"recursion ({RECURSION_REPEATS}x{RECURSION_DEPTH})": SRC_RECURSION,
+    f"array literal ({ARRAY_LENGTH})": SRC_ARRAY_LITERAL,
+    f"long source ({LONG_SOURCE_STATEMENTS})": SRC_LONG,
+}
+
+# Like the server's
+SETTINGS = {
+    "run": JournalSettings([PrintEvent, ErrorEvent], stop_when_full=True),
+    "debug": JournalSettings(),
+}
+
+
+def time_stage(stage, setup=None) -> dict:
+    """Runs `stage` REPEATS times, each after an untimed `setup`, and returns its best and median times in seconds."""
+    times = []
+    for _ in range(REPEATS):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        stage()
+        times.append(time.perf_counter() - start)
+    return {"min": min(times), "median": statistics.median(times)}
+
+
+def benchmark_program(source: str, engines: list[Engine]) -> dict:
+    tokens = Scanner(source).scan_tokens()
+    results = {
+        "scan": time_stage(lambda: Scanner(source).scan_tokens()),
+        "parse": time_stage(lambda: Parser(tokens).parse()),
+    }
+
+    # Parsed ahead, so `feedBlock` only evaluates (and compiles, for the engines that do)
+    ast_cache = AstCache()
+    ast_cache.parse(source)
+    for settings_name, settings in SETTINGS.items():
+        for engine in engines:
+            interpreter = Interpreter(settings, True, engine, ast_cache)
+            journals = []
+
+            def evaluate():
+                journals.append(interpreter.feedBlock(source))
+
+            with contextlib.redirect_stdout(io.StringIO()):
+                # Each run starts with only the builtins defined, as on a new interpreter
+                results[f"evaluate/{engine.value}/{settings_name}"] = time_stage(evaluate, interpreter.reset)
+        # Every engine records the same journal
+        journal = journals[-1]
+        results[f"serialize/{settings_name}"] = time_stage(journal.serialize)
+        results[f"write_json/{settings_name}"] = time_stage(lambda: journal.write_json(io.StringIO()))
+    return results
+
+
+def compare(results: dict, baseline: dict) -> list[str]:
+    """The stages that got slower than in `baseline`, by their best time."""
+    regressions = []
+    for program, stages in results["programs"].items():
+        for stage, timing in stages.items():
+            previous = baseline["programs"].get(program, {}).get(stage)
+            if previous is not None and timing["min"] > previous["min"] * (1 + REGRESSION_THRESHOLD):
+                regressions.append("{:<28}{:<32}{:>10.4f}s ->{:>9.4f}s".format(
+                    program, stage, previous["min"], timing["min"]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="A results file of a previous run, to report the stages that got slower")
+    parser.add_argument("--engine", choices=[engine.value for engine in Engine], action="append",
+                        help="Only evaluate with this engine (may be repeated), every engine by default")
+    parser.add_argument("--program", action="append", help="Only run programs whose name contains this")
+    args = parser.parse_args()
+
+    engines = [Engine(engine) for engine in args.engine] if args.engine else list(Engine)
+    programs = {
+        name: source for name, source in PROGRAMS.items()
+        if not args.program or any(selected in name for selected in args.program)
+    }
+
+    results = {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "repeats": REPEATS,
+        "programs": {},
+    }
+    print("{:<28}{:<32}{:>11}{:>11}".format("program", "stage", "best", "median"))
+    for name, source in programs.items():
+        stages = benchmark_program(source, engines)
+        results["programs"][name] = stages
+        for stage, timing in stages.items():
+            print("{:<28}{:<32}{:>10.4f}s{:>10.4f}s".format(name, stage, timing["min"], timing["median"]))
+
+    if args.output is not None:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+
+    if args.compare is not None:
+        with open(args.compare, "r", encoding="utf-8") as file:
+            regressions = compare(results, json.load(file))
+        print()
+        print("\n".join(regressions) if regressions else "No regressions")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Measures the peak memory (RSS) of journaling a 100k-iteration loop in debug mode.
+
+Every measurement runs in a fresh process. Run from the repository root:
+    python -m interpreter.benchmarks.journal_memory_benchmark
+"""
+import contextlib
+import io
+import json
+import math
+import resource
+import subprocess
+import sys
+
+from interpreter.src.interpreter_handler import Interpreter
+from interpreter.src.journal.journal import JournalSettings
+
+ITERATIONS = 100_000
+
+SRC_LOOP = """
+arr <- [0, 0, 0, 0, 0, 0, 0, 0, 0, 0]
+i <- 0
+total <- 0
+while (i < {iterations})
+    total <- total + i
+    if (mod(i, 10) = 0)
+        arr[mod(i, 7) + 1] <- i
+    i <- i + 1
+print(total)
+""".format(iterations=ITERATIONS)
+
+
+def peak_rss_mb() -> float:
+    # Kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+# Every event is journaled, except in the last phase which keeps the default limits
+UNLIMITED = JournalSettings(max_length=math.inf, max_depth=math.inf)
+
+# The journal settings and what is done with the journal after the run
+PHASES = {
+    "run": (UNLIMITED, lambda journal: None),
+    "run + serialize()": (UNLIMITED, lambda journal: journal.serialize()),
+    "run + json.dumps(serialize())": (UNLIMITED, lambda journal: json.dumps(journal.serialize())),
+    "run + write_json()": (UNLIMITED, lambda journal: journal.write_json(io.StringIO())),
+    "run (default limits) + write_json()": (JournalSettings(), lambda journal: journal.write_json(io.StringIO())),
+}
+
+
+def run_child(phase: str) -> None:
+    start_rss = peak_rss_mb()
+    settings, after_run = PHASES[phase]
+    interpreter = Interpreter(settings, True)
+    with contextlib.redirect_stdout(io.StringIO()):
+        journal = interpreter.feedBlock(SRC_LOOP)
+    after_run(journal)
+    print("{:.1f} {:.1f}".format(start_rss, peak_rss_mb()))
+
+
+def main():
+    print("{:<38}{:>14}{:>14}".format("phase", "start RSS", "peak RSS"))
+    for phase in PHASES:
+        args = [sys.executable, "-m", "interpreter.benchmarks.journal_memory_benchmark", "--child", phase]
+        start_rss, peak_rss = subprocess.run(args, capture_output=True, text=True, check=True).stdout.split()
+        print("{:<38}{:>11} MB{:>11} MB".format(phase, start_rss, peak_rss))
+
+
+if __name__ == "__main__":
+    if "--child" in sys.argv:
+        run_child(sys.argv[-1])
+    else:
+        main()
@@ -0,0 +1,71 @@
+"""
+Times scanning and parsing generated programs of growing length, to check that both stay linear in the length of
+the source: the time per line should stay about the same as the programs grow. Also times the incremental front
+end on an edit in the middle of each program, which should only rescan the edited statement.
+
+Run from the repository root:
+    python -m interpreter.benchmarks.parser_benchmark
+"""
+import itertools
+import time
+
+from interpreter.src.incremental_front_end import IncrementalFrontEnd
+from interpreter.src.parser import Parser
+from interpreter.src.Scanner import Scanner
+
+REPEATS = 3
+LINE_COUNTS = [10_000, 30_000, 100_000]
+
+# Nine lines of the statements programs are made of. Statements starting with an array read are what the parser
+# had to look far ahead for, to tell them from array assignments
+CHUNK = """\
+x{i} <- {i} * 2 + mod({i}, 7)
+arr[{j}] <- x{i} - arr[{j} + 1]
+arr[{j}] = x{i} or arr[{j}] > 2
+if (x{i} > {j} and not_done)
+    total <- total + arr[{j}]
+else
+    print(arr[{j}])
+while (arr[{j}] < 0)
+    arr[{j}] <- arr[{j}] + 1
+"""
+CHUNK_LINES = CHUNK.count("\n")
+
+
+def generate_program(lines: int) -> str:
+    return "".join(CHUNK.format(i=i, j=i % 10 + 1) for i in range(lines // CHUNK_LINES))
+
+
+def best_time(stage) -> float:
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        stage()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def time_edits(source: str) -> float:
+    """The time an incremental update takes, alternating between two versions differing in one statement."""
+    middle = source.index("x", len(source) // 2)
+    front_end = IncrementalFrontEnd()
+    front_end.update(source)
+    edits = itertools.cycle([source[:middle] + "y" + source[middle:], source])
+    return best_time(lambda: front_end.update(next(edits)))
+
+
+def main():
+    print("{:>8}{:>11}{:>11}{:>16}{:>11}".format("lines", "scan", "parse", "parse per line", "edit"))
+    for lines in LINE_COUNTS:
+        source = generate_program(lines)
+        tokens = Scanner(source).scan_tokens()
+        scan = best_time(lambda: Scanner(source).scan_tokens())
+        parse = best_time(lambda: Parser(tokens).parse())
+        edit = time_edits(source)
+        print("{:>8}{:>10.3f}s{:>10.3f}s{:>14.2f}us{:>9.2f}ms".format(
+            lines, scan, parse, parse / lines * 1e6, edit * 1e3
+        ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Times recursive programs on every execution engine.
+
+Run from the repository root:
+    python -m interpreter.benchmarks.recursion_benchmark
+"""
+import contextlib
+import io
+import random
+import time
+
+from interpreter.src.interpreter_handler import Engine, Interpreter
+from interpreter.src.journal.journal import JournalSettings
+from interpreter.src.journal.journal_events import ErrorEvent, PrintEvent
+
+REPEATS = 10
+SORT_SIZE = 256
+
+SRC_FIB = """
+function fib(n)
+    if (n < 2)
+        return n
+    return fib(n - 1) + fib(n - 2)
+print(fib(20))
+"""
+
+SRC_MERGE_SORT = """
+function merge(A, T, l, m, r)
+    i <- l
+    j <- m + 1
+    k <- l
+    while (k <= r)
+        if ((j > r) or ((i <= m) and (A[i] <= A[j])))
+            T[k] <- A[i]
+            i <- i + 1
+        else
+            T[k] <- A[j]
+            j <- j + 1
+        k <- k + 1
+    k <- l
+    while (k <= r)
+        A[k] <- T[k]
+        k <- k + 1
+    return r - l + 1
+
+function merge_sort(A, T, l, r)
+    if (l >= r)
+        return 0
+    m <- floor((l + r) / 2)
+    merge_sort(A, T, l, m)
+    merge_sort(A, T, m + 1, r)
+    return merge(A, T, l, m, r)
+
+arr <- [{values}]
+tmp <- [{zeros}]
+merge_sort(arr, tmp, 1, {size})
+print(arr[1])
+""".format(
+    values=", ".join(str(value) for value in random.Random(0).choices(range(1000), k=SORT_SIZE)),
+    zeros=", ".join("0" for _ in range(SORT_SIZE)),
+    size=SORT_SIZE,
+)
+
+PROGRAMS = {
+    "fib(20)": SRC_FIB,
+    f"merge sort ({SORT_SIZE})": SRC_MERGE_SORT,
+}
+
+
+def time_program(source: str, engine: Engine) -> float:
+    best = float("inf")
+    for _ in range(REPEATS):
+        interpreter = Interpreter(JournalSettings([PrintEvent, ErrorEvent]), True, engine)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            interpreter.feedBlock(source)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    print("{:<20}".format("program") + "".join("{:>14}".format(engine.value) for engine in Engine))
+    for name, source in PROGRAMS.items():
+        timings = "".join("{:>13.3f}s".format(time_program(source, engine)) for engine in Engine)
+        print("{:<20}".format(name) + timings)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
+import re
+
 from interpreter.src.Token import Token
 from interpreter.src.interpreter_exception import InterpreterException
 from interpreter.src.token_type import TokenType
@@ -20,6 +22,47 @@ reserved_keywords = {
     "function": TokenType.FUNC_DECL
 }
 
+operators = {
+    "(": TokenType.LEFT_PAREN,
+    ")": TokenType.RIGHT_PAREN,
+    "[": TokenType.LEFT_BRACKET,
+    "]": TokenType.RIGHT_BRACKET,
+    ",": TokenType.COMMA,
+    ".": TokenType.DOT,
+    "-": TokenType.MINUS,
+    "+": TokenType.PLUS,
+    "/": TokenType.SLASH,
+    ";": TokenType.SEMICOLON,
+    "*": TokenType.STAR,
+    "^": TokenType.CARET,
+    "!": TokenType.BANG,
+    "!=": TokenType.BANG_EQUAL,
+    "=": TokenType.EQUAL_EQUAL,
+    "<": TokenType.LESS,
+    "<=": TokenType.LESS_EQUAL,
+    "<-": TokenType.LEFT_ARROW,
+    ">": TokenType.GREATER,
+    ">=": TokenType.GREATER_EQUAL,
+}
+
+# Every lexeme `scan_token` recognizes, in one pattern, each match skipping the spaces before it. `other` catches any
+# character no token starts with - either an error, or a non-ASCII letter or digit only `scan_token` handles
+token_pattern = re.compile(
+    r"""
+    [\ \t\r]*+
+    (?:
+    (?P<newline>\n\ *)
+    |(?P<comment>\|>[^\n]*)
+    |(?P<number>[0-9]+(?:\.[0-9]+)?)
+    |(?P<name>[A-Za-z][A-Za-z0-9_]*)
+    |(?P<string>"[^"]*")
+    |(?P<operator><[=-]?|>=?|!=?|[=()\[\],.\-+/;*^])
+    |(?P<other>.)
+    )
+    """,
+    re.VERBOSE,
+)
+
 class Scanner:
     def __init__(self, source: str):
         self._source = source
@@ -31,12 +74,78 @@ class Scanner:
         self._func_def: bool = False # is set to True while a function is being defined, set to False when that is done
 
     def scan_tokens(self) -> list[Token]:
+        if self._current == 0 and self.scan_with_pattern():
+            self._tokens.append(Token(TokenType.EOF, "", None, self._line, (self._current, self._current)))
+            return self._tokens
+        return self.scan_tokens_by_character()
+
+    def scan_tokens_by_character(self) -> list[Token]:
         while not self.is_at_end():
             self.advance_start()
             self.scan_token()
 
         self._tokens.append(Token(TokenType.EOF, "", None, self._line, (self._current, self._current)))
         return self._tokens
+
+    def scan_with_pattern(self, pos: int = 0, endpos: int | None = None, line: int = 1) -> bool:
+        """
+        Scans the whole source in a single pass of `token_pattern`, producing the same tokens (and raising the same
+        errors) as `scan_token` would. Returns False without changing the scanner's state when the source has a
+        non-ASCII character outside strings and comments, which is left to the character-by-character scan.
+
+        `source[pos:endpos]` alone can be scanned as if it were the whole source, when it starts a line (numbered
+        `line`) with no indentation. Its tokens keep their positions in the whole source.
+        """
+        source = self._source
+        endpos = len(source) if endpos is None else endpos
+        tokens: list[Token] = []
+        add = tokens.append
+        indent_stack = [0]
+
+        for match in token_pattern.finditer(source, pos, endpos):
+            kind = match.lastgroup
+            if kind == "comment":
+                continue
+
+            text = match.group(kind)
+            start = match.start(kind)
+            end = start + len(text)
+            if kind == "name":
+                # This allows every capitalization of a keyword - AND, and, And, aND
+                add(Token(reserved_keywords.get(text.lower(), TokenType.IDENTIFIER), text, None, line, (start, end)))
+            elif kind == "operator":
+                add(Token(operators[text], text, None, line, (start, end)))
+            elif kind == "number":
+                add(Token(TokenType.NUMBER, text, float(text), line, (start, end)))
+            elif kind == "newline":
+                add(Token(TokenType.EOL, "\n", None, line, (start, start + 1)))
+                line += 1
+                # Like `handle_indentation`, scope tokens span the newline and the indentation after it
+                count = end - start - 1
+                if count > indent_stack[-1]:
+                    indent_stack.append(count)
+                    add(Token(TokenType.START_SCOPE, text, None, line, (start, end)))
+                while count < indent_stack[-1]:
+                    indent_stack.pop()
+                    add(Token(TokenType.END_SCOPE, text, None, line, (start, end)))
+            elif kind == "string":
+                line += text.count("\n")
+                add(Token(TokenType.STRING, text, text[1:-1], line, (start, end)))
+            elif not text.isascii():
+                return False
+            elif text == '"':
+                line += source.count("\n", end, endpos)
+                raise InterpreterException(f"[Line {line}] Error: Unterminated string")
+            elif text == "|":
+                raise InterpreterException(f"[Line {line}] Error: Unexpected character '|")
+            else:
+                raise InterpreterException(f"[Line {line}] Error: Unexpected character '{text}'")
+
+        self._tokens = tokens
+        self._line = line
+        self._indent_stack = indent_stack
+        self._start = self._current = endpos
+        return True
          
 
     def scan_token(self) -> None:
@@ -0,0 +1,52 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+from interpreter.src.optimizer import Optimizer
+from interpreter.src.parser import Parser
+from interpreter.src.Scanner import Scanner
+from interpreter.src.stmt import Stmt
+
+DEFAULT_MAX_ENTRIES = 128
+
+
+class AstCache:
+    """
+    A bounded LRU cache of parsed (and optimized, see `Optimizer`) programs, keyed by a hash of their source.
+
+    Cached ASTs are shared between every interpreter (and thread) that parses the same source, so they must be
+    treated as immutable: the execution engines only ever read the nodes, and the resolver and compilers key
+    their own data by node identity instead of annotating the tree.
+    Scanning and parsing errors are raised as usual and are not cached.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self._max_entries = max_entries
+        self._entries: OrderedDict[bytes, tuple[Stmt, ...]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def parse(self, source: str) -> tuple[Stmt, ...]:
+        key = hashlib.sha256(source.encode()).digest()
+
+        with self._lock:
+            statements = self._entries.get(key)
+            if statements is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return statements
+            self.misses += 1
+
+        # Parsed outside the lock, two threads missing on the same source at once both parse it
+        statements = tuple(Optimizer().optimize(Parser(Scanner(source).scan_tokens()).parse()))
+
+        with self._lock:
+            self._entries[key] = statements
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        return statements
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,137 @@
+import math
+from array import array
+from typing import Any, Callable
+
+import interpreter.src.expr as expr
+import interpreter.src.stmt as stmt
+from interpreter.src.interpreter_exception import InterpreterException
+from interpreter.src.number_array import ARRAY_TYPES, NumberArray, make_array
+
+# The functions every program starts with, by name. Each engine calls a builtin's implementation with the argument
+# values, there is no per-builtin code in the engines. See `eval.BUILTINS`
+BUILTIN_FUNCTIONS: dict[str, stmt.FuncBody] = {}
+
+# Arrays a builtin creates can't be longer than this, a program can't take all of the server's memory in one call
+MAX_ARRAY_LENGTH = 10_000_000
+
+
+def builtin(name: str, params: list[str], reversed_arguments: bool = False, journaled: bool = False) -> Callable:
+    """Registers the decorated function as the builtin `name`, taking `params`. See `stmt.Builtin` for the flags."""
+    def register(implementation: Callable) -> Callable:
+        body = stmt.Builtin(name, implementation, reversed_arguments, journaled)
+        BUILTIN_FUNCTIONS[name] = stmt.FuncBody(list(params), body)
+        return implementation
+
+    return register
+
+
+@builtin("mod", ["x", "y"])
+def _mod(x, y):
+    return x % y
+
+
+@builtin("log", ["base", "x"], reversed_arguments=True)
+def _log(base, x):
+    return math.log(x, base)
+
+
+@builtin("floor", ["x"])
+def _floor(x):
+    return float(math.floor(x))
+
+
+@builtin("ceil", ["x"])
+def _ceil(x):
+    return float(math.ceil(x))
+
+
+# Array builtins. They run over the whole array at once (in C, as far as `array` and lists allow) and are recorded
+# as one `BuiltinCallEvent`. Those changing an array change it in place, like an assignment to its elements would
+
+
+def _elements(name: str, value: Any) -> array | list:
+    """The elements of the array `value`, raising if it isn't an array."""
+    if not isinstance(value, ARRAY_TYPES):
+        raise InterpreterException("{} expects an array".format(name))
+    return value.items if type(value) is NumberArray else value
+
+
+def _numbers(name: str, value: Any) -> array | list:
+    """The elements of the array `value`, raising if it isn't an array of numbers."""
+    elements = _elements(name, value)
+    if type(elements) is not array and any(type(element) is not float for element in elements):
+        raise InterpreterException("{} expects an array of numbers".format(name))
+    return elements
+
+
+@builtin("sum", ["A"], journaled=True)
+def _sum(values):
+    return float(sum(_numbers("sum", values)))
+
+
+@builtin("min", ["A"], journaled=True)
+def _min(values):
+    elements = _numbers("min", values)
+    if len(elements) == 0:
+        raise InterpreterException("min of an empty array")
+    return min(elements)
+
+
+@builtin("max", ["A"], journaled=True)
+def _max(values):
+    elements = _numbers("max", values)
+    if len(elements) == 0:
+        raise InterpreterException("max of an empty array")
+    return max(elements)
+
+
+@builtin("fill", ["A", "value"], journaled=True)
+def _fill(values, value):
+    length = len(_elements("fill", values))
+    if type(values) is NumberArray:
+        values.items = array("d", [value]) * length if type(value) is float else [value] * length
+    else:
+        values[:] = [value] * length
+    return expr.Void
+
+
+@builtin("copy", ["A"], journaled=True)
+def _copy(values):
+    elements = _elements("copy", values)
+    if type(elements) is array:
+        return NumberArray(elements[:])
+    return make_array(elements)
+
+
+@builtin("range", ["first", "last"], journaled=True)
+def _range(first, last):
+    """The numbers from `first` up to `last`, both included (if `last` is reached)."""
+    if type(first) is not float or type(last) is not float:
+        raise InterpreterException("range expects numbers")
+    if not math.isfinite(last - first):
+        raise InterpreterException("range expects finite numbers")
+    length = math.floor(last - first) + 1
+    if length <= 0:
+        return []
+    if length > MAX_ARRAY_LENGTH:
+        raise InterpreterException("range of more than {} numbers".format(MAX_ARRAY_LENGTH))
+    if first.is_integer():
+        start = int(first)
+        return NumberArray(array("d", range(start, start + length)))
+    return NumberArray(array("d", [first + i for i in range(length)]))
+
+
+@builtin("sort", ["A"], journaled=True)
+def _sort(values):
+    elements = _numbers("sort", values)
+    if type(elements) is array:
+        values.items = array("d", sorted(elements))
+    else:
+        elements.sort()
+    return expr.Void
+
+
+@builtin("reverse", ["A"], journaled=True)
+def _reverse(values):
+    _elements("reverse", values).reverse()
+    return expr.Void
@@ -0,0 +1,367 @@
+from array import array
+from dataclasses import dataclass, field
+from enum import IntEnum
+
+import interpreter.src.expr as expr
+import interpreter.src.stmt as stmt
+from interpreter.src.expr import Expr
+from interpreter.src.journal.journal_events import (
+    ELSE_END,
+    ELSE_START,
+    IF_END,
+    WHILE_ITERATION_END,
+    WHILE_ITERATION_START,
+)
+from interpreter.src.operators import BINARY_OPERATORS, UNARY_OPERATORS, format_invalid_literal
+from interpreter.src.resolver import Resolution, Resolver, SlotRef
+from interpreter.src.stmt import Stmt
+from interpreter.src.token_type import TokenType
+
+
+class Op(IntEnum):
+    """
+    Instructions of the stack machine run by `vm.VM`. Every instruction takes one integer argument,
+    which is either an index into the constant pool or a jump target (an instruction offset).
+    """
+    CONST = 0  # push consts[arg]
+    POP = 1
+    LOAD_LOCAL = 2  # push a variable held in the current scope: consts[arg] = (name, slot)
+    LOAD_ROOT = 3  # push a variable held in the root scope: consts[arg] = name
+    LOAD_VAR = 4  # push a variable: consts[arg] = (name, refs)
+    STORE_LOCAL = 5  # pop and assign, emitting the assignment event: consts[arg] = (name, slot)
+    STORE_ROOT = 6  # consts[arg] = name
+    STORE_VAR = 7  # consts[arg] = (name, refs, local slot or None)
+    BINARY = 8  # pop right and left, push consts[arg](left, right)
+    UNARY = 9  # pop a value, push consts[arg](value)
+    CHECK_BOOL = 10  # raise consts[arg] unless the top of the stack is a boolean
+    JUMP = 11
+    JUMP_IF_FALSE = 12  # pop, jump if falsy
+    JUMP_IF_TRUE_KEEP = 13  # jump if the top is True, otherwise pop it
+    JUMP_IF_FALSE_KEEP = 14  # jump if the top is False, otherwise pop it
+    RAISE = 15  # raise an `InterpreterException` with the message consts[arg]
+    PRINT = 16
+    EMIT = 17  # emit the event consts[arg]
+    IF_START = 18  # pop the condition: emit the if event when it holds, jump to arg otherwise
+    IF_MISS = 19  # emit the events of a missed `if` without an `else`
+    WHILE_START = 20  # emit the while start event and push the iteration counter
+    WHILE_ITERATION_END = 21  # count an iteration and emit its end event
+    WHILE_END = 22  # pop the iteration counter and emit the while end event
+    ENTER_SCOPE = 23  # open a nested scope with the slot layout consts[arg]
+    EXIT_SCOPE = 24
+    BUILD_ARRAY = 25  # pop arg values into a new array
+    LOAD_ARRAY = 26  # push the array variable consts[arg] = (name, refs)
+    INDEX = 27  # pop an index and an array, push the element
+    STORE_INDEX = 28  # pop an index, an array and a value, assign the element: consts[arg] = name
+    LENGTH = 29  # consts[arg] = (name, refs)
+    DEFINE = 30  # define the function consts[arg] = (name, FuncBody)
+    LOAD_FUNC = 31  # push the function consts[arg] = (name, refs, argument count)
+    JUMP_IF_BUILTIN = 32  # jump if the function on the top of the stack is a builtin
+    JUMP_IF_REVERSED = 33  # jump if the builtin on the top of the stack reads its arguments in reverse
+    CALL_BUILTIN = 34  # pop arg values and the builtin, push its result
+    CALL_BUILTIN_REVERSED = 35
+    PREPARE_CALL = 36  # push the environment of a call to the user function on the top of the stack
+    BIND_PARAM = 37  # pop a value and bind it to the parameter number arg of the prepared call
+    CALL = 38  # pop the call environment and the function, run the function's code
+    RETURN = 39  # pop the return value and resume the caller
+
+
+@dataclass
+class CodeObject:
+    """A compiled program or function body: a flat instruction stream and its constant pool."""
+    name: str
+    code: array = field(default_factory=lambda: array("i"))
+    consts: list = field(default_factory=list)
+    # Slot layout of the scope the code runs in (a function's call environment), `None` for the root scope
+    names: list[str] | None = None
+    params: tuple[str, ...] = ()
+    param_slots: tuple[int, ...] = ()
+
+
+class BytecodeCompiler:
+    """
+    Compiles the AST produced by `Parser.parse()` into `CodeObject`s for the `VM`.
+
+    The emitted code follows `Eval`'s visitors step by step, so the VM evaluates expressions in the same order,
+    emits the same events and raises the same errors. Variables use the slots assigned by the `Resolver`.
+    """
+
+    def __init__(self):
+        self._resolution = Resolution()
+        self._code = CodeObject("<program>")
+        self._scope: list[str] | None = None
+
+    def compile(self, statements: list[Stmt], resolution: Resolution) -> CodeObject:
+        self._resolution = resolution
+        self._code = CodeObject("<program>")
+        self._scope = None
+        for statement in statements:
+            self.__compile_statement(statement)
+        return self._code
+
+    def compile_function(self, name: str, func: stmt.FuncBody, resolution: Resolution) -> CodeObject:
+        self._resolution = resolution
+        return self.__compile_function(name, func)
+
+    # Emission helpers
+    def __emit(self, op: Op, arg: int = 0) -> int:
+        """Appends an instruction and returns its offset."""
+        code = self._code.code
+        code.append(op)
+        code.append(arg)
+        return len(code) - 2
+
+    def __const(self, value) -> int:
+        consts = self._code.consts
+        consts.append(value)
+        return len(consts) - 1
+
+    def __label(self) -> int:
+        return len(self._code.code)
+
+    def __patch(self, offset: int, target: int | None = None) -> None:
+        """Points the jump at `offset` to `target`, or to the next instruction."""
+        self._code.code[offset + 1] = self.__label() if target is None else target
+
+    # Statements
+    def __compile_statement(self, statement: Stmt) -> None:
+        match statement:
+            case stmt.Print():
+                self.__compile_expression(statement.expression)
+                self.__emit(Op.PRINT)
+            case stmt.Expression():
+                self.__compile_expression(statement.expression)
+                self.__emit(Op.POP)
+            case stmt.Assignment():
+                self.__compile_expression(statement.value)
+                self.__compile_store(statement.name, self._resolution.bindings[id(statement)])
+            case stmt.ArrayAssignment():
+                self.__compile_expression(statement.value)
+                self.__emit(Op.LOAD_ARRAY, self.__binding(statement.name, statement))
+                self.__compile_expression(statement.idx)
+                self.__emit(Op.STORE_INDEX, self.__const(statement.name))
+            case stmt.Block():
+                self.__compile_block(statement)
+            case stmt.If():
+                self.__compile_if(statement)
+            case stmt.While():
+                self.__compile_while(statement)
+            case stmt.FuncDef():
+                func = stmt.FuncBody(
+                    statement.func.params, statement.func.body, self.__compile_function(statement.func_name, statement.func)
+                )
+                self.__emit(Op.DEFINE, self.__const((statement.func_name, func)))
+            case stmt.Return():
+                self.__compile_expression(statement.ret_val)
+                self.__emit(Op.RETURN)
+
+    def __compile_block(self, block: stmt.Block) -> None:
+        layout = self._resolution.scopes[id(block)]
+        if layout is None:
+            for statement in block.statements:
+                self.__compile_statement(statement)
+            return
+
+        enclosing_scope = self._scope
+        self._scope = layout.names
+        self.__emit(Op.ENTER_SCOPE, self.__const(layout.names))
+        for statement in block.statements:
+            self.__compile_statement(statement)
+        self.__emit(Op.EXIT_SCOPE)
+        self._scope = enclosing_scope
+
+    def __compile_if(self, statement: stmt.If) -> None:
+        self.__compile_expression(statement.condition)
+        if_start = self.__emit(Op.IF_START)
+        self.__compile_statement(statement.then_block)
+        self.__emit(Op.EMIT, self.__const(IF_END))
+        then_end = self.__emit(Op.JUMP)
+
+        self.__patch(if_start)
+        if statement.else_block is not None:
+            self.__emit(Op.EMIT, self.__const(ELSE_START))
+            self.__compile_statement(statement.else_block)
+            self.__emit(Op.EMIT, self.__const(ELSE_END))
+        else:
+            self.__emit(Op.IF_MISS)
+        self.__patch(then_end)
+
+    def __compile_while(self, statement: stmt.While) -> None:
+        self.__emit(Op.WHILE_START)
+        loop_start = self.__label()
+        self.__compile_expression(statement.condition)
+        loop_exit = self.__emit(Op.JUMP_IF_FALSE)
+        self.__emit(Op.EMIT, self.__const(WHILE_ITERATION_START))
+        self.__compile_statement(statement.body)
+        self.__emit(Op.WHILE_ITERATION_END, self.__const(WHILE_ITERATION_END))
+        self.__emit(Op.JUMP, loop_start)
+        self.__patch(loop_exit)
+        self.__emit(Op.WHILE_END)
+
+    def __compile_function(self, name: str, func: stmt.FuncBody) -> CodeObject:
+        layout = self._resolution.functions[id(func)]
+        enclosing_code, enclosing_scope = self._code, self._scope
+
+        self._code = CodeObject(
+            name,
+            names=layout.names,
+            params=tuple(func.params),
+            param_slots=tuple(layout.slots[param] for param in func.params),
+        )
+        self._scope = layout.names
+        for statement in func.body.statements:
+            self.__compile_statement(statement)
+        # Falling off the end of a function returns `Void`
+        self.__emit(Op.CONST, self.__const(expr.Void))
+        self.__emit(Op.RETURN)
+        code = self._code
+
+        self._code, self._scope = enclosing_code, enclosing_scope
+        return code
+
+    # Variables
+    def __binding(self, name: str, node) -> int:
+        return self.__const((name, self._resolution.bindings[id(node)]))
+
+    def __compile_load(self, name: str, refs: tuple[SlotRef, ...]) -> None:
+        if not refs:
+            self.__emit(Op.LOAD_ROOT, self.__const(name))
+        elif len(refs) == 1 and refs[0][0] == 0:
+            self.__emit(Op.LOAD_LOCAL, self.__const((name, refs[0][1])))
+        else:
+            self.__emit(Op.LOAD_VAR, self.__const((name, refs)))
+
+    def __compile_store(self, name: str, refs: tuple[SlotRef, ...]) -> None:
+        if self._scope is None:
+            self.__emit(Op.STORE_ROOT, self.__const(name))
+            return
+
+        local_slot = refs[0][1] if refs and refs[0][0] == 0 else None
+        if len(refs) == 1 and local_slot is not None:
+            self.__emit(Op.STORE_LOCAL, self.__const((name, local_slot)))
+        else:
+            self.__emit(Op.STORE_VAR, self.__const((name, refs, local_slot)))
+
+    # Expressions
+    def __compile_expression(self, ast: Expr) -> None:
+        match ast:
+            case expr.Constant():
+                self.__emit(Op.CONST, self.__const(ast.value))
+            case expr.Literal():
+                self.__compile_literal(ast)
+            case expr.ArrayLiteral():
+                for elt in ast.elts:
+                    self.__compile_expression(elt)
+                self.__emit(Op.BUILD_ARRAY, len(ast.elts))
+            case expr.ArrayAccess():
+                self.__emit(Op.LOAD_ARRAY, self.__binding(ast.name, ast))
+                self.__compile_expression(ast.idx)
+                self.__emit(Op.INDEX)
+            case expr.Length():
+                self.__emit(Op.LENGTH, self.__binding(ast.name, ast))
+            case expr.Grouping():
+                self.__compile_expression(ast.expression)
+            case expr.Unary():
+                self.__compile_unary(ast)
+            case expr.Logical():
+                self.__compile_logical(ast)
+            case expr.Binary():
+                self.__compile_binary(ast)
+            case expr.FuncCall():
+                self.__compile_func_call(ast)
+            case _:
+                self.__emit(Op.CONST, self.__const(None))
+
+    def __compile_literal(self, ast: expr.Literal) -> None:
+        token = ast.value
+
+        if token.tokenType == TokenType.IDENTIFIER:
+            self.__compile_load(token.lexeme, self._resolution.bindings[id(ast)])
+            return
+        if token.tokenType == TokenType.TRUE:
+            self.__emit(Op.CONST, self.__const(True))
+            return
+        if token.tokenType == TokenType.FALSE:
+            self.__emit(Op.CONST, self.__const(False))
+            return
+
+        match token.literal:
+            case str() | float():
+                self.__emit(Op.CONST, self.__const(token.literal))
+            case int():
+                self.__emit(Op.CONST, self.__const(float(token.literal)))
+            case _:
+                self.__emit(Op.RAISE, self.__const("Literal token of unexpected type: {}".format(token)))
+
+    def __compile_unary(self, ast: expr.Unary) -> None:
+        self.__compile_expression(ast.expression)
+        operator = UNARY_OPERATORS.get(ast.operator.tokenType)
+        if operator is None:
+            self.__emit(Op.RAISE, self.__const("Unexpected unary operation: {}".format(ast.operator)))
+        else:
+            self.__emit(Op.UNARY, self.__const(operator))
+
+    def __compile_logical(self, ast: expr.Logical) -> None:
+        # `Eval` formats the whole operator token into its message, not just its type
+        message = self.__const(format_invalid_literal(ast.operator))
+
+        self.__compile_expression(ast.left)
+        self.__emit(Op.CHECK_BOOL, message)
+        if ast.operator.tokenType == TokenType.OR:
+            short_circuit = self.__emit(Op.JUMP_IF_TRUE_KEEP)
+        elif ast.operator.tokenType == TokenType.AND:
+            short_circuit = self.__emit(Op.JUMP_IF_FALSE_KEEP)
+        else:
+            short_circuit = None
+            self.__emit(Op.POP)
+
+        self.__compile_expression(ast.right)
+        self.__emit(Op.CHECK_BOOL, message)
+        if short_circuit is not None:
+            self.__patch(short_circuit)
+
+    def __compile_binary(self, ast: expr.Binary) -> None:
+        self.__compile_expression(ast.left)
+        self.__compile_expression(ast.right)
+        operator = BINARY_OPERATORS.get(ast.operator.tokenType)
+        if operator is None:
+            self.__emit(Op.RAISE, self.__const("Invalid binary operation: {}".format(ast.operator)))
+        else:
+            self.__emit(Op.BINARY, self.__const(operator))
+
+    def __compile_func_call(self, ast: expr.FuncCall) -> None:
+        self.__emit(Op.LOAD_FUNC, self.__const((ast.func_name, self._resolution.bindings[id(ast)], len(ast.params))))
+        to_builtin = self.__emit(Op.JUMP_IF_BUILTIN)
+
+        # User functions bind each argument as soon as it is evaluated
+        self.__emit(Op.PREPARE_CALL)
+        for position, param in enumerate(ast.params):
+            self.__compile_expression(param)
+            self.__emit(Op.BIND_PARAM, position)
+        self.__emit(Op.CALL)
+        call_end = [self.__emit(Op.JUMP)]
+
+        self.__patch(to_builtin)
+        if len(ast.params) > 1:
+            # Some builtins (`log`) evaluate their arguments last to first
+            to_reversed = self.__emit(Op.JUMP_IF_REVERSED)
+            for param in ast.params:
+                self.__compile_expression(param)
+            self.__emit(Op.CALL_BUILTIN, len(ast.params))
+            call_end.append(self.__emit(Op.JUMP))
+
+            self.__patch(to_reversed)
+            for param in reversed(ast.params):
+                self.__compile_expression(param)
+            self.__emit(Op.CALL_BUILTIN_REVERSED, len(ast.params))
+        else:
+            for param in ast.params:
+                self.__compile_expression(param)
+            self.__emit(Op.CALL_BUILTIN, len(ast.params))
+
+        for jump in call_end:
+            self.__patch(jump)
+
+
+def compile_unresolved(name: str, func: stmt.FuncBody) -> CodeObject:
+    """Compiles a function value that was defined by another engine."""
+    return BytecodeCompiler().compile_function(name, func, Resolver().resolve_function(func))
@@ -0,0 +1,24 @@
+import time
+
+from interpreter.src.interpreter_exception import InterpreterException
+
+
+class CancellationToken:
+    """
+    Lets another thread stop a running program, or stops it once `timeout` seconds have passed since the token
+    was created. The program stops at its next loop iteration or function call.
+    """
+
+    def __init__(self, timeout: float | None = None):
+        self.cancelled = False
+        self.deadline = None if timeout is None else time.monotonic() + timeout
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+    def timed_out(self) -> bool:
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+
+class ExecutionStoppedException(InterpreterException):
+    pass
@@ -0,0 +1,649 @@
+from dataclasses import dataclass
+from typing import Callable
+
+import interpreter.src.expr as expr
+import interpreter.src.stmt as stmt
+from interpreter.src.environment import UNSET, SlotEnvironment
+from interpreter.src.eval import Eval, Literal
+from interpreter.src.completion import Completion, ReturnCompletion
+from interpreter.src.expr import Expr
+from interpreter.src.interpreter_exception import InterpreterException
+from interpreter.src.journal.journal_events import (
+    ELSE_END,
+    ELSE_START,
+    IF_END,
+    WHILE_ITERATION_END,
+    WHILE_ITERATION_START,
+    ArrayModificationEvent,
+    ElseEndEvent,
+    ElseStartEvent,
+    IfEndEvent,
+    IfStartEvent,
+    PrintEvent,
+    VariableAssignmentEvent,
+    WhileEndEvent,
+    WhileIterationEndEvent,
+    WhileIterationStartEvent,
+    WhileStartEvent,
+)
+from interpreter.src.number_array import NumberArray, make_array
+from interpreter.src.operators import BINARY_OPERATORS, UNARY_OPERATORS, format_invalid_literal
+from interpreter.src.resolver import Resolution, Resolver, SlotRef
+from interpreter.src.stmt import Stmt
+from interpreter.src.token_type import TokenType
+
+# Compiled code receives the `Eval` instance it runs on, so a compiled program holds no
+# interpreter state of its own and can be executed by any evaluator
+type CompiledStmt = Callable[[Eval], Completion]
+type CompiledExpr = Callable[[Eval], Literal]
+
+
+@dataclass
+class CompiledFunction:
+    """The compiled form of a user function, kept on its `FuncBody`."""
+    names: list[str]  # Layout of the call environment
+    param_slots: tuple[int, ...]
+    body: CompiledStmt
+
+
+def _noop(ev: Eval) -> Completion:
+    return None
+
+
+def _void(ev: Eval) -> Literal:
+    return None
+
+
+class Compiler:
+    """
+    Turns the AST produced by `Parser.parse()` into a tree of Python closures.
+
+    All the dispatching `Eval` does on every visit (matching the node type, the operator, the literal type)
+    is done once here, so running the program is only a chain of direct calls.
+    The closures follow `Eval`'s visitors step by step - they emit the same events and raise the same errors.
+    Variables are accessed through the slots assigned by the `Resolver`, nested scopes are `SlotEnvironment`s.
+    """
+
+    def __init__(self):
+        self._resolution = Resolution()
+        # Slot layout of the scope being compiled, `None` while compiling code that runs in the root scope
+        self._scope: list[str] | None = None
+
+    def compile(self, statements: list[Stmt], resolution: Resolution) -> CompiledStmt:
+        """Compiles a list of top-level statements, which run in the evaluator's root environment."""
+        self._resolution = resolution
+        self._scope = None
+        return self.__compile_sequence(statements)
+
+    def compile_function(self, func: stmt.FuncBody, resolution: Resolution) -> CompiledFunction:
+        self._resolution = resolution
+        return self.__compile_function(func)
+
+    def compile_statement(self, statement: Stmt) -> CompiledStmt:
+        match statement:
+            case stmt.Print():
+                return self.__compile_print_stmt(statement)
+            case stmt.Expression():
+                return self.__compile_expr_stmt(statement)
+            case stmt.Assignment():
+                return self.__compile_assign_stmt(statement)
+            case stmt.ArrayAssignment():
+                return self.__compile_array_assign_stmt(statement)
+            case stmt.Block():
+                return self.__compile_block_stmt(statement)
+            case stmt.If():
+                return self.__compile_if_stmt(statement)
+            case stmt.While():
+                return self.__compile_while_stmt(statement)
+            case stmt.FuncDef():
+                return self.__compile_func_def(statement)
+            case stmt.Return():
+                return self.__compile_return_stmt(statement)
+        return _noop
+
+    def compile_expression(self, ast: Expr) -> CompiledExpr:
+        match ast:
+            case expr.Constant():
+                return self.__constant(ast.value)
+            case expr.Literal():
+                return self.__compile_literal(ast)
+            case expr.ArrayLiteral():
+                return self.__compile_array_literal(ast)
+            case expr.ArrayAccess():
+                return self.__compile_array_access(ast)
+            case expr.Length():
+                return self.__compile_length(ast)
+            case expr.Grouping():
+                return self.compile_expression(ast.expression)
+            case expr.Unary():
+                return self.__compile_unary(ast)
+            case expr.Logical():
+                return self.__compile_logical(ast)
+            case expr.Binary():
+                return self.__compile_binary(ast)
+            case expr.FuncCall():
+                return self.__compile_func_call(ast)
+        return _void
+
+    def __compile_sequence(self, statements: list[Stmt]) -> CompiledStmt:
+        compiled = tuple(self.compile_statement(statement) for statement in statements)
+
+        if len(compiled) == 1:
+            return compiled[0]
+
+        def run_sequence(ev: Eval) -> Completion:
+            for statement in compiled:
+                completion = statement(ev)
+                if completion is not None:
+                    return completion
+            return None
+
+        return run_sequence
+
+    # Statement compilers
+    def __compile_print_stmt(self, statement: stmt.Print) -> CompiledStmt:
+        expression = self.compile_expression(statement.expression)
+
+        def run_print(ev: Eval) -> None:
+            value = expression(ev)
+            if PrintEvent in ev._wanted_events:
+                ev._emit_event(PrintEvent(value))
+            print(value)
+
+        return run_print
+
+    def __compile_expr_stmt(self, statement: stmt.Expression) -> CompiledStmt:
+        expression = self.compile_expression(statement.expression)
+
+        def run_expression(ev: Eval) -> None:
+            expression(ev)
+
+        return run_expression
+
+    def __compile_assign_stmt(self, statement: stmt.Assignment) -> CompiledStmt:
+        name = statement.name
+        value = self.compile_expression(statement.value)
+        store = self.__compile_store(name, self._resolution.bindings[id(statement)])
+
+        def run_assign(ev: Eval) -> None:
+            new_value = value(ev)
+            emit_assignment = VariableAssignmentEvent in ev._wanted_events
+            old_value = store(ev, new_value, emit_assignment)
+            if emit_assignment:
+                ev._emit_event(VariableAssignmentEvent(name, old_value, new_value))
+
+        return run_assign
+
+    def __compile_array_assign_stmt(self, statement: stmt.ArrayAssignment) -> CompiledStmt:
+        name = statement.name
+        idx = self.compile_expression(statement.idx)
+        value = self.compile_expression(statement.value)
+        lookup = self.__compile_lookup(name, self._resolution.bindings[id(statement)])
+
+        def run_array_assign(ev: Eval) -> None:
+            new_value = value(ev)
+
+            array = lookup(ev)
+            if array is None:
+                raise InterpreterException("variable '{}' is not defined".format(name))
+            # The elements are indexed directly (a `NumberArray`'s `items`), not through the array's methods
+            if type(array) is list:
+                items = array
+            elif type(array) is NumberArray:
+                items = array.items
+            else:
+                raise InterpreterException("Trying to access a non-array variable")
+
+            index = int(idx(ev))
+            if index < 1 or index > len(items):
+                raise InterpreterException("Invalid array indexing, exceeding array size")
+
+            old_value = items[index - 1]
+            if type(new_value) is not float and type(items) is not list:
+                # Only numbers fit in the array('d'), the array switches to a list in place
+                items = array.items = items.tolist()
+            items[index - 1] = new_value
+            if ArrayModificationEvent in ev._wanted_events:
+                ev._emit_event(ArrayModificationEvent(name, index, old_value, new_value, array))
+
+        return run_array_assign
+
+    def __compile_block_stmt(self, statement: stmt.Block) -> CompiledStmt:
+        layout = self._resolution.scopes[id(statement)]
+        if layout is None:
+            # Nothing is ever bound in this block, it runs in the enclosing scope
+            return self.__compile_sequence(statement.statements)
+
+        enclosing_scope = self._scope
+        self._scope = layout.names
+        body = self.__compile_sequence(statement.statements)
+        self._scope = enclosing_scope
+        names = layout.names
+
+        def run_block(ev: Eval) -> Completion:
+            enclosing = ev._environment
+            ev._environment = SlotEnvironment(names, enclosing)
+            try:
+                return body(ev)
+            finally:
+                ev._environment = enclosing
+
+        return run_block
+
+    def __compile_if_stmt(self, statement: stmt.If) -> CompiledStmt:
+        condition = self.compile_expression(statement.condition)
+        then_block = self.compile_statement(statement.then_block)
+
+        if statement.else_block is None:
+            def run_if(ev: Eval) -> Completion:
+                hit = condition(ev)
+                if hit:
+                    if IfStartEvent in ev._wanted_events:
+                        ev._emit_event(IfStartEvent(hit))
+                    completion = then_block(ev)
+                    if completion is not None:
+                        return completion
+                    if IfEndEvent in ev._wanted_events:
+                        ev._emit_event(IF_END)
+                else:
+                    if IfStartEvent in ev._wanted_events:
+                        ev._emit_event(IfStartEvent(False))
+                    if IfEndEvent in ev._wanted_events:
+                        ev._emit_event(IF_END)
+                return None
+
+            return run_if
+
+        else_block = self.compile_statement(statement.else_block)
+
+        def run_if_else(ev: Eval) -> Completion:
+            hit = condition(ev)
+            if hit:
+                if IfStartEvent in ev._wanted_events:
+                    ev._emit_event(IfStartEvent(hit))
+                completion = then_block(ev)
+                if completion is not None:
+                    return completion
+                if IfEndEvent in ev._wanted_events:
+                    ev._emit_event(IF_END)
+            else:
+                if ElseStartEvent in ev._wanted_events:
+                    ev._emit_event(ELSE_START)
+                completion = else_block(ev)
+                if completion is not None:
+                    return completion
+                if ElseEndEvent in ev._wanted_events:
+                    ev._emit_event(ELSE_END)
+            return None
+
+        return run_if_else
+
+    def __compile_while_stmt(self, statement: stmt.While) -> CompiledStmt:
+        condition = self.compile_expression(statement.condition)
+        body = self.compile_statement(statement.body)
+
+        def run_while(ev: Eval) -> Completion:
+            emit = ev._emit_event
+            count_step = ev._count_step
+            if WhileStartEvent in ev._wanted_events:
+                emit(WhileStartEvent("missing"))
+
+            iterations = 0
+            while condition(ev):
+                if WhileIterationStartEvent in ev._wanted_events:
+                    emit(WHILE_ITERATION_START)
+                completion = body(ev)
+                if completion is not None:
+                    return completion
+                iterations += 1
+                if WhileIterationEndEvent in ev._wanted_events:
+                    emit(WHILE_ITERATION_END)
+                count_step()
+
+            if WhileEndEvent in ev._wanted_events:
+                emit(WhileEndEvent(iterations))
+            return None
+
+        return run_while
+
+    def __compile_func_def(self, statement: stmt.FuncDef) -> CompiledStmt:
+        name = statement.func_name
+        # The definition node is left untouched, the environment gets its own copy that carries the compiled body
+        func = stmt.FuncBody(statement.func.params, statement.func.body, self.__compile_function(statement.func))
+
+        def run_func_def(ev: Eval) -> None:
+            ev._define_function(name, func)
+
+        return run_func_def
+
+    def __compile_function(self, func: stmt.FuncBody) -> CompiledFunction:
+        layout = self._resolution.functions[id(func)]
+
+        enclosing_scope = self._scope
+        self._scope = layout.names
+        # Function bodies run directly in the call's environment, without opening another scope
+        body = self.__compile_sequence(func.body.statements)
+        self._scope = enclosing_scope
+
+        return CompiledFunction(layout.names, tuple(layout.slots[param] for param in func.params), body)
+
+    def __compile_return_stmt(self, statement: stmt.Return) -> CompiledStmt:
+        ret_val = self.compile_expression(statement.ret_val)
+
+        def run_return(ev: Eval) -> Completion:
+            return ReturnCompletion(ret_val(ev))
+
+        return run_return
+
+    # Variable access
+    def __compile_lookup(self, name: str, refs: tuple[SlotRef, ...]) -> Callable[[Eval], Literal | None]:
+        """Reads `name` like `Environment.get`: the first slot holding a value, then the root scope by name."""
+        if not refs:
+            def lookup_root(ev: Eval) -> Literal | None:
+                return ev._root_environment.get(name)
+
+            return lookup_root
+
+        if len(refs) == 1 and refs[0][0] == 0:
+            slot = refs[0][1]
+
+            def lookup_local(ev: Eval) -> Literal | None:
+                value = ev._environment.slots[slot]
+                if value is UNSET:
+                    return ev._root_environment.get(name)
+                return value
+
+            return lookup_local
+
+        def lookup(ev: Eval) -> Literal | None:
+            env = ev._environment
+            climbed = 0
+            for depth, slot in refs:
+                while climbed < depth:
+                    env = env.parent
+                    climbed += 1
+                value = env.slots[slot]
+                if value is not UNSET:
+                    return value
+            return ev._root_environment.get(name)
+
+        return lookup
+
+    def __compile_load_variable(self, name: str, refs: tuple[SlotRef, ...]) -> CompiledExpr:
+        if len(refs) == 1 and refs[0][0] == 0:
+            slot = refs[0][1]
+
+            def load_local(ev: Eval) -> Literal:
+                variable = ev._environment.slots[slot]
+                if variable is UNSET:
+                    variable = ev._root_environment.get(name)
+                if variable is None:
+                    raise InterpreterException("variable '{}' is not defined".format(name))
+                return variable
+
+            return load_local
+
+        lookup = self.__compile_lookup(name, refs)
+
+        def load_variable(ev: Eval) -> Literal:
+            variable = lookup(ev)
+            if variable is None:
+                raise InterpreterException("variable '{}' is not defined".format(name))
+            return variable
+
+        return load_variable
+
+    def __compile_store(
+        self, name: str, refs: tuple[SlotRef, ...]
+    ) -> Callable[[Eval, Literal, bool], Literal | None]:
+        """
+        Assigns `name` like `Environment.assign`: the nearest existing binding is updated, otherwise
+        the name is bound in the current scope. With `want_old_value` returns the previous value, as
+        `Environment.get` would - otherwise it isn't looked up (in the root scope) and None is returned.
+        """
+        if self._scope is None:
+            def store_root(ev: Eval, value: Literal, want_old_value: bool) -> Literal | None:
+                root = ev._root_environment
+                old_value = root.get(name) if want_old_value else None
+                root.assign(name, value)
+                return old_value
+
+            return store_root
+
+        # The scope an unbound name would be bound in. The resolver leaves it out when the name is certainly
+        # bound further out already, then one of the slots or the root scope always holds it
+        local_slot = refs[0][1] if refs and refs[0][0] == 0 else None
+
+        if len(refs) == 1 and local_slot is not None:
+            def store_local(ev: Eval, value: Literal, want_old_value: bool) -> Literal | None:
+                slots = ev._environment.slots
+                old_value = slots[local_slot]
+                if old_value is UNSET:
+                    root = ev._root_environment
+                    old_value = root.get(name) if want_old_value else None
+                    if root.try_assign(name, value):
+                        return old_value
+                slots[local_slot] = value
+                return old_value
+
+            return store_local
+
+        def store(ev: Eval, value: Literal, want_old_value: bool) -> Literal | None:
+            env = ev._environment
+            climbed = 0
+            for depth, slot in refs:
+                while climbed < depth:
+                    env = env.parent
+                    climbed += 1
+                old_value = env.slots[slot]
+                if old_value is not UNSET:
+                    env.slots[slot] = value
+                    return old_value
+
+            root = ev._root_environment
+            old_value = root.get(name) if want_old_value else None
+            if not root.try_assign(name, value):
+                if local_slot is None:
+                    root.assign(name, value)
+                else:
+                    ev._environment.slots[local_slot] = value
+            return old_value
+
+        return store
+
+    # Expression compilers
+    def __compile_literal(self, ast: expr.Literal) -> CompiledExpr:
+        token = ast.value
+
+        if token.tokenType == TokenType.IDENTIFIER:
+            return self.__compile_load_variable(token.lexeme, self._resolution.bindings[id(ast)])
+
+        if token.tokenType == TokenType.TRUE:
+            return self.__constant(True)
+        if token.tokenType == TokenType.FALSE:
+            return self.__constant(False)
+
+        match token.literal:
+            case str() | float():
+                return self.__constant(token.literal)
+            case int():
+                return self.__constant(float(token.literal))
+            case _:
+                # Reported when the literal is evaluated, like the tree walker does
+                def invalid_literal(ev: Eval) -> Literal:
+                    raise InterpreterException("Literal token of unexpected type: {}".format(token))
+
+                return invalid_literal
+
+    def __constant(self, value: Literal) -> CompiledExpr:
+        def load_constant(ev: Eval) -> Literal:
+            return value
+
+        return load_constant
+
+    def __compile_array_literal(self, ast: expr.ArrayLiteral) -> CompiledExpr:
+        elts = tuple(self.compile_expression(elt) for elt in ast.elts)
+
+        def build_array(ev: Eval) -> Literal:
+            return make_array([elt(ev) for elt in elts])
+
+        return build_array
+
+    def __compile_array_access(self, ast: expr.ArrayAccess) -> CompiledExpr:
+        name = ast.name
+        idx = self.compile_expression(ast.idx)
+        lookup = self.__compile_lookup(name, self._resolution.bindings[id(ast)])
+
+        def load_element(ev: Eval) -> Literal:
+            array = lookup(ev)
+            if array is None:
+                raise InterpreterException("variable '{}' is not defined".format(name))
+            if type(array) is list:
+                items = array
+            elif type(array) is NumberArray:
+                items = array.items
+            else:
+                raise InterpreterException("Trying to access a non-array variable")
+
+            index = int(idx(ev))
+            if index < 1 or index > len(items):
+                raise InterpreterException("Invalid array indexing, exceeding array size")
+
+            return items[index - 1]
+
+        return load_element
+
+    def __compile_length(self, ast: expr.Length) -> CompiledExpr:
+        name = ast.name
+        lookup = self.__compile_lookup(name, self._resolution.bindings[id(ast)])
+
+        def load_length(ev: Eval) -> Literal:
+            variable = lookup(ev)
+            if variable is None:
+                raise InterpreterException("variable '{}' is not defined".format(name))
+            return float(len(variable))
+
+        return load_length
+
+    def __compile_unary(self, ast: expr.Unary) -> CompiledExpr:
+        operand = self.compile_expression(ast.expression)
+        operator = UNARY_OPERATORS.get(ast.operator.tokenType)
+
+        if operator is None:
+            token = ast.operator
+
+            def invalid_unary(ev: Eval) -> Literal:
+                operand(ev)
+                raise InterpreterException("Unexpected unary operation: {}".format(token))
+
+            return invalid_unary
+
+        def apply_unary(ev: Eval) -> Literal:
+            return operator(operand(ev))
+
+        return apply_unary
+
+    def __compile_logical(self, ast: expr.Logical) -> CompiledExpr:
+        left = self.compile_expression(ast.left)
+        right = self.compile_expression(ast.right)
+        # `Eval` formats the whole operator token into its message, not just its type
+        message = format_invalid_literal(ast.operator)
+
+        if ast.operator.tokenType == TokenType.OR:
+            short_circuit = True
+        elif ast.operator.tokenType == TokenType.AND:
+            short_circuit = False
+        else:
+            short_circuit = None
+
+        def apply_logical(ev: Eval) -> Literal:
+            left_value = left(ev)
+            if not isinstance(left_value, bool):
+                raise InterpreterException(message)
+            if left_value is short_circuit:
+                return short_circuit
+
+            right_value = right(ev)
+            if not isinstance(right_value, bool):
+                raise InterpreterException(message)
+            return right_value
+
+        return apply_logical
+
+    def __compile_binary(self, ast: expr.Binary) -> CompiledExpr:
+        left = self.compile_expression(ast.left)
+        right = self.compile_expression(ast.right)
+        operator = BINARY_OPERATORS.get(ast.operator.tokenType)
+
+        if operator is None:
+            token = ast.operator
+
+            def invalid_binary(ev: Eval) -> Literal:
+                left(ev)
+                right(ev)
+                raise InterpreterException("Invalid binary operation: {}".format(token))
+
+            return invalid_binary
+
+        def apply_binary(ev: Eval) -> Literal:
+            return operator(left(ev), right(ev))
+
+        return apply_binary
+
+    def __compile_func_call(self, ast: expr.FuncCall) -> CompiledExpr:
+        name = ast.func_name
+        args = tuple(self.compile_expression(param) for param in ast.params)
+        lookup = self.__compile_lookup(name, self._resolution.bindings[id(ast)])
+
+        def call(ev: Eval) -> Literal:
+            func = lookup(ev)
+            if func is None:
+                raise InterpreterException("variable '{}' is not defined".format(name))
+
+            if type(func) is not stmt.FuncBody:
+                raise InterpreterException("""An internal error has occurred, a function was used that was indeed not defined as a
+             function! For support please incessantly call 053-337-1749, thank you.""")
+            if len(func.params) != len(args):
+                raise InterpreterException("""Error: mismatched number of parameters and arguments given!
+             For support please incessantly call 053-337-1749, thank you.""")
+            if type(func.body) is stmt.Builtin:
+                return _call_builtin(ev, func.body, args)
+
+            # Functions defined by the tree walker carry no compiled body
+            compiled = func.compiled if func.compiled is not None else _compile_unresolved(func)
+
+            root = ev._root_environment
+            func_env = SlotEnvironment(compiled.names, root)
+            slots = func_env.slots
+            for p_name, slot, arg in zip(func.params, compiled.param_slots, args):
+                # Binding a parameter is an assignment: it updates a global of the same name if there is one
+                value = arg(ev)
+                if slots[slot] is not UNSET or not root.try_assign(p_name, value):
+                    slots[slot] = value
+            ev._count_step()
+
+            caller_env = ev._environment
+            ev._environment = func_env
+            try:
+                completion = compiled.body(ev)
+            finally:
+                ev._environment = caller_env
+            if completion is not None:
+                return completion.ret_val
+            return expr.Void
+
+        return call
+
+
+def _compile_unresolved(func: stmt.FuncBody) -> CompiledFunction:
+    return Compiler().compile_function(func, Resolver().resolve_function(func))
+
+
+def _call_builtin(ev: Eval, builtin: stmt.Builtin, args: tuple[CompiledExpr, ...]) -> Literal:
+    # The arguments are evaluated in the same order as `Eval.__visit_func_call` evaluates them
+    if builtin.reversed_arguments:
+        values = [arg(ev) for arg in reversed(args)]
+        values.reverse()
+    else:
+        values = [arg(ev) for arg in args]
+    return ev._call_builtin(builtin, values)
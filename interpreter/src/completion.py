@@ -0,0 +1,13 @@
+class ReturnCompletion:
+    """
+    Produced by executing a `return` statement and handed back up through the enclosing statements
+    to the function call, instead of unwinding them with an exception.
+    """
+    __slots__ = ("ret_val",)
+
+    def __init__(self, ret_val):
+        self.ret_val = ret_val
+
+
+# How a statement completed: `None` when it ran to its end, a `ReturnCompletion` when it executed a `return`
+type Completion = ReturnCompletion | None
@@ -1,7 +1,7 @@
 class Environment:
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, variables=None):
         """Creates a new environment. If parent is provided, this is a nested scope."""
-        self.variables = {}  # Stores variable bindings
+        self.variables = {} if variables is None else variables  # Stores variable bindings
         self.parent = parent  # Points to the outer environment (if any)
 
     def get(self, name):
@@ -48,3 +48,35 @@ class Environment:
 
     def __repr__(self):
         return f"Environment({self.variables}, parent={self.parent is not None})"
+
+
+# Marks a slot whose name has not been bound yet (a bound variable may still hold `None`)
+UNSET = object()
+
+
+class SlotEnvironment:
+    """
+    Array-backed scope used by resolved code (see `resolver.py`).
+    Names are bound to fixed slot indices at resolve time, the root scope stays a named `Environment`.
+    """
+    __slots__ = ("slots", "parent", "names")
+
+    def __init__(self, names: list[str], parent):
+        self.slots = [UNSET] * len(names)
+        self.parent = parent  # Either another SlotEnvironment, or the root Environment
+        self.names = names  # Slot index -> name, only needed to look a slot up by name
+
+    def get(self, name):
+        """Retrieves a variable by name, checking parent environments if necessary."""
+        if name in self.names:
+            value = self.slots[self.names.index(name)]
+            if value is not UNSET:
+                return value
+        return self.parent.get(name)
+
+    def get_root_env(self):
+        return self.parent.get_root_env()
+
+    def __repr__(self):
+        bound = {name: value for name, value in zip(self.names, self.slots) if value is not UNSET}
+        return f"SlotEnvironment({bound}, parent={self.parent is not None})"
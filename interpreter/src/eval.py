@@ -1,46 +1,126 @@
 import math
-from typing import Callable
+from types import MappingProxyType
+from typing import Callable, Container, Iterable, Optional
 import interpreter.src.expr as expr
-from interpreter.src.exceptions import ReturnException
+from interpreter.src.builtin_functions import BUILTIN_FUNCTIONS
+from interpreter.src.cancellation import CancellationToken, ExecutionStoppedException
+from interpreter.src.completion import Completion, ReturnCompletion
 from interpreter.src.expr import Expr
 from interpreter.src.Token import Token
 from interpreter.src.interpreter_exception import InterpreterException
 from interpreter.src.journal.journal_events import *
+from interpreter.src.number_array import NumberArray, make_array
 from interpreter.src.token_type import TokenType
 import interpreter.src.stmt as stmt
 from interpreter.src.stmt import Stmt
 from interpreter.src.environment import Environment
 
-type Literal = str | float | bool | list[Literal]
+type Literal = str | float | bool | list[Literal] | NumberArray
 
 # TODO: Should `Token` hold booleans as literals and not just token types?
 
+# The functions every program starts with (see `builtin_functions.py`), shared by all evaluators. Each root scope
+# starts as a copy, so a program rebinding one of these names only changes its own scope
+BUILTINS = MappingProxyType(BUILTIN_FUNCTIONS)
+
+
+class _FilteredEvents:
+    """The event types listeners want, each one also passed through an event filter (see `Eval.filter_events`)."""
+    __slots__ = ("_wanted", "_keep")
+
+    def __init__(self, wanted: frozenset[type], keep: Callable[[type], bool]):
+        self._wanted = wanted
+        self._keep = keep
+
+    def __contains__(self, event_type: type) -> bool:
+        return event_type in self._wanted and self._keep(event_type)
+
 
 # NOTE: While this class currently acts as a namespace, instance-based state will be held in later stages
 class Eval:
     def __init__(self):
-        self._environment = Environment()
-        self._event_listeners: list[Callable[[Event], None]] = []
-        self._environment.assign("mod", stmt.FuncBody(["x", "y"], stmt.BuiltinFunctions.MOD))
-        self._environment.assign("log", stmt.FuncBody(["base", "x"], stmt.BuiltinFunctions.LOG))
-        self._environment.assign("floor", stmt.FuncBody(["x"], stmt.BuiltinFunctions.FLOOR))
-        self._environment.assign("ceil", stmt.FuncBody(["x"], stmt.BuiltinFunctions.CEIL))
-
-    def subscribe(self, listener: Callable[[Event], None]):
-        self._event_listeners.append(listener)
+        self.reset()
+        # Each listener with the event types it wants, None for all of them
+        self._event_listeners: list[tuple[Callable[[Event], None], frozenset[type] | None]] = []
+        # The event types some listener wants. Events of other types are never created
+        self._wanted_events: Container[type] = frozenset()
+        self._event_filter: Callable[[type], bool] | None = None
+        # Loop iterations and function calls the program may still run, see `set_budget`
+        self._max_steps: float = math.inf
+        self._steps_left: float = math.inf
+        self._cancellation_token: CancellationToken | None = None
+
+    def reset(self):
+        """Forgets every variable and function defined so far, leaving a root scope with only the builtins."""
+        self._environment = Environment(variables=BUILTINS.copy())
+        # Compiled code reaches the root scope directly instead of walking up to it
+        self._root_environment = self._environment
+
+    def subscribe(self, listener: Callable[[Event], None], event_types: Optional[Iterable[type]] = None):
+        """Calls `listener` with every emitted event of one of `event_types`, or with every event if not given."""
+        self._event_listeners.append((listener, None if event_types is None else frozenset(event_types)))
+        self.__update_wanted_events()
         
     def unsubscribe(self, listener: Callable[[Event], None]):
-        self._event_listeners.remove(listener)
+        self._event_listeners = [entry for entry in self._event_listeners if entry[0] != listener]
+        self.__update_wanted_events()
+
+    def __update_wanted_events(self):
+        wanted = set()
+        for _, event_types in self._event_listeners:
+            wanted |= ALL_EVENT_TYPES if event_types is None else event_types
+        wanted = frozenset(wanted)
+        self._wanted_events = wanted if self._event_filter is None else _FilteredEvents(wanted, self._event_filter)
+
+    def filter_events(self, keep: Callable[[type], bool] | None):
+        """
+        Until called again with None, only creates the events listeners want that `keep` returns True for. It is asked
+        right before each of them is created, so it can account for the ones it drops.
+        """
+        self._event_filter = keep
+        self.__update_wanted_events()
         
+    # Callers check `_wanted_events` first, so events no listener wants aren't even created. It changes when a filter
+    # is set, even while a program runs, and is asked once per event
     def _emit_event(self, event: Event):
-        for listener in self._event_listeners:
-            listener(event)
-
-    def evaluate(self, statements: list[Stmt]):
+        for listener, event_types in self._event_listeners:
+            if event_types is None or type(event) in event_types:
+                listener(event)
+
+    def set_budget(self, max_steps: int | None = None, cancellation_token: CancellationToken | None = None):
+        """
+        Limits the programs run from now on to `max_steps` steps - loop iterations and function calls - and stops them
+        once `cancellation_token` is cancelled or times out. Either way `ExecutionStoppedException` is raised.
+        """
+        self._max_steps = math.inf if max_steps is None else max_steps
+        self._steps_left = self._max_steps
+        self._cancellation_token = cancellation_token
+
+    # Called by every engine at the end of each loop iteration and when a user function is called,
+    # so a program stops at the same point whichever engine runs it
+    def _count_step(self):
+        self._steps_left -= 1
+        if self._steps_left < 0:
+            raise ExecutionStoppedException(f"Execution stopped after {self._max_steps} steps")
+        token = self._cancellation_token
+        if token is not None:
+            if token.cancelled:
+                raise ExecutionStoppedException("Execution was cancelled")
+            if token.timed_out():
+                raise ExecutionStoppedException("Execution timed out")
+
+    def evaluate(self, statements: list[Stmt]) -> Completion:
         for statement in statements:
-            self.__execute_statement(statement)
+            completion = self.__execute_statement(statement)
+            if completion is not None:
+                return completion
+        return None
+
+    def execute(self, program: Callable[["Eval"], None]):
+        """Runs a program produced by `Compiler.compile` on this evaluator's environment and listeners."""
+        program(self)
 
-    def __execute_statement(self, statement: Stmt) -> None:
+    def __execute_statement(self, statement: Stmt) -> Completion:
         match statement:
             case stmt.Print():
                 self.__visit_print_stmt(statement)
@@ -53,20 +133,22 @@ class Eval:
             case stmt.ArrayAssignment():
                 self.__visit_array_assign_stmt(statement)
             case stmt.Block():
-                self.__visit_block_stmt(statement)
+                return self.__visit_block_stmt(statement)
             case stmt.If():
-                self.__visit_if_stmt(statement)
+                return self.__visit_if_stmt(statement)
             case stmt.While():
-                self.__visit_while_stmt(statement)
+                return self.__visit_while_stmt(statement)
             case stmt.FuncDef():
                 self.__visit_func_def(statement)
             case stmt.Return():
-                self.__visit_return_stmt(statement)
+                return self.__visit_return_stmt(statement)
+        return None
 
     def __visit_print_stmt(self,statement: stmt.Print):
         expression = self.expression(statement.expression)
         # TEMPORARY EVENT EMITTER
-        self._emit_event(PrintEvent(expression))
+        if PrintEvent in self._wanted_events:
+            self._emit_event(PrintEvent(expression))
         print(expression)
 
     def __visit_expr_stmt(self,statement: stmt.Expression):
@@ -75,8 +157,9 @@ class Eval:
     def __visit_assign_stmt(self, statement: stmt.Assignment):
         new_value = self.expression(statement.value)
         # TEMPORARY EVENT EMITTER
-        old_value = self._environment.get(statement.name)
-        self._emit_event(VariableAssignmentEvent(statement.name, old_value, new_value))
+        if VariableAssignmentEvent in self._wanted_events:
+            old_value = self._environment.get(statement.name)
+            self._emit_event(VariableAssignmentEvent(statement.name, old_value, new_value))
         self._environment.assign(statement.name, new_value)
 
     def __visit_array_assign_stmt(self, statement: stmt.ArrayAssignment):
@@ -86,30 +169,50 @@ class Eval:
         if array is None:
             raise InterpreterException("variable '{}' is not defined".format(statement.name))
         # TODO: Notify journal of array modification
-        if not isinstance(array, list):
+        # The elements are indexed directly (a `NumberArray`'s `items`), not through the array's methods
+        if type(array) is list:
+            items = array
+        elif type(array) is NumberArray:
+            items = array.items
+        else:
             raise InterpreterException("Trying to access a non-array variable")
 
         index = int(self.expression(statement.idx))
-        if index < 1 or index > len(array):
+        if index < 1 or index > len(items):
             raise InterpreterException("Invalid array indexing, exceeding array size")
 
         # TEMPORARY EVENT EMITTER
-        temp = array.copy()
-        array[index - 1] = new_value
-        self._emit_event(ArrayModificationEvent(statement.name, array, temp))
-
-    def __visit_block_stmt(self, statement: stmt.Block, new_env=None):
+        old_value = items[index - 1]
+        if type(new_value) is not float and type(items) is not list:
+            # Only numbers fit in the array('d'), the array switches to a list in place
+            items = array.items = items.tolist()
+        items[index - 1] = new_value
+        if ArrayModificationEvent in self._wanted_events:
+            self._emit_event(ArrayModificationEvent(statement.name, index, old_value, new_value, array))
+
+    def __visit_block_stmt(self, statement: stmt.Block, new_env=None) -> Completion:
         curr_env = self._environment
         if new_env is None:
             new_env = Environment(self._environment)
         self._environment = new_env
-        self.evaluate(statement.statements)
-        self._environment = curr_env
+        try:
+            return self.evaluate(statement.statements)
+        finally:
+            # A runtime error unwinds through here, the caller's scope must still be restored
+            self._environment = curr_env
 
     def __visit_func_def(self, statement: stmt.FuncDef):
-        if self._environment.get_root_env().get(statement.func_name) is not None:
-            raise InterpreterException(f"Error: redefinition of previously defined function {statement.func_name}")
-        self._environment.assign_to_root(statement.func_name, statement.func)
+        self._define_function(statement.func_name, statement.func)
+
+    def _define_function(self, name: str, func: stmt.FuncBody) -> None:
+        """
+        Binds a program's function in the root scope. It may shadow a builtin (programs often define their own
+        `max` or `sort`), but not a function or variable the program defined.
+        """
+        existing = self._root_environment.get(name)
+        if existing is not None and not (isinstance(existing, stmt.FuncBody) and type(existing.body) is stmt.Builtin):
+            raise InterpreterException(f"Error: redefinition of previously defined function {name}")
+        self._root_environment.assign(name, func)
 
     def __visit_func_call(self, statement: expr.FuncCall):
         func: stmt.FuncBody
@@ -123,59 +226,86 @@ class Eval:
         if len(func.params) is not len(statement.params):
             raise InterpreterException("""Error: mismatched number of parameters and arguments given!
              For support please incessantly call 053-337-1749, thank you.""")
-        if type(func.body) == stmt.BuiltinFunctions:
-            match func.body:
-                case stmt.BuiltinFunctions.MOD:
-                    return self.expression(statement.params[0]) % self.expression(statement.params[1])
-                case stmt.BuiltinFunctions.LOG:
-                    return math.log(self.expression(statement.params[1]), self.expression(statement.params[0]))
-                case stmt.BuiltinFunctions.FLOOR:
-                    return float(math.floor(self.expression(statement.params[0])))
-                case stmt.BuiltinFunctions.CEIL:
-                    return float(math.ceil(self.expression(statement.params[0])))
+        if type(func.body) is stmt.Builtin:
+            builtin = func.body
+            if builtin.reversed_arguments:
+                args = [self.expression(param) for param in reversed(statement.params)]
+                args.reverse()
+            else:
+                args = [self.expression(param) for param in statement.params]
+            return self._call_builtin(builtin, args)
 
         func_env = Environment(self._environment.get_root_env())
         for p_name, p_val in zip(func.params, statement.params):
             func_env.assign(p_name, self.expression(p_val))
-        try:
-            self.__visit_block_stmt(func.body, func_env)
-        except ReturnException as ret_val:
-            return ret_val.ret_val
+        self._count_step()
+        completion = self.__visit_block_stmt(func.body, func_env)
+        if completion is not None:
+            return completion.ret_val
         return expr.Void
 
-    def __visit_return_stmt(self, statement: Stmt):
+    def _call_builtin(self, builtin: stmt.Builtin, args: list[Literal]) -> Literal:
+        """Calls a builtin with its argument values, in declaration order. Shared with the other engines."""
+        result = builtin.implementation(*args)
+        if builtin.journaled and BuiltinCallEvent in self._wanted_events:
+            self._emit_event(BuiltinCallEvent(builtin.name, args, result))
+        return result
+
+    def __visit_return_stmt(self, statement: Stmt) -> Completion:
         expression = self.expression(statement.ret_val)
-        raise ReturnException(expression)
+        return ReturnCompletion(expression)
 
-    def __visit_if_stmt(self, statement: stmt.If):
+    # A `return` completes the enclosing statements right away, without emitting their end events
+    def __visit_if_stmt(self, statement: stmt.If) -> Completion:
         condition = self.expression(statement.condition)
 
         if condition:
-            self._emit_event(IfStartEvent(condition))
-            self.__execute_statement(statement.then_block)
-            self._emit_event(IfEndEvent())
+            if IfStartEvent in self._wanted_events:
+                self._emit_event(IfStartEvent(condition))
+            completion = self.__execute_statement(statement.then_block)
+            if completion is not None:
+                return completion
+            if IfEndEvent in self._wanted_events:
+                self._emit_event(IF_END)
         elif statement.else_block is not None:
-            self._emit_event(ElseStartEvent())
-            self.__execute_statement(statement.else_block)
-            self._emit_event(ElseEndEvent())
+            if ElseStartEvent in self._wanted_events:
+                self._emit_event(ELSE_START)
+            completion = self.__execute_statement(statement.else_block)
+            if completion is not None:
+                return completion
+            if ElseEndEvent in self._wanted_events:
+                self._emit_event(ELSE_END)
         else:
-            self._emit_event(IfStartEvent(False))
-            self._emit_event(IfEndEvent())
+            if IfStartEvent in self._wanted_events:
+                self._emit_event(IfStartEvent(False))
+            if IfEndEvent in self._wanted_events:
+                self._emit_event(IF_END)
+        return None
 
-    def __visit_while_stmt(self, statement: stmt.While):
-        self._emit_event(WhileStartEvent("missing"))
+    def __visit_while_stmt(self, statement: stmt.While) -> Completion:
+        if WhileStartEvent in self._wanted_events:
+            self._emit_event(WhileStartEvent("missing"))
 
         iterations = 0
         while self.expression(statement.condition):
-            self._emit_event(WhileIterationStartEvent())
-            self.__execute_statement(statement.body)
+            if WhileIterationStartEvent in self._wanted_events:
+                self._emit_event(WHILE_ITERATION_START)
+            completion = self.__execute_statement(statement.body)
+            if completion is not None:
+                return completion
             iterations += 1
-            self._emit_event(WhileIterationEndEvent())
+            if WhileIterationEndEvent in self._wanted_events:
+                self._emit_event(WHILE_ITERATION_END)
+            self._count_step()
 
-        self._emit_event(WhileEndEvent(iterations))
+        if WhileEndEvent in self._wanted_events:
+            self._emit_event(WhileEndEvent(iterations))
+        return None
 
     def expression(self, ast: Expr) -> Literal:
         match ast:
+            case expr.Constant():
+                return ast.value
             case expr.Literal():
                 return self.__visit_literal(ast)
             case expr.ArrayLiteral():
@@ -225,21 +355,25 @@ class Eval:
             # TODO: Constrain array elements types to be of the same one
             evaluated_elts.append(self.expression(elt))
 
-        return evaluated_elts
+        return make_array(evaluated_elts)
 
     def __visit_array_access(self, expr: expr.ArrayAccess) -> Literal:
         array = self._environment.get(expr.name)
         if array is None:
             raise InterpreterException("variable '{}' is not defined".format(expr.name))
         # TODO: Notify journal of array modification
-        if not isinstance(array, list):
+        if type(array) is list:
+            items = array
+        elif type(array) is NumberArray:
+            items = array.items
+        else:
             raise InterpreterException("Trying to access a non-array variable")
 
         index = int(self.expression(expr.idx))
-        if index < 1 or index > len(array):
+        if index < 1 or index > len(items):
             raise InterpreterException("Invalid array indexing, exceeding array size")
 
-        return array[index - 1]
+        return items[index - 1]
 
     def __visit_length(self, expr: expr.Length) -> Literal:
         variable = self._environment.get(expr.name)
@@ -7,7 +7,9 @@ from dataclasses import dataclass
 from interpreter.src.Token import Token
 from interpreter.src.token_type import TokenType
 
-type Expr = Grouping | Binary | Logical | Unary | Literal | ArrayLiteral | ArrayAccess | FuncCall | Void | Length
+type Expr = (
+    Grouping | Binary | Logical | Unary | Literal | Constant | ArrayLiteral | ArrayAccess | FuncCall | Void | Length
+)
 
 
 @dataclass
@@ -40,6 +42,11 @@ class Unary:
 class Literal:
     value: Token
 
+# A value known before the program runs: a literal, or an operation on constants (see `optimizer.py`)
+@dataclass
+class Constant:
+    value: float | str | bool
+
 @dataclass
 class ArrayLiteral:
     elts: list[Expr]
@@ -72,6 +79,8 @@ def display(expr: Expr) -> str:
             return "({} {} {})".format(display(left), operator, display(right))
         case Unary(operator, expr):
             return "({} {})".format(operator, display(expr))
+        case Constant(value):
+            return str(value)
         case Literal(value):
             match value.tokenType:
                 case TokenType.FALSE | TokenType.TRUE | TokenType.NIL:
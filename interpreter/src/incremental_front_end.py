@@ -0,0 +1,225 @@
+import itertools
+from bisect import bisect_right
+
+from interpreter.src.interpreter_exception import InterpreterException
+from interpreter.src.parser import Parser
+from interpreter.src.Scanner import Scanner
+from interpreter.src.stmt import Stmt
+from interpreter.src.Token import Token
+from interpreter.src.token_type import TokenType
+
+# The shortest chunk, in characters (at least 1). Fewer, longer chunks make the bookkeeping of an update cheaper, and each
+# rescan longer
+MIN_CHUNK_LENGTH = 1024
+
+# How many characters `_common_prefix_length` compares at once
+COMPARED_BLOCK_SIZE = 4096
+
+# Tokens a top-level statement can start with that don't start at the beginning of its line
+_SCOPE_TOKENS = (TokenType.START_SCOPE, TokenType.END_SCOPE, TokenType.EOL)
+
+
+class _Chunk:
+    """
+    A run of top-level statements, starting at the beginning of a line with no indentation. Scanning and parsing
+    can start over at such a line: the indentation stack is back to [0] and the parser is between statements.
+    """
+    __slots__ = ("start", "line", "scanned_start", "scanned_line", "tokens", "statements")
+
+    def __init__(self, start: int, line: int, tokens: list[Token], statements: list[Stmt]):
+        self.start = start
+        self.line = line
+        # Where the chunk was when its tokens were scanned. Later edits before it only move `start` and `line`
+        self.scanned_start = start
+        self.scanned_line = line
+        self.tokens = tokens
+        self.statements = statements
+
+
+class _NeedsMoreSource(Exception):
+    """Scanning or parsing a part of the source failed in a way the source after it might have prevented."""
+
+    def __init__(self, until_end: bool, from_start: bool = False):
+        self.until_end = until_end
+        self.from_start = from_start
+
+
+class IncrementalFrontEnd:
+    """
+    Scans and parses successive versions of one program, like the sources a live editing session sends.
+
+    The previous version's tokens and statements are kept in chunks of top-level statements. On an update, only
+    the chunks the edit touched are scanned and parsed again, the statements of the others are reused as is. When
+    the edit's effect can reach further (it opens a string, or leaves a statement unfinished), the rescanned part
+    grows until it is self-contained, up to the whole rest of the source.
+    Produces the same statements, and raises the same errors, as scanning and parsing the whole source would.
+
+    Reused statements keep the tokens they were parsed from, with the positions they were scanned at (nothing reads
+    them after parsing). `tokens` has every token at its position in the current source.
+    """
+
+    def __init__(self):
+        self._source = ""
+        self._chunks: list[_Chunk] = []
+        self._statements: list[Stmt] = []
+        # What the last update scanned and parsed again, in characters
+        self.last_rescanned = 0
+
+    @property
+    def source(self) -> str:
+        return self._source
+
+    @property
+    def statements(self) -> list[Stmt]:
+        return self._statements
+
+    @property
+    def tokens(self) -> list[Token]:
+        """The tokens of the current source, ending with EOF, as `Scanner.scan_tokens` would return them."""
+        tokens = []
+        for chunk in self._chunks:
+            shift = chunk.start - chunk.scanned_start
+            line_shift = chunk.line - chunk.scanned_line
+            if shift == 0 and line_shift == 0:
+                tokens.extend(chunk.tokens)
+                continue
+            for token in chunk.tokens:
+                start, end = token.char_range
+                tokens.append(Token(
+                    token.tokenType, token.lexeme, token.literal, token.line + line_shift, (start + shift, end + shift)
+                ))
+        end = len(self._source)
+        tokens.append(Token(TokenType.EOF, "", None, self._source.count("\n") + 1, (end, end)))
+        return tokens
+
+    def update(self, source: str) -> list[Stmt]:
+        """
+        Parses `source`, the new version of the program, and returns its statements. On a scanning or parsing error
+        the error is raised, and the front end stays at the previous version.
+        """
+        old_source = self._source
+        if source == old_source and self._chunks:
+            self.last_rescanned = 0
+            return self._statements
+
+        chunks = self._chunks
+        prefix = _common_prefix_length(old_source, source)
+        suffix = _common_suffix_length(old_source, source, min(len(old_source), len(source)) - prefix)
+        delta = len(source) - len(old_source)
+
+        starts = [chunk.start for chunk in chunks]
+        # An edit at the start of a line also changes the newline before it (it is scanned with the indentation)
+        first = max(bisect_right(starts, max(prefix - 1, 0)) - 1, 0)
+        # Changing the first token of a chunk can also change the statement before it: the line can become an
+        # `else`, or be indented into the block before it
+        if first > 0 and prefix <= _first_token_end(chunks[first]):
+            first -= 1
+        # The chunks starting after the last changed character, the newline before them included, are kept
+        last = bisect_right(starts, len(old_source) - suffix)
+
+        extension = 1
+        while True:
+            region_start, line = (chunks[first].start, chunks[first].line) if chunks else (0, 1)
+            region_end = chunks[last].start + delta if last < len(chunks) else len(source)
+            try:
+                new_chunks = _scan_and_parse(source, region_start, region_end, line, region_end == len(source))
+                break
+            except _NeedsMoreSource as needs_more:
+                if needs_more.from_start:
+                    first = 0
+                last = len(chunks) if needs_more.until_end else min(last + extension, len(chunks))
+                extension *= 2
+
+        line_delta = (
+            source.count("\n", region_start, region_end)
+            - old_source.count("\n", region_start, region_end - delta)
+        )
+        for chunk in chunks[last:]:
+            chunk.start += delta
+            chunk.line += line_delta
+        chunks[first:last] = new_chunks
+
+        self._source = source
+        self._statements = list(itertools.chain.from_iterable(chunk.statements for chunk in chunks))
+        self.last_rescanned = region_end - region_start
+        return self._statements
+
+
+def _scan_and_parse(source: str, start: int, end: int, line: int, is_rest: bool) -> list[_Chunk]:
+    """Scans and parses `source[start:end]` on its own, into chunks. `is_rest` if it runs to the end of `source`."""
+    scanner = Scanner(source)
+    try:
+        scanned = scanner.scan_with_pattern(start, end, line)
+    except InterpreterException as error:
+        # The string might end after `end`
+        if not is_rest and "Unterminated string" in str(error):
+            raise _NeedsMoreSource(until_end=True)
+        raise
+    if not scanned:
+        # Non-ASCII sources are scanned character by character, which only scans whole sources
+        if start != 0 or not is_rest:
+            raise _NeedsMoreSource(until_end=True, from_start=True)
+        tokens = Scanner(source).scan_tokens()
+    else:
+        tokens = scanner._tokens
+        tokens.append(Token(TokenType.EOF, "", None, scanner._line, (end, end)))
+
+    parser = Parser(tokens)
+    try:
+        statements = parser.parse()
+    except Exception:
+        # A statement left unfinished might be finished by what follows (like an `if` whose body is the next line)
+        if not is_rest and parser._pos >= len(tokens) - 1:
+            raise _NeedsMoreSource(until_end=False)
+        raise
+
+    # A statement starts a new chunk when it starts its line
+    chunk_starts = [(0, start, line, 0)]
+    for statement_index, token_index in enumerate(parser.statement_starts):
+        token = tokens[token_index]
+        token_start = token.char_range[0]
+        if (
+            token_start - chunk_starts[-1][1] >= MIN_CHUNK_LENGTH
+            and token.tokenType not in _SCOPE_TOKENS and source[token_start - 1] == "\n"
+        ):
+            chunk_starts.append((token_index, token_start, token.line, statement_index))
+    chunk_starts.append((len(tokens) - 1, end, None, len(statements)))
+
+    return [
+        _Chunk(chunk_start, chunk_line, tokens[first_token:next_token], statements[first_statement:next_statement])
+        for (first_token, chunk_start, chunk_line, first_statement), (next_token, _, _, next_statement)
+        in zip(chunk_starts, chunk_starts[1:])
+    ]
+
+
+def _first_token_end(chunk: _Chunk) -> int:
+    if not chunk.tokens:
+        return chunk.start
+    return chunk.tokens[0].char_range[1] + chunk.start - chunk.scanned_start
+
+
+def _common_prefix_length(first: str, second: str) -> int:
+    length = min(len(first), len(second))
+    position = 0
+    # Whole blocks are compared in C, only the block that differs is searched
+    while position < length and first[position:position + COMPARED_BLOCK_SIZE] == second[position:position + COMPARED_BLOCK_SIZE]:
+        position += COMPARED_BLOCK_SIZE
+    position = min(position, length)
+    while position < length and first[position] == second[position]:
+        position += 1
+    return position
+
+
+def _common_suffix_length(first: str, second: str, limit: int) -> int:
+    """The length of the common suffix of `first` and `second`, up to `limit`."""
+    first_end, second_end = len(first), len(second)
+    length = 0
+    while (
+        length + COMPARED_BLOCK_SIZE <= limit
+        and first[first_end - length - COMPARED_BLOCK_SIZE:first_end - length]
+        == second[second_end - length - COMPARED_BLOCK_SIZE:second_end - length]
+    ):
+        length += COMPARED_BLOCK_SIZE
+    while length < limit and first[first_end - length - 1] == second[second_end - length - 1]:
+        length += 1
+    return length
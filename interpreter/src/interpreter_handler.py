@@ -1,47 +1,142 @@
+from enum import Enum
 from typing import Optional
+from interpreter.src.ast_cache import AstCache
+from interpreter.src.bytecode import BytecodeCompiler
+from interpreter.src.cancellation import CancellationToken
+from interpreter.src.compiler import Compiler
 from interpreter.src.eval import Eval, Literal
 from interpreter.src.interpreter_exception import InterpreterException
 from interpreter.src.journal.journal_events import ErrorEvent
+from interpreter.src.optimizer import Optimizer
 from interpreter.src.parser import Parser
+from interpreter.src.resolver import Resolver
 from interpreter.src.Scanner import Scanner
+from interpreter.src.vm import VM
 from interpreter.src.expr import display
-from interpreter.src.journal.journal import Journal, JournalSettings
+from interpreter.src.journal.journal import BaseJournal, Journal, JournalSettings
+
+
+class Engine(Enum):
+    """How `Interpreter` runs a parsed block. All engines emit the same events and raise the same errors."""
+    TREE_WALKER = "tree_walker"  # `Eval` visits the AST directly
+    COMPILED = "compiled"  # the AST is compiled into Python closures
+    BYTECODE = "bytecode"  # the AST is compiled into bytecode run by the stack VM
+
 
 class Interpreter:
     # reset_journal indicates whether to reset the journal before each feedBlock
-    def __init__(self, journal_settings: JournalSettings, reset_journal: bool = False):
-        self._journal: Journal = None
+    # ast_cache, when given, is used to reuse the parsed AST of a source that was already fed (possibly by another interpreter)
+    # journal, when given, records every block instead of a journal created from journal_settings (and is never reset).
+    # feedBlock returns it, otherwise it returns a `Journal`
+    def __init__(
+        self,
+        journal_settings: JournalSettings,
+        reset_journal: bool = False,
+        engine: Engine = Engine.COMPILED,
+        ast_cache: Optional[AstCache] = None,
+        journal: Optional[BaseJournal] = None,
+    ):
+        self._journal: BaseJournal = journal
+        self._owns_journal = journal is None
         self._journal_settings: JournalSettings = journal_settings
-        self._reset_journal = reset_journal
+        self._reset_journal = reset_journal and journal is None
+        self._engine = engine
+        self._ast_cache = ast_cache
         
         self._evaluator = Eval()
-        self._evaluator.subscribe(self._handle_event)
+        # The journal drops events outside its whitelist, they aren't emitted at all
+        settings = journal.settings if journal is not None else journal_settings
+        self._evaluator.subscribe(self._handle_event, settings.whitelist or None)
+        # The journal the evaluator asks before creating each event, see `_follow_journal`
+        self._eliding_journal: Optional[BaseJournal] = None
+        self._optimizer = Optimizer()
+        self._resolver = Resolver()
+        self._compiler = Compiler()
+        self._bytecode_compiler = BytecodeCompiler()
+        self._vm = VM()
+
+    @property
+    def journal_settings(self) -> JournalSettings:
+        return self._journal_settings
+
+    def reset(self, journal_settings: Optional[JournalSettings] = None) -> None:
+        """
+        Returns the interpreter to the state it was created in: the variables and functions of the blocks fed so far
+        are forgotten, and so is the last journal (unless the interpreter was given its journal).
+        Later blocks are journaled with `journal_settings` when given.
+        """
+        self._evaluator.reset()
+        self._evaluator.set_budget()
+        if self._owns_journal:
+            self._journal = None
+        if journal_settings is not None and journal_settings is not self._journal_settings:
+            if not self._owns_journal:
+                raise ValueError("The settings of a given journal can't be changed")
+            self._journal_settings = journal_settings
+            self._evaluator.unsubscribe(self._handle_event)
+            self._evaluator.subscribe(self._handle_event, journal_settings.whitelist or None)
 
     def _handle_event(self, event) -> None:
         self._journal.add_event(event)
+        self._follow_journal()
+
+    # While the journal elides events (past its limits) the evaluator asks it about each one instead of creating it.
+    # Once a left out scope ends the next event is created again, and recording it stops the filter
+    def _follow_journal(self) -> None:
+        journal = self._journal if self._journal.is_eliding() else None
+        if journal is not self._eliding_journal:
+            self._eliding_journal = journal
+            self._evaluator.filter_events(None if journal is None else journal.records)
 
-    def feedBlock(self, code_block: str) -> Journal:
+    # max_steps limits the loop iterations and function calls the block may run, cancellation_token lets another
+    # thread stop it. A block stopped either way ends with an error in the journal
+    def feedBlock(
+        self,
+        code_block: str,
+        max_steps: Optional[int] = None,
+        cancellation_token: Optional[CancellationToken] = None,
+    ) -> BaseJournal:
         # Initial journal or reset it
         if self._journal is None or self._reset_journal:
             self._journal = Journal(self._journal_settings)
 
-        scanner = Scanner(code_block)
-        try:
-            tokens = scanner.scan_tokens()
-        except InterpreterException as e:
-            self._journal.add_event(ErrorEvent(str(e)))
-            return self._journal
+        if self._ast_cache is not None:
+            try:
+                stmt_ast_opt = self._ast_cache.parse(code_block)
+            except InterpreterException as e:
+                self._journal.add_event(ErrorEvent(str(e)))
+                return self._journal
+        else:
+            scanner = Scanner(code_block)
+            try:
+                tokens = scanner.scan_tokens()
+            except InterpreterException as e:
+                self._journal.add_event(ErrorEvent(str(e)))
+                return self._journal
 
-        parser = Parser(tokens)
-        try:
-            stmt_ast_opt = parser.parse()
-        except InterpreterException as e:
-            self._journal.add_event(ErrorEvent(str(e)))
-            return self._journal
+            parser = Parser(tokens)
+            try:
+                stmt_ast_opt = self._optimizer.optimize(parser.parse())
+            except InterpreterException as e:
+                self._journal.add_event(ErrorEvent(str(e)))
+                return self._journal
                 
+        self._evaluator.set_budget(max_steps, cancellation_token)
+        self._follow_journal()
         try:
-            self._evaluator.evaluate(stmt_ast_opt)
+            self._run(stmt_ast_opt)
         except InterpreterException as e:
             self._journal.add_event(ErrorEvent(str(e)))
     
-        return self._journal
\ No newline at end of file
+        return self._journal
+
+    def _run(self, statements) -> None:
+        if self._engine == Engine.TREE_WALKER:
+            self._evaluator.evaluate(statements)
+            return
+
+        resolution = self._resolver.resolve(statements)
+        if self._engine == Engine.BYTECODE:
+            self._vm.run(self._evaluator, self._bytecode_compiler.compile(statements, resolution))
+        else:
+            self._evaluator.execute(self._compiler.compile(statements, resolution))
@@ -0,0 +1,66 @@
+import contextlib
+import threading
+from typing import Iterator, Optional
+
+from interpreter.src.ast_cache import AstCache
+from interpreter.src.interpreter_handler import Engine, Interpreter
+from interpreter.src.journal.journal import JournalSettings
+
+DEFAULT_MAX_IDLE = 8
+
+
+class InterpreterPool:
+    """
+    Interpreters kept ready to run programs, safe to use from any thread.
+
+    A checked out interpreter starts with only the builtins defined and a new journal for every block, as if it was
+    just created - but without creating its evaluator, resolver, compilers and VM again. Returned interpreters are
+    reset right away, so an idle one doesn't keep the last program's variables and journal alive. At most `max_idle`
+    interpreters are kept, more are created when all of them are checked out.
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        ast_cache: Optional[AstCache] = None,
+        max_idle: int = DEFAULT_MAX_IDLE,
+        prestart: int = 0,
+    ):
+        self._engine = engine
+        self._ast_cache = ast_cache
+        self._max_idle = max_idle
+        self._lock = threading.Lock()
+        self._idle = [self._create(JournalSettings()) for _ in range(min(prestart, max_idle))]
+        self.created = len(self._idle)
+        self.reused = 0
+
+    def _create(self, journal_settings: JournalSettings) -> Interpreter:
+        return Interpreter(journal_settings, True, self._engine, self._ast_cache)
+
+    @contextlib.contextmanager
+    def interpreter(self, journal_settings: JournalSettings) -> Iterator[Interpreter]:
+        """Checks out an interpreter journaling with `journal_settings`, for the duration of the `with` block."""
+        with self._lock:
+            interpreter = self._idle.pop() if self._idle else None
+            if interpreter is None:
+                self.created += 1
+            else:
+                self.reused += 1
+
+        if interpreter is None:
+            interpreter = self._create(journal_settings)
+        elif interpreter.journal_settings is not journal_settings:
+            # Already reset when it was returned
+            interpreter.reset(journal_settings)
+        try:
+            yield interpreter
+        finally:
+            interpreter.reset()
+            with self._lock:
+                if len(self._idle) < self._max_idle:
+                    self._idle.append(interpreter)
+
+    def __len__(self) -> int:
+        """How many interpreters are idle."""
+        with self._lock:
+            return len(self._idle)
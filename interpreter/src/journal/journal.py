@@ -1,14 +1,25 @@
-from typing import Dict, List, Optional, Any, Union, Tuple
+import json
+import math
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Any, Set, Union, Tuple, TextIO, Iterator
 from dataclasses import dataclass, field
+from interpreter.src.interpreter_exception import InterpreterException
 from interpreter.src.journal.journal_events import *
 
 # IMPORTANT - an event is allowed if its in the whitelist, or the whitelist is null
+# max_length is the number of events recorded, max_depth the number of nested scopes recorded. Events past either limit
+# are only counted, into an ELIDED event. Errors are always recorded.
+# stop_when_full stops the execution (with an error) once max_length is reached, for when nothing else would be recorded
+# array_snapshot_interval - the first recorded modification of an array, and then every so many, also record the whole
+# array. The others only record the modified element. 0 never records the whole array
 @dataclass
 class JournalSettings:
     """Settings for the journal."""
     whitelist: Dict[type, bool] = None
     max_length: int = 1000
     max_depth: int = 10
+    stop_when_full: bool = False
+    array_snapshot_interval: int = 50
 
 OPENING_EVENTS = {
     IfStartEvent: IfEndEvent,
@@ -19,16 +30,59 @@ OPENING_EVENTS = {
     WhileIterationStartEvent: WhileIterationEndEvent,
     FunctionCallEvent: FunctionCallEndEvent  # Functions close with RETURN, but not required
 }
+
+ITERATION_EVENTS = (WhileIterationStartEvent, ForIterationStartEvent)
+
+# How much JSON a `StreamingJournal` buffers before writing it to its sink
+DEFAULT_CHUNK_SIZE = 16 * 1024
+
+
+class JournalFullException(InterpreterException):
+    pass
     
-class Journal:
+class ScopeEntry:
+    """A scope in the journal's event tree: its start event, the entries inside it, and its end event once closed."""
+    __slots__ = ("start", "children", "end")
+
+    def __init__(self, start: ScopeStartEvent):
+        self.start = start
+        self.children: List[Union[Event, "ScopeEntry", Dict[str, Any]]] = []
+        self.end: Optional[ScopeEndEvent] = None
+
+    def serialize(self, children: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Serializes the scope around its already serialized `children`."""
+        event_json = self.start.serialize()
+        event_json["children"] = children
+        if self.end is not None:
+            # append all the end event fields to the start event, so we have one complete event
+            for key, value in self.end.serialize().items():
+                if key not in event_json:
+                    event_json[key] = value
+        return event_json
+
+
+class BaseJournal(ABC):
+    """
+    Decides which of the events added to a journal are recorded: those in the settings' whitelist, within its length
+    and depth limits, while events past the limits are counted into ELIDED summaries. How the recorded events are
+    kept is up to the subclass: `Journal` builds them into a tree, `StreamingJournal` writes them out as JSON.
+    """
     def __init__(self, settings: JournalSettings):
         self.settings: JournalSettings = settings
-        self.events: List[Event] = []
-        self.current_event_id: int = 0
-        
-        self.tree: List = []
-        self.scope_json_stack: List = []
-        self.scope_event_stack: List = []
+        # The start event type of every open scope
+        self.scope_event_stack: List[type] = []
+        # The entry of every open scope (see `_add_entry`), `None` for a scope that is left out. The recorded ones are
+        # also kept on their own
+        self.scope_entry_stack: List[Any] = []
+        self.recorded_scope_stack: List[Any] = []
+
+        self.length: int = 0
+        # How many modifications of each array were recorded, by the array's id. The arrays are kept as well, so their
+        # ids aren't reused by other arrays
+        self.array_modifications: Dict[int, int] = {}
+        self.modified_arrays: List[Any] = []
+        # The summary the events being left out are counted in, until an event is recorded again
+        self._elided: Optional[ElidedEvent] = None
 
     def _is_event_allowed(self, event: Event):
         return not self.settings.whitelist or (type(event) in self.settings.whitelist)
@@ -36,56 +90,293 @@ class Journal:
     def add_event(self, event: Event) -> None:
         if not self._is_event_allowed(event):
             return
-        
-        event_json = event.serialize()
-            
-        # if its a closing event, append data to the matching start event and quit
-        # TODO check if a scope end is skipped
+        if not self.records(type(event)):
+            return
+
+        # a closing event of a recorded scope is attached to the matching start event
         if isinstance(event, ScopeEndEvent):
+            self.scope_event_stack.pop()
+            entry = self.scope_entry_stack.pop()
+            self.recorded_scope_stack.pop()
+            self._elided = None
+            self._end_scope(entry, event)
+            return
+
+        self.length += 1
+        self._elided = None
+        if isinstance(event, ArrayModificationEvent) and not self._keeps_array_snapshot(event):
+            event = event.without_array()
+        entry = self._add_entry(event)
+
+        # if the event is a scope start, it holds the events that follow until its end
+        if isinstance(event, ScopeStartEvent):
+            self.scope_event_stack.append(type(event))
+            self.scope_entry_stack.append(entry)
+            self.recorded_scope_stack.append(entry)
+
+    def records(self, event_type: type) -> bool:
+        """
+        Whether an event of `event_type` added now is recorded. One that isn't is taken care of from its type alone, so
+        an evaluator can ask (once per event) before creating it and skip the events left out, see `is_eliding`.
+        """
+        if issubclass(event_type, ScopeEndEvent):
+            # TODO check if a scope end is skipped
             next_close = None
             if len(self.scope_event_stack) != 0:
-                next_close = OPENING_EVENTS[type(self.scope_event_stack[-1])]
+                next_close = OPENING_EVENTS[self.scope_event_stack[-1]]
             else:
-                print(f'[JOURNAL] Warning: Tried to close scope {event.EVENT_TYPE} but no scopes exist!')
-            
-            if next_close is not None and isinstance(event, next_close):
-                # append all the end event fields to the start event, so we have one complete event
-                self._append_dict(event_json, self.scope_json_stack[-1])
-                self.scope_json_stack.pop()
-                self.scope_event_stack.pop()
-            else:
-                print(f'[JOURNAL] Warning: expected to a scope close of type {next_close} but got {event.EVENT_TYPE}.')
-                
-            return
-        
-        if len(self.scope_event_stack) != 0:
-            self.scope_json_stack[-1]["children"].append(event_json)
-        else:
-            self.tree.append(event_json)
-        
-        # if the event is a scope start, add it to the stack
-        if isinstance(event, ScopeStartEvent):
-            event_json["children"] = []
-            self.scope_event_stack.append(event)
-            self.scope_json_stack.append(event_json)
-            
-        # print("EVENT:", event_json)
-        # print()
-        # print("TREE:", json.dumps(self.tree, indent=4))
-        # print()
-        # print("STACK:", self.scope_event_stack)
-        # print()
-        # print("JSON STACK:", (self.scope_json_stack))
-        # print("\n\n============\n\n")
-            
-    def _append_dict(self, dict_from, dict_to):
-        for key, value in dict_from.items():
-            if key not in dict_to:
-                dict_to[key] = value
+                print(f'[JOURNAL] Warning: Tried to close scope {event_type.EVENT_TYPE} but no scopes exist!')
+
+            if next_close is None or not issubclass(event_type, next_close):
+                print(f'[JOURNAL] Warning: expected to a scope close of type {next_close} but got {event_type.EVENT_TYPE}.')
+                return False
+            if self.scope_entry_stack[-1] is not None:
+                return True
+            self.scope_event_stack.pop()
+            self.scope_entry_stack.pop()
+            return False
+
+        is_scope_start = issubclass(event_type, ScopeStartEvent)
+        if issubclass(event_type, ErrorEvent) or not self._is_left_out(is_scope_start):
+            return True
+        self._leave_out(event_type)
+        if is_scope_start:
+            self.scope_event_stack.append(event_type)
+            self.scope_entry_stack.append(None)
+        if self.settings.stop_when_full and self.length >= self.settings.max_length:
+            raise JournalFullException(
+                f"Stopped after {self.settings.max_length} events, the limit of what can be shown"
+            )
+        return False
+
+    def is_eliding(self) -> bool:
+        """
+        Whether the events added now are left out - all of them but errors and the ends of open scopes, until the
+        innermost left out scope ends. Meanwhile an evaluator can ask `records` instead of creating the events.
+        """
+        return self._is_left_out(False)
+
+    def _is_left_out(self, is_scope_start: bool) -> bool:
+        if len(self.scope_entry_stack) != 0 and self.scope_entry_stack[-1] is None:
+            return True
+        if self.length >= self.settings.max_length:
+            return True
+        return is_scope_start and len(self.recorded_scope_stack) >= self.settings.max_depth
+
+    def _keeps_array_snapshot(self, event: ArrayModificationEvent) -> bool:
+        """Whether the whole array is recorded with this modification of it, see `array_snapshot_interval`."""
+        interval = self.settings.array_snapshot_interval
+        if interval <= 0:
+            return False
+        # Nothing to count without an array, or when every modification keeps it
+        if event.array is None or interval == 1:
+            return True
+        key = id(event.array)
+        count = self.array_modifications.get(key, 0)
+        if count == 0:
+            self.modified_arrays.append(event.array)
+        self.array_modifications[key] = count + 1
+        return count % interval == 0
+
+    def _leave_out(self, event_type: type) -> None:
+        """Counts an event that isn't recorded, it is never kept or serialized."""
+        if self._elided is None:
+            self._elided = ElidedEvent(0, 0)
+            self._add_elided(self._elided)
+        self._elided.events += 1
+        if issubclass(event_type, ITERATION_EVENTS):
+            self._elided.iterations += 1
+
+    @abstractmethod
+    def _add_entry(self, event: Event) -> Any:
+        """Records an event in the innermost recorded scope and returns its entry, passed to `_end_scope` for a scope."""
+
+    @abstractmethod
+    def _add_elided(self, elided: ElidedEvent) -> None:
+        """Records a summary of left out events, which keeps counting events until another one is recorded."""
+
+    @abstractmethod
+    def _end_scope(self, entry: Any, event: ScopeEndEvent) -> None:
+        """Closes the recorded scope of `entry`."""
+
+
+class Journal(BaseJournal):
+    """A journal that keeps the recorded events as a tree, serialized on demand."""
+    def __init__(self, settings: JournalSettings):
+        super().__init__(settings)
+        # Events are kept as they are until `serialize` replaces them by their JSON
+        self.tree: List[Union[Event, ScopeEntry, Dict[str, Any]]] = []
+
+    def _add_entry(self, event: Event) -> Any:
+        # The event is serialized later, by then the arrays it refers to might have changed
+        event = event.snapshot()
+        entry = ScopeEntry(event) if isinstance(event, ScopeStartEvent) else event
+        self._children().append(entry)
+        return entry
+
+    def _add_elided(self, elided: ElidedEvent) -> None:
+        # Kept updated in place while it counts events
+        self._children().append(elided)
+
+    def _end_scope(self, entry: ScopeEntry, event: ScopeEndEvent) -> None:
+        entry.end = event
+
+    def _children(self) -> List[Union[Event, ScopeEntry]]:
+        if len(self.recorded_scope_stack) != 0:
+            return self.recorded_scope_stack[-1].children
+        return self.tree
     
     def serialize(self) -> Dict[str, Any]:
-        """Builds and returns the JSON representation of the journal."""
-        # event_tree = self.tree #_build_event_tree()
+        """
+        Builds and returns the JSON representation of the journal. The entries that can't change anymore are replaced
+        by their JSON as it is built, so the events and their JSON aren't all kept at once.
+        """
+        # Open scopes still get events and the ELIDED summary still counting may grow, they are serialized every time
+        open_entries = {id(entry) for entry in self.recorded_scope_stack}
+        open_entries.add(id(self._elided))
         return {
-            "events": self.tree
-        }
\ No newline at end of file
+            "events": self._serialize_entries(self.tree, True, open_entries)
+        }
+
+    def _serialize_entries(self, entries: list, is_open: bool, open_entries: Set[int]) -> List[Dict[str, Any]]:
+        # The entries of an open scope (or the tree) may still change, they are returned in a new list
+        for i, entry in enumerate(entries):
+            if type(entry) is not dict and id(entry) not in open_entries:
+                entries[i] = self._serialize_entry(entry, False, open_entries)
+        if not is_open:
+            return entries
+        return [
+            entry if type(entry) is dict else self._serialize_entry(entry, True, open_entries)
+            for entry in entries
+        ]
+
+    def _serialize_entry(self, entry: Union[Event, ScopeEntry], is_open: bool, open_entries: Set[int]) -> Dict[str, Any]:
+        if isinstance(entry, ScopeEntry):
+            return entry.serialize(self._serialize_entries(entry.children, is_open, open_entries))
+        return entry.serialize()
+
+    def write_json(self, sink: TextIO) -> None:
+        """
+        Writes `json.dumps(self.serialize())` to `sink`, one event at a time instead of building all
+        the serialized events first.
+        """
+        # The events were already limited when they were added, they are all written as they are
+        settings = JournalSettings(max_length=math.inf, max_depth=math.inf, array_snapshot_interval=1)
+        writer = StreamingJournal(settings, sink)
+        # The entries left to write at each open level, with the scope they belong to
+        stack: List[Tuple[Iterator, Optional[ScopeEntry]]] = [(iter(self.tree), None)]
+        while stack:
+            entries, scope = stack[-1]
+            entry = next(entries, None)
+            if entry is None:
+                stack.pop()
+                # A scope that never ended is left for `close`
+                if scope is not None and scope.end is not None:
+                    writer.add_event(scope.end)
+            elif type(entry) is dict:
+                # Already serialized by `serialize`
+                writer._add_serialized(entry)
+            elif isinstance(entry, ScopeEntry):
+                writer.add_event(entry.start)
+                stack.append((iter(entry.children), entry))
+            else:
+                writer.add_event(entry)
+        writer.close()
+
+
+class StreamingJournal(BaseJournal):
+    """
+    A journal that writes the event tree to `sink` as JSON while events are added, instead of building it in memory.
+
+    Only the stack of open scopes is kept. Once closed, the written text is exactly `json.dumps` of what
+    `Journal.serialize` would return for the same events.
+    There is no `serialize`, nothing is kept to serialize again.
+    """
+    def __init__(self, settings: JournalSettings, sink: TextIO, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        super().__init__(settings)
+        self._sink = sink
+        self._chunk_size = chunk_size
+        self._buffer: List[str] = []
+        self._buffered: int = 0
+        # Whether nothing was written yet in the innermost open list of events
+        self._first_in_scope: bool = True
+        # A summary of left out events is only written once it stops counting
+        self._unwritten_elided: Optional[ElidedEvent] = None
+        self._closed: bool = False
+        self._write('{"events": [')
+
+    def _add_entry(self, event: Event) -> Any:
+        event_json = event.serialize()
+        if not isinstance(event, ScopeStartEvent):
+            self._add_serialized(event_json)
+            return None
+
+        self._write_elided()
+        if not self._first_in_scope:
+            self._write(", ")
+        # Leave the object open, its children and end event fields follow
+        self._write(self._dumps(event_json)[:-1] + ', "children": [')
+        self._first_in_scope = True
+        # The keys written for the scope, end event fields with the same key are dropped like in `ScopeEntry.serialize`
+        return set(event_json) | {"children"}
+
+    def _add_serialized(self, event_json: Dict[str, Any]) -> None:
+        """Writes a whole entry that is already serialized, an event or a closed scope with its events."""
+        self._write_elided()
+        if not self._first_in_scope:
+            self._write(", ")
+        self._write(self._dumps(event_json))
+        self._first_in_scope = False
+
+    def _add_elided(self, elided: ElidedEvent) -> None:
+        self._unwritten_elided = elided
+
+    def _end_scope(self, entry: set, event: ScopeEndEvent) -> None:
+        self._write_elided()
+        self._write("]")
+        for key, value in event.serialize().items():
+            if key not in entry:
+                self._write(", {}: {}".format(self._dumps(key), self._dumps(value)))
+        self._write("}")
+        self._first_in_scope = False
+
+    def _write_elided(self) -> None:
+        if self._unwritten_elided is None:
+            return
+        elided, self._unwritten_elided = self._unwritten_elided, None
+        if not self._first_in_scope:
+            self._write(", ")
+        self._write(self._dumps(elided.serialize()))
+        self._first_in_scope = False
+
+    def close(self) -> None:
+        """Closes the scopes left open (e.g. by an error) and the JSON document, and flushes it to the sink."""
+        if self._closed:
+            return
+        self._closed = True
+
+        self._write_elided()
+        for _ in self.recorded_scope_stack:
+            self._write("]}")
+        self.recorded_scope_stack.clear()
+        self.scope_entry_stack.clear()
+        self.scope_event_stack.clear()
+        self._write("]}")
+        self.flush()
+
+    def flush(self) -> None:
+        if self._buffer:
+            self._sink.write("".join(self._buffer))
+            self._buffer.clear()
+            self._buffered = 0
+
+    def _write(self, text: str) -> None:
+        self._buffer.append(text)
+        self._buffered += len(text)
+        if self._buffered >= self._chunk_size:
+            self.flush()
+
+    @staticmethod
+    def _dumps(value: Any) -> str:
+        # Values JSON can't represent (like the `Void` result of a function without a `return`) are written as strings
+        return json.dumps(value, default=str)
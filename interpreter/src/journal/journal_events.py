@@ -1,13 +1,40 @@
+import copy
+from array import array
 from dataclasses import dataclass
 from typing import *
 
+from interpreter.src.number_array import NumberArray, plain_value
 
+
+def snapshot_value(value: Any) -> Any:
+    """Copies an array value, so later changes to the array don't show in an event that holds it."""
+    value_type = type(value)
+    if value_type is not list and value_type is not NumberArray:
+        return value
+    if value_type is NumberArray and type(value.items) is array:
+        return value.copy()
+    for item in value:
+        if type(item) is list or type(item) is NumberArray:
+            return copy.deepcopy(value)
+    return value.copy()
+
+
+# Events are created for every step of the program, they are slotted to keep them small.
+# Journals only turn them into dicts when they are serialized.
 @dataclass
 class Event:
     """Base class for all events."""    
+    __slots__ = ()
     # Class attribute for event identifier
     EVENT_TYPE = None
 
+    def snapshot(self) -> "Event":
+        """
+        Returns the event detached from the mutable values (arrays) it refers to, to be kept for later serialization:
+        itself if it refers to none, otherwise a copy. The event is left as it is, other listeners get it too.
+        """
+        return self
+
     def serialize(self):
         """Base serialization method."""
         event_type = self.EVENT_TYPE if self.EVENT_TYPE else self.__class__.__name__
@@ -20,6 +47,8 @@ class Event:
 @dataclass
 class ScopeStartEvent(Event):
     """Base class for scope start events."""
+    __slots__ = ()
+
     def serialize(self):
         """Serialize scope event with base event serialization."""
         base_serialization = super().serialize()
@@ -28,6 +57,8 @@ class ScopeStartEvent(Event):
 @dataclass
 class ScopeEndEvent(Event):
     """Base class for scope end events."""
+    __slots__ = ()
+
     def serialize(self):
         """Serialize scope event with base event serialization."""
         base_serialization = super().serialize()
@@ -36,6 +67,7 @@ class ScopeEndEvent(Event):
 
 @dataclass
 class IfStartEvent(ScopeStartEvent):
+    __slots__ = ("hit",)
     EVENT_TYPE = "IF"
     hit: bool
 
@@ -48,6 +80,7 @@ class IfStartEvent(ScopeStartEvent):
 
 @dataclass
 class IfEndEvent(ScopeEndEvent):
+    __slots__ = ()
     def serialize(self):
         """Serialize IfEndEvent."""
         return super().serialize()
@@ -55,6 +88,7 @@ class IfEndEvent(ScopeEndEvent):
 
 @dataclass
 class ElseStartEvent(ScopeStartEvent):
+    __slots__ = ()
     EVENT_TYPE = "ELSE"
     
     def serialize(self):
@@ -65,6 +99,7 @@ class ElseStartEvent(ScopeStartEvent):
 
 @dataclass
 class ElseEndEvent(ScopeEndEvent):
+    __slots__ = ()
     def serialize(self):
         """Serialize ElseEndEvent."""
         return super().serialize()
@@ -72,6 +107,7 @@ class ElseEndEvent(ScopeEndEvent):
 
 @dataclass
 class ForStartEvent(ScopeStartEvent):
+    __slots__ = ("condition",)
     EVENT_TYPE = "FOR"
     condition: str
 
@@ -84,9 +120,14 @@ class ForStartEvent(ScopeStartEvent):
 
 @dataclass
 class ForIterationStartEvent(ScopeStartEvent):
+    __slots__ = ("iterator",)
     EVENT_TYPE = "FOR_ITERATION"
     iterator: Any
 
+    def snapshot(self):
+        iterator = snapshot_value(self.iterator)
+        return self if iterator is self.iterator else ForIterationStartEvent(iterator)
+
     def serialize(self):
         """Serialize ForIterationStartEvent with iterator."""
         base_serialization = super().serialize()
@@ -96,6 +137,7 @@ class ForIterationStartEvent(ScopeStartEvent):
 
 @dataclass
 class ForIterationEndEvent(ScopeEndEvent):
+    __slots__ = ()
     def serialize(self):
         """Serialize ForIterationEndEvent."""
         return super().serialize()
@@ -103,6 +145,7 @@ class ForIterationEndEvent(ScopeEndEvent):
 
 @dataclass
 class ForEndEvent(ScopeEndEvent):
+    __slots__ = ("iterations",)
     iterations: int
 
     def serialize(self):
@@ -113,6 +156,7 @@ class ForEndEvent(ScopeEndEvent):
     
 @dataclass
 class WhileStartEvent(ScopeStartEvent):
+    __slots__ = ("condition",)
     EVENT_TYPE = "WHILE"
     condition: str
 
@@ -125,6 +169,7 @@ class WhileStartEvent(ScopeStartEvent):
 
 @dataclass
 class WhileIterationStartEvent(ScopeStartEvent):
+    __slots__ = ()
     EVENT_TYPE = "WHILE_ITERATION"
 
     def serialize(self):
@@ -135,6 +180,7 @@ class WhileIterationStartEvent(ScopeStartEvent):
 
 @dataclass
 class WhileIterationEndEvent(ScopeEndEvent):
+    __slots__ = ()
     def serialize(self):
         """Serialize WhileIterationEndEvent."""
         return super().serialize()
@@ -142,6 +188,7 @@ class WhileIterationEndEvent(ScopeEndEvent):
 
 @dataclass
 class WhileEndEvent(ScopeEndEvent):
+    __slots__ = ("iterations",)
     iterations: int
 
     def serialize(self):
@@ -153,11 +200,18 @@ class WhileEndEvent(ScopeEndEvent):
 
 @dataclass
 class VariableAssignmentEvent(Event):
+    __slots__ = ("var_name", "before", "after")
     EVENT_TYPE = "VARIABLE_ASSIGNMENT"
     var_name: str
     before: Any
     after: Any
 
+    def snapshot(self):
+        before, after = snapshot_value(self.before), snapshot_value(self.after)
+        if before is self.before and after is self.after:
+            return self
+        return VariableAssignmentEvent(self.var_name, before, after)
+
     def serialize(self):
         """Serialize VariableAssignmentEvent with variable details."""
         base_serialization = super().serialize()
@@ -171,22 +225,31 @@ class VariableAssignmentEvent(Event):
 
 @dataclass
 class PrintEvent(Event):
+    __slots__ = ("value",)
     EVENT_TYPE = "PRINT"
     value: str
 
+    def snapshot(self):
+        value = snapshot_value(self.value)
+        return self if value is self.value else PrintEvent(value)
+
     def serialize(self):
         """Serialize PrintEvent with value."""
         base_serialization = super().serialize()
-        base_serialization["value"] = self.value
+        base_serialization["value"] = plain_value(self.value)
         return base_serialization
 
 
 @dataclass
 class FunctionCallEvent(ScopeStartEvent):
+    __slots__ = ("name", "params")
     EVENT_TYPE = "FUNCTION_CALL"
     name: str
     params: List[Any]
     
+    def snapshot(self):
+        return FunctionCallEvent(self.name, [snapshot_value(param) for param in self.params])
+
     def serialize(self):
         """Serialize FunctionCallEvent with name and parameters."""
         base_serialization = super().serialize()
@@ -199,6 +262,7 @@ class FunctionCallEvent(ScopeStartEvent):
 
 @dataclass
 class FunctionCallEndEvent(ScopeEndEvent):
+    __slots__ = ("return_value",)
     return_value: any
     
     def serialize(self):
@@ -208,6 +272,7 @@ class FunctionCallEndEvent(ScopeEndEvent):
 
 @dataclass
 class ErrorEvent(Event):
+    __slots__ = ("info",)
     EVENT_TYPE = "ERROR"
     info: str
 
@@ -220,10 +285,14 @@ class ErrorEvent(Event):
 
 @dataclass
 class SwapEvent(Event):
+    __slots__ = ("var_names", "values")
     EVENT_TYPE = "SWAP"
     var_names: Tuple[str, str]
     values: Tuple[Any, Any]
 
+    def snapshot(self):
+        return SwapEvent(self.var_names, tuple(snapshot_value(value) for value in self.values))
+
     def serialize(self):
         """Serialize SwapEvent with variable names and values."""
         base_serialization = super().serialize()
@@ -236,17 +305,94 @@ class SwapEvent(Event):
 
 @dataclass
 class ArrayModificationEvent(Event):
+    # The whole array is only kept by some of the events (see `JournalSettings.array_snapshot_interval`),
+    # the others hold None and the array can be rebuilt from the last one that kept it
+    __slots__ = ("var_name", "index", "before", "after", "array")
     EVENT_TYPE = "ARRAY_MODIFICATION"
-    index: Union[int, str]
-    arr_before: List[Any]
-    arr_after: List[Any]
+    var_name: str
+    index: int
+    before: Any
+    after: Any
+    array: Optional[List[Any]]
+
+    def snapshot(self):
+        before, after, array = snapshot_value(self.before), snapshot_value(self.after), snapshot_value(self.array)
+        if before is self.before and after is self.after and array is self.array:
+            return self
+        return ArrayModificationEvent(self.var_name, self.index, before, after, array)
+
+    def without_array(self) -> "ArrayModificationEvent":
+        """Returns a copy of the event that doesn't keep the whole array."""
+        return ArrayModificationEvent(self.var_name, self.index, self.before, self.after, None)
 
     def serialize(self):
-        """Serialize ArrayModificationEvent with array details."""
+        """Serialize ArrayModificationEvent with the modified element, and the whole array if it was kept."""
         base_serialization = super().serialize()
         base_serialization.update({
+            "var_name": self.var_name,
             "index": self.index,
-            "arr_before": [str(item) for item in self.arr_before],
-            "arr_after": [str(item) for item in self.arr_after]
+            "before": str(self.before),
+            "after": str(self.after)
         })
-        return base_serialization
\ No newline at end of file
+        if self.array is not None:
+            base_serialization["array"] = [str(item) for item in self.array]
+        return base_serialization
+
+
+@dataclass
+class BuiltinCallEvent(Event):
+    """A call to an array builtin (like `sort`), recorded instead of the events of a loop over the array."""
+    __slots__ = ("name", "params", "result")
+    EVENT_TYPE = "BUILTIN_CALL"
+    name: str
+    params: List[Any]
+    result: Any
+
+    def snapshot(self):
+        return BuiltinCallEvent(self.name, [snapshot_value(param) for param in self.params], snapshot_value(self.result))
+
+    def serialize(self):
+        """Serialize BuiltinCallEvent with the builtin's name, its parameters (after the call) and its result."""
+        base_serialization = super().serialize()
+        base_serialization.update({
+            "name": self.name,
+            "params": [str(param) for param in self.params],
+            "result": str(self.result)
+        })
+        return base_serialization
+
+@dataclass
+class ElidedEvent(Event):
+    """Summarizes the events a journal left out because of its length or depth limits."""
+    __slots__ = ("events", "iterations")
+    EVENT_TYPE = "ELIDED"
+    events: int
+    iterations: int
+
+    def serialize(self):
+        """Serialize ElidedEvent with the number of events and loop iterations it stands for."""
+        base_serialization = super().serialize()
+        base_serialization.update({
+            "events": self.events,
+            "iterations": self.iterations
+        })
+        return base_serialization
+
+
+def _subclasses(event_type: type) -> Iterator[type]:
+    for subclass in event_type.__subclasses__():
+        yield subclass
+        yield from _subclasses(subclass)
+
+
+# What a listener that doesn't name the event types it wants receives
+ALL_EVENT_TYPES = frozenset(_subclasses(Event))
+
+# The events without fields are all alike, the evaluators emit these instead of creating new ones: a journal keeps one
+# for every loop iteration
+IF_END = IfEndEvent()
+ELSE_START = ElseStartEvent()
+ELSE_END = ElseEndEvent()
+FOR_ITERATION_END = ForIterationEndEvent()
+WHILE_ITERATION_START = WhileIterationStartEvent()
+WHILE_ITERATION_END = WhileIterationEndEvent()
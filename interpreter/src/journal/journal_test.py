@@ -1,4 +1,7 @@
 from interpreter.src.journal.journal import *
+import contextlib
+import io
+import pytest
 import json
 
 def test_journal():
@@ -57,4 +60,209 @@ def test_journal():
     print("Test passed successfully!")
 
 if __name__ == "__main__":
-    test_journal()
\ No newline at end of file
+    test_journal()
+
+def _add_events(journal):
+    journal.add_event(VariableAssignmentEvent("arr", None, [5, 2]))
+    journal.add_event(WhileStartEvent("missing"))
+    for i in range(2):
+        journal.add_event(WhileIterationStartEvent())
+        journal.add_event(IfStartEvent(i == 0))
+        journal.add_event(PrintEvent("hello"))
+        journal.add_event(IfEndEvent())
+        journal.add_event(WhileIterationEndEvent())
+    journal.add_event(WhileEndEvent(2))
+    # A mismatched scope end is dropped, the open scopes of an interrupted program stay open
+    journal.add_event(ElseEndEvent())
+    journal.add_event(ForStartEvent("i"))
+    journal.add_event(ForIterationStartEvent(0))
+    journal.add_event(ErrorEvent("Division by zero"))
+
+
+def test_streaming_journal():
+    for whitelist in (None, [PrintEvent, ErrorEvent]):
+        journal = Journal(JournalSettings(whitelist))
+        _add_events(journal)
+
+        sink = io.StringIO()
+        streaming_journal = StreamingJournal(JournalSettings(whitelist), sink, chunk_size=16)
+        _add_events(streaming_journal)
+        streaming_journal.close()
+
+        assert sink.getvalue() == json.dumps(journal.serialize())
+
+
+def test_journal_write_json():
+    for whitelist in (None, [PrintEvent, ErrorEvent]):
+        journal = Journal(JournalSettings(whitelist))
+        _add_events(journal)
+
+        sink = io.StringIO()
+        journal.write_json(sink)
+
+        assert sink.getvalue() == json.dumps(journal.serialize())
+
+
+def test_journal_keeps_values_as_they_were():
+    journal = Journal(JournalSettings())
+    arr = [1.0, [2.0]]
+    journal.add_event(PrintEvent(arr))
+    journal.add_event(VariableAssignmentEvent("arr", None, arr))
+    arr[0] = 5.0
+    arr[1][0] = 6.0
+    assert not hasattr(journal.tree[0], "__dict__")
+
+    events = journal.serialize()["events"]
+    assert events[0]["value"] == [1.0, [2.0]]
+    assert events[1]["after"] == "[1.0, [2.0]]"
+
+
+def _add_loop(journal, iterations):
+    journal.add_event(WhileStartEvent("missing"))
+    for i in range(iterations):
+        journal.add_event(WhileIterationStartEvent())
+        journal.add_event(PrintEvent(i))
+        journal.add_event(WhileIterationEndEvent())
+    journal.add_event(WhileEndEvent(iterations))
+
+
+def test_journal_elides_events_past_max_length():
+    journal = Journal(JournalSettings(max_length=5))
+    _add_loop(journal, 10)
+    journal.add_event(PrintEvent("done"))
+    journal.add_event(ErrorEvent("Division by zero"))
+
+    events = journal.serialize()["events"]
+    assert len(events) == 3
+    assert [child["type"] for child in events[0]["children"]] == ["WHILE_ITERATION", "WHILE_ITERATION", "ELIDED"]
+    assert events[0]["children"][-1] == {"type": "ELIDED", "events": 16, "iterations": 8}
+    assert events[0]["iterations"] == 10
+    # Errors are always recorded
+    assert events[1:] == [{"type": "ELIDED", "events": 1, "iterations": 0}, {"type": "ERROR", "info": "Division by zero"}]
+
+
+def test_journal_elides_scopes_past_max_depth():
+    journal = Journal(JournalSettings(max_depth=2))
+    journal.add_event(FunctionCallEvent("f", [1]))
+    _add_loop(journal, 2)
+    journal.add_event(FunctionCallEndEvent(1))
+    journal.add_event(PrintEvent("done"))
+
+    events = journal.serialize()["events"]
+    assert events[0]["children"][0]["children"] == [{"type": "ELIDED", "events": 4, "iterations": 2}]
+    assert events[1] == {"type": "PRINT", "value": "done"}
+
+
+def test_journal_stops_when_full():
+    journal = Journal(JournalSettings(max_length=3, stop_when_full=True))
+    with pytest.raises(JournalFullException):
+        _add_loop(journal, 10)
+
+    journal.add_event(ErrorEvent("Stopped"))
+    assert journal.serialize()["events"][0]["children"][-1] == {"type": "ERROR", "info": "Stopped"}
+
+
+def test_journal_serialized_while_events_are_added():
+    for settings in (JournalSettings(), JournalSettings(max_length=12)):
+        journal = Journal(settings)
+        _add_loop(journal, 2)
+        # One scope is left open, and with max_length an ELIDED summary is still counting
+        journal.add_event(WhileStartEvent("missing"))
+        _add_loop(journal, 3)
+        first = journal.serialize()
+        first_json = json.dumps(first)
+        journal.add_event(PrintEvent("more"))
+        _add_loop(journal, 3)
+        journal.add_event(WhileEndEvent(0))
+
+        expected = Journal(settings)
+        _add_loop(expected, 2)
+        expected.add_event(WhileStartEvent("missing"))
+        _add_loop(expected, 3)
+        assert first == expected.serialize()
+        expected.add_event(PrintEvent("more"))
+        _add_loop(expected, 3)
+        expected.add_event(WhileEndEvent(0))
+
+        # What was returned before doesn't change, and the journal is serialized like one that never was
+        assert json.dumps(first) == first_json
+        assert journal.serialize() == expected.serialize()
+        sink = io.StringIO()
+        journal.write_json(sink)
+        assert sink.getvalue() == json.dumps(expected.serialize())
+
+
+def test_streaming_journal_with_limits():
+    for settings in (JournalSettings(max_length=4), JournalSettings(max_depth=1), JournalSettings(max_depth=2)):
+        journal = Journal(settings)
+        _add_events(journal)
+        _add_loop(journal, 3)
+
+        sink = io.StringIO()
+        streaming_journal = StreamingJournal(settings, sink)
+        _add_events(streaming_journal)
+        _add_loop(streaming_journal, 3)
+        streaming_journal.close()
+
+        assert sink.getvalue() == json.dumps(journal.serialize())
+
+
+def test_streaming_journal_is_not_a_serializable_journal():
+    journal = StreamingJournal(JournalSettings(), io.StringIO())
+
+    # Callers needing `serialize` can check for a `Journal`, a streaming journal keeps nothing to serialize
+    assert isinstance(journal, BaseJournal)
+    assert not isinstance(journal, Journal)
+    assert not hasattr(journal, "serialize")
+
+
+def test_run_stops_when_journal_is_full():
+    from interpreter.src.interpreter_handler import Engine, Interpreter
+
+    for engine in Engine:
+        settings = JournalSettings([PrintEvent, ErrorEvent], max_length=10, stop_when_full=True)
+        with contextlib.redirect_stdout(io.StringIO()):
+            events = Interpreter(settings, True, engine).feedBlock("while (1 = 1)\n    print(1)\n").serialize()["events"]
+
+        assert [event["type"] for event in events] == ["PRINT"] * 10 + ["ELIDED", "ERROR"]
+
+
+def test_array_modifications_keep_some_snapshots():
+    journal = Journal(JournalSettings(array_snapshot_interval=2))
+    arr = [0.0, 0.0]
+    for i in range(3):
+        arr[i % 2] = float(i + 1)
+        journal.add_event(ArrayModificationEvent("arr", i % 2 + 1, 0.0, arr[i % 2], arr))
+
+    events = journal.serialize()["events"]
+    assert events[1] == {"type": "ARRAY_MODIFICATION", "var_name": "arr", "index": 2, "before": "0.0", "after": "2.0"}
+    assert [event.get("array") for event in events] == [["1.0", "0.0"], None, ["3.0", "2.0"]]
+
+    sink = io.StringIO()
+    journal.write_json(sink)
+    assert sink.getvalue() == json.dumps(journal.serialize())
+
+
+def test_array_snapshots_are_counted_for_each_array():
+    journal = Journal(JournalSettings(array_snapshot_interval=2))
+    for value in [1.0, 2.0]:
+        # a new array under the same name, its first modification keeps it
+        arr = [0.0]
+        arr[0] = value
+        journal.add_event(ArrayModificationEvent("arr", 1, 0.0, value, arr))
+
+    assert [event.get("array") for event in journal.serialize()["events"]] == [["1.0"], ["2.0"]]
+
+
+def test_array_snapshots_are_left_out_by_each_journal():
+    every, none = Journal(JournalSettings(array_snapshot_interval=1)), Journal(JournalSettings(array_snapshot_interval=0))
+    arr = [1.0]
+    event = ArrayModificationEvent("arr", 1, 0.0, 1.0, arr)
+    for journal in [none, every]:
+        journal.add_event(event)
+    arr[0] = 2.0
+
+    # the event is left as it is, the journals keep (or leave out) their own copy of the array
+    assert event.array is arr
+    assert every.serialize()["events"][0]["array"] == ["1.0"]
+    assert "array" not in none.serialize()["events"][0]
@@ -0,0 +1,72 @@
+from array import array
+from typing import Any, Iterable, Iterator
+
+
+class NumberArray:
+    """
+    A DEP array whose elements are all numbers, stored unboxed in an `array('d')` (8 bytes an element, instead of
+    a pointer to a boxed float in a list).
+
+    Arrays are shared by reference (a function can modify the array it was passed), so storing anything other
+    than a number switches `items` to a generic list in place, instead of replacing the array.
+    Prints, compares and serializes exactly like a list of the same elements.
+    """
+
+    __slots__ = ("items",)
+
+    def __init__(self, items: array | list):
+        self.items = items
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def __getitem__(self, index: int) -> Any:
+        return self.items[index]
+
+    def __setitem__(self, index: int, value: Any):
+        # Only floats are stored as is, an array('d') would silently turn a bool into 1.0
+        if type(value) is not float and type(self.items) is array:
+            self.items = self.items.tolist()
+        self.items[index] = value
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.items)
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, (list, NumberArray)):
+            return NotImplemented
+        return list(self.items) == list(other)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return repr(list(self.items))
+
+    def copy(self) -> "NumberArray":
+        return NumberArray(self.items[:])
+
+
+# Every representation of a DEP array value
+ARRAY_TYPES = (list, NumberArray)
+
+
+def make_array(elements: Iterable[Any]) -> list | NumberArray:
+    """The array value holding `elements`: a `NumberArray` if they are all numbers, a list otherwise."""
+    elements = list(elements)
+    for element in elements:
+        if type(element) is not float:
+            return elements
+    if not elements:
+        return elements
+    return NumberArray(array("d", elements))
+
+
+def plain_value(value: Any) -> Any:
+    """`value` with every `NumberArray` in it turned into a list, for JSON serialization."""
+    if type(value) is NumberArray:
+        if type(value.items) is array:
+            return value.items.tolist()
+        value = value.items
+    if type(value) is list and any(type(item) is list or type(item) is NumberArray for item in value):
+        return [plain_value(item) for item in value]
+    return value
@@ -0,0 +1,105 @@
+from typing import Callable
+
+from interpreter.src.interpreter_exception import InterpreterException
+from interpreter.src.token_type import TokenType
+
+# Operator implementations shared by the execution engines that pick the operation ahead of time
+# (instead of matching on the operator token for every evaluation, like `Eval` does).
+# The type checks and error messages mirror `Eval.__visit_binary` and `Eval.__visit_unary` exactly.
+
+
+def format_invalid_literal(op_type) -> str:
+    return "{} operator applied on an invalid literal type".format(op_type)
+
+
+def _minus(left, right):
+    if not (isinstance(left, float) and isinstance(right, float)):
+        raise InterpreterException(format_invalid_literal(TokenType.MINUS))
+    return float(left) - float(right)
+
+
+def _slash(left, right):
+    if not (isinstance(left, float) and isinstance(right, float)):
+        raise InterpreterException(format_invalid_literal(TokenType.SLASH))
+    if float(right) == 0:
+        raise InterpreterException("Division by zero")
+    return float(left) / float(right)
+
+
+def _star(left, right):
+    if not (isinstance(left, float) and isinstance(right, float)):
+        raise InterpreterException(format_invalid_literal(TokenType.STAR))
+    return float(left) * float(right)
+
+
+def _plus(left, right):
+    if isinstance(left, float) and isinstance(right, float):
+        return left + right
+    elif isinstance(left, str) and isinstance(right, str):
+        return left + right
+    else:
+        raise InterpreterException(format_invalid_literal(TokenType.PLUS))
+
+
+def _greater(left, right):
+    if not (isinstance(left, float) or isinstance(right, float)):
+        raise InterpreterException(format_invalid_literal(TokenType.GREATER))
+    return float(left) > float(right)
+
+
+def _greater_equal(left, right):
+    if not (isinstance(left, float) or isinstance(right, float)):
+        raise InterpreterException(format_invalid_literal(TokenType.GREATER_EQUAL))
+    return float(left) >= float(right)
+
+
+def _less(left, right):
+    if not (isinstance(left, float) and isinstance(right, float)):
+        raise InterpreterException(format_invalid_literal(TokenType.LESS))
+    return float(left) < float(right)
+
+
+def _less_equal(left, right):
+    if not (isinstance(left, float) and isinstance(right, float)):
+        raise InterpreterException(format_invalid_literal(TokenType.LESS_EQUAL))
+    return float(left) <= float(right)
+
+
+def _equal_equal(left, right):
+    return left == right
+
+
+def _bang_equal(left, right):
+    return left != right
+
+
+def _negate(value):
+    if not isinstance(value, float):
+        raise InterpreterException(format_invalid_literal(TokenType.MINUS))
+    return -value
+
+
+def _not(value):
+    # The language is strictly typed - the negation operator only works on booleans
+    if not isinstance(value, bool):
+        raise InterpreterException(format_invalid_literal(TokenType.BANG))
+    return not value
+
+
+BINARY_OPERATORS: dict[TokenType, Callable] = {
+    TokenType.MINUS: _minus,
+    TokenType.SLASH: _slash,
+    TokenType.STAR: _star,
+    TokenType.PLUS: _plus,
+    TokenType.GREATER: _greater,
+    TokenType.GREATER_EQUAL: _greater_equal,
+    TokenType.LESS: _less,
+    TokenType.LESS_EQUAL: _less_equal,
+    TokenType.EQUAL_EQUAL: _equal_equal,
+    TokenType.BANG_EQUAL: _bang_equal,
+}
+
+UNARY_OPERATORS: dict[TokenType, Callable] = {
+    TokenType.MINUS: _negate,
+    TokenType.BANG: _not,
+}
@@ -0,0 +1,147 @@
+import interpreter.src.expr as expr
+import interpreter.src.stmt as stmt
+from interpreter.src.expr import Expr
+from interpreter.src.operators import BINARY_OPERATORS, UNARY_OPERATORS
+from interpreter.src.stmt import Stmt
+from interpreter.src.token_type import TokenType
+
+
+class Optimizer:
+    """
+    Simplifies a parsed program before it runs, on every engine, without changing what it does or the events it emits:
+    - literals become `expr.Constant`s holding their value, instead of tokens checked and converted on each evaluation
+    - operations on constants (and groupings of them) are folded into their result. An operation that fails, like a
+      division by zero, is left as is, so its error is still raised when (and if) it runs
+    - the branch of an `if` with a constant condition that can never run is dropped. The `if` itself stays, it still
+      emits its events
+
+    Returns a new tree, the parsed one may be shared (see `AstCache`) and is never modified.
+    """
+
+    def optimize(self, statements: list[Stmt]) -> list[Stmt]:
+        return [self.__optimize_statement(statement) for statement in statements]
+
+    def __optimize_statement(self, statement: Stmt) -> Stmt:
+        match statement:
+            case stmt.Print():
+                return stmt.Print(self.optimize_expression(statement.expression))
+            case stmt.Expression():
+                return stmt.Expression(self.optimize_expression(statement.expression))
+            case stmt.Assignment():
+                return stmt.Assignment(statement.name, self.optimize_expression(statement.value))
+            case stmt.ArrayAssignment():
+                return stmt.ArrayAssignment(
+                    statement.name,
+                    self.optimize_expression(statement.idx),
+                    self.optimize_expression(statement.value),
+                )
+            case stmt.Block():
+                return stmt.Block(self.optimize(statement.statements))
+            case stmt.If():
+                return self.__optimize_if(statement)
+            case stmt.While():
+                return stmt.While(
+                    self.optimize_expression(statement.condition),
+                    self.__optimize_statement(statement.body),
+                )
+            case stmt.FuncDef():
+                func = statement.func
+                body = self.__optimize_statement(func.body)
+                return stmt.FuncDef(statement.func_name, stmt.FuncBody(func.params, body))
+            case stmt.Return():
+                return stmt.Return(self.optimize_expression(statement.ret_val))
+        return statement
+
+    def __optimize_if(self, statement: stmt.If) -> stmt.If:
+        condition = self.optimize_expression(statement.condition)
+
+        if not isinstance(condition, expr.Constant):
+            else_block = statement.else_block
+            return stmt.If(
+                condition,
+                self.__optimize_statement(statement.then_block),
+                self.__optimize_statement(else_block) if else_block is not None else None,
+            )
+
+        # Branches on the condition's truthiness, like the engines do
+        if condition.value:
+            return stmt.If(condition, self.__optimize_statement(statement.then_block), None)
+        if statement.else_block is None:
+            return stmt.If(condition, stmt.Block([]), None)
+        return stmt.If(condition, stmt.Block([]), self.__optimize_statement(statement.else_block))
+
+    def optimize_expression(self, ast: Expr) -> Expr:
+        match ast:
+            case expr.Literal():
+                return self.__optimize_literal(ast)
+            case expr.Grouping():
+                return self.optimize_expression(ast.expression)
+            case expr.Unary():
+                return self.__optimize_unary(ast)
+            case expr.Logical():
+                return self.__optimize_logical(ast)
+            case expr.Binary():
+                return self.__optimize_binary(ast)
+            case expr.ArrayLiteral():
+                # Not a constant even when its elements are, each evaluation creates a new array
+                return expr.ArrayLiteral([self.optimize_expression(elt) for elt in ast.elts])
+            case expr.ArrayAccess():
+                return expr.ArrayAccess(ast.name, self.optimize_expression(ast.idx))
+            case expr.FuncCall():
+                return expr.FuncCall(ast.func_name, [self.optimize_expression(param) for param in ast.params])
+        return ast
+
+    def __optimize_literal(self, ast: expr.Literal) -> Expr:
+        token = ast.value
+
+        if token.tokenType == TokenType.TRUE:
+            return expr.Constant(True)
+        if token.tokenType == TokenType.FALSE:
+            return expr.Constant(False)
+        if token.tokenType == TokenType.IDENTIFIER:
+            return ast
+
+        match token.literal:
+            case str() | float():
+                return expr.Constant(token.literal)
+            case int():
+                return expr.Constant(float(token.literal))
+        # An invalid literal is reported when it is evaluated
+        return ast
+
+    def __optimize_unary(self, ast: expr.Unary) -> Expr:
+        operand = self.optimize_expression(ast.expression)
+        operator = UNARY_OPERATORS.get(ast.operator.tokenType)
+
+        if operator is not None and isinstance(operand, expr.Constant):
+            try:
+                return expr.Constant(operator(operand.value))
+            except Exception:
+                pass
+        return expr.Unary(ast.operator, operand)
+
+    def __optimize_binary(self, ast: expr.Binary) -> Expr:
+        left = self.optimize_expression(ast.left)
+        right = self.optimize_expression(ast.right)
+        operator = BINARY_OPERATORS.get(ast.operator.tokenType)
+
+        if operator is not None and isinstance(left, expr.Constant) and isinstance(right, expr.Constant):
+            try:
+                return expr.Constant(operator(left.value, right.value))
+            except Exception:
+                pass
+        return expr.Binary(left, ast.operator, right)
+
+    def __optimize_logical(self, ast: expr.Logical) -> Expr:
+        left = self.optimize_expression(ast.left)
+        right = self.optimize_expression(ast.right)
+
+        # Only booleans are allowed, anything else fails when it runs
+        if isinstance(left, expr.Constant) and isinstance(left.value, bool):
+            if ast.operator.tokenType == TokenType.OR and left.value:
+                return expr.Constant(True)
+            if ast.operator.tokenType == TokenType.AND and not left.value:
+                return expr.Constant(False)
+            if isinstance(right, expr.Constant) and isinstance(right.value, bool):
+                return right
+        return expr.Logical(left, ast.operator, right)
@@ -19,6 +19,8 @@ class Parser:
     def __init__(self, tokens: list[Token]) -> None:
         self._tokens = tokens
         self._pos: int = 0
+        # The index of the first token of each parsed top-level statement
+        self.statement_starts: list[int] = []
 
     def parse(self) -> list[Stmt] | None:
         statements: list[Stmt] = []
@@ -27,6 +29,7 @@ class Parser:
             if self.__peek().tokenType == TokenType.EOL:
                 self.__advance()
             else:
+                self.statement_starts.append(self._pos)
                 statements.append(self.__statement())
 
         return statements
@@ -51,9 +54,8 @@ class Parser:
     def __is_eol(self) -> bool:
         return self.__peek().tokenType == TokenType.EOL
 
-    def __match_tok_type(self, types: list[TokenType]) -> bool:
-        curr_type = self.__peek().tokenType
-        return any([tok_type == curr_type for tok_type in types])
+    def __match_tok_type(self, *types: TokenType) -> bool:
+        return self._tokens[self._pos].tokenType in types
 
     # unless a block statement is seen, statements are separated by lines
     def __advance_line(self):
@@ -75,11 +77,9 @@ class Parser:
                     if self.__peek(1).tokenType == TokenType.LEFT_ARROW:
                         return self.__assignment_statement()
                     if self.__peek(1).tokenType == TokenType.LEFT_BRACKET:
-                        pos = 1
-                        while(not self.__is_eof() and self.__peek(pos).tokenType != TokenType.LEFT_ARROW):
-                            pos += 1
-                        if not self.__is_eof(pos):
-                            return self.__array_assignment_statement()
+                        array_assignment = self.__array_assignment_statement()
+                        if array_assignment is not None:
+                            return array_assignment
             case TokenType.FUNC_DECL:
                 return self.__func_def()
             case TokenType.START_SCOPE:
@@ -95,13 +95,13 @@ class Parser:
     def __while_statement(self) -> Stmt:
         self.__advance()
 
-        if not self.__match_tok_type([TokenType.LEFT_PAREN]):
+        if not self.__match_tok_type(TokenType.LEFT_PAREN):
             raise InterpreterException("Expected '(' after 'while'")
         self.__advance()
 
         condition_expr = self.__expression()
 
-        if not self.__match_tok_type([TokenType.RIGHT_PAREN]):
+        if not self.__match_tok_type(TokenType.RIGHT_PAREN):
             raise InterpreterException("Expected ')' after while statement condition")
         self.__advance()
 
@@ -111,14 +111,14 @@ class Parser:
 
     def __if_statement(self) -> Stmt:
         self.__advance()
-        if not self.__match_tok_type([TokenType.LEFT_PAREN]):
+        if not self.__match_tok_type(TokenType.LEFT_PAREN):
             raise InterpreterException("Expected '(' after 'if'")
 
         self.__advance()
 
         condition_expr = self.__expression()
 
-        if not self.__match_tok_type([TokenType.RIGHT_PAREN]):
+        if not self.__match_tok_type(TokenType.RIGHT_PAREN):
             raise InterpreterException("Expected ')' after if statement condition")
 
         self.__advance()
@@ -129,7 +129,7 @@ class Parser:
         then_block = self.__statement()
 
         else_block = None
-        if self.__match_tok_type([TokenType.ELSE]):
+        if self.__match_tok_type(TokenType.ELSE):
             self.__advance()
 
             # ensuring new line
@@ -146,7 +146,7 @@ class Parser:
         while self.__peek().tokenType != TokenType.END_SCOPE and not self.__is_eof():
             statements.append(self.__statement())
         
-        if self.__match_tok_type([TokenType.END_SCOPE]):
+        if self.__match_tok_type(TokenType.END_SCOPE):
             self.__advance()
             return stmt.Block(statements)
 
@@ -170,7 +170,10 @@ class Parser:
 
         return assignment
 
-    def __array_assignment_statement(self) -> Stmt:
+    # Parses `name[index] <- value`. A statement that only starts like one (an array read, like `arr[i] = 1`) is
+    # left for the caller to parse as an expression, and None is returned
+    def __array_assignment_statement(self) -> Stmt | None:
+        start = self._pos
         identifier = self.__peek().lexeme
 
         self.__advance()
@@ -178,7 +181,14 @@ class Parser:
 
         index = self.__expression()
 
+        if not self.__match_tok_type(TokenType.RIGHT_BRACKET):
+            raise InterpreterException("{}: expected ']' after array indexing".format(self.__display_peek_info()))
         self.__advance()
+
+        if not self.__match_tok_type(TokenType.LEFT_ARROW):
+            # Only the index is parsed twice, the whole statement is never looked ahead into
+            self._pos = start
+            return None
         self.__advance()
 
         value = self.__expression()
@@ -266,7 +276,7 @@ class Parser:
     def __logical_or(self) -> Expr:
         left_expr = self.__logical_and()
 
-        while self.__match_tok_type([TokenType.OR]):
+        while self.__match_tok_type(TokenType.OR):
             operator = self.__peek()
             self.__advance()
 
@@ -279,7 +289,7 @@ class Parser:
     def __logical_and(self) -> Expr:
         left_expr = self.__equality()
 
-        while self.__match_tok_type([TokenType.AND]):
+        while self.__match_tok_type(TokenType.AND):
             operator = self.__peek()
             self.__advance()
 
@@ -292,7 +302,7 @@ class Parser:
     def __equality(self) -> Expr:
         left_expr = self.__comparison()
 
-        while self.__match_tok_type([TokenType.BANG_EQUAL, TokenType.EQUAL_EQUAL]):
+        while self.__match_tok_type(TokenType.BANG_EQUAL, TokenType.EQUAL_EQUAL):
             operator = self.__peek()
             self.__advance()
 
@@ -306,12 +316,10 @@ class Parser:
         left_expr = self.__term()
 
         while self.__match_tok_type(
-            [
-                TokenType.GREATER,
-                TokenType.GREATER_EQUAL,
-                TokenType.LESS,
-                TokenType.LESS_EQUAL,
-            ]
+            TokenType.GREATER,
+            TokenType.GREATER_EQUAL,
+            TokenType.LESS,
+            TokenType.LESS_EQUAL,
         ):
             operator = self.__peek()
             self.__advance()
@@ -325,7 +333,7 @@ class Parser:
     def __term(self) -> Expr:
         left_expr = self.__factor()
 
-        while self.__match_tok_type([TokenType.MINUS, TokenType.PLUS]):
+        while self.__match_tok_type(TokenType.MINUS, TokenType.PLUS):
             operator = self.__peek()
             self.__advance()
 
@@ -338,7 +346,7 @@ class Parser:
     def __factor(self) -> Expr:
         left_expr = self.__unary()
 
-        while self.__match_tok_type([TokenType.SLASH, TokenType.STAR]):
+        while self.__match_tok_type(TokenType.SLASH, TokenType.STAR):
             operator = self.__peek()
             self.__advance()
 
@@ -349,7 +357,7 @@ class Parser:
         return left_expr
 
     def __unary(self) -> Expr:
-        if self.__match_tok_type([TokenType.BANG, TokenType.MINUS]):
+        if self.__match_tok_type(TokenType.BANG, TokenType.MINUS):
             operator = self.__peek()
             self.__advance()
 
@@ -381,7 +389,7 @@ class Parser:
 
                     index = self.__expression()
 
-                    if not self.__match_tok_type([TokenType.RIGHT_BRACKET]):
+                    if not self.__match_tok_type(TokenType.RIGHT_BRACKET):
                         raise InterpreterException("{}: expected ']' after array indexing".format(self.__display_peek_info()))
 
                     self.__advance()
@@ -396,41 +404,39 @@ class Parser:
                     return expr.Literal(literal)
 
         if self.__match_tok_type(
-            [
-                TokenType.NUMBER,
-                TokenType.STRING,
-                TokenType.TRUE,
-                TokenType.FALSE,
-                TokenType.NIL,
-            ]
+            TokenType.NUMBER,
+            TokenType.STRING,
+            TokenType.TRUE,
+            TokenType.FALSE,
+            TokenType.NIL,
         ):
             literal = self.__peek()
             if not self.__is_eof():
                 self.__advance()
             return expr.Literal(literal)
 
-        if self.__match_tok_type([TokenType.LEFT_PAREN]):
+        if self.__match_tok_type(TokenType.LEFT_PAREN):
             self.__advance()
 
             grouping_expr = self.__expression()
 
-            if not self.__match_tok_type([TokenType.RIGHT_PAREN]):
+            if not self.__match_tok_type(TokenType.RIGHT_PAREN):
                 raise InterpreterException("{}: expected ')'".format(self.__display_peek_info()))
 
             self.__advance()
             return expr.Grouping(grouping_expr)
 
-        if self.__match_tok_type([TokenType.LEFT_BRACKET]):
+        if self.__match_tok_type(TokenType.LEFT_BRACKET):
             self.__advance()
 
             elts: list[Expr] = [self.__expression()]
-            while self.__match_tok_type([TokenType.COMMA]):
+            while self.__match_tok_type(TokenType.COMMA):
                 self.__advance()
 
                 elt = self.__expression()
                 elts.append(elt)
 
-            if not self.__match_tok_type([TokenType.RIGHT_BRACKET]):
+            if not self.__match_tok_type(TokenType.RIGHT_BRACKET):
                 raise InterpreterException("{}: expected ']'".format(self.__display_peek_info()))
             self.__advance()
 
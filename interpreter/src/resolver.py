@@ -0,0 +1,197 @@
+from dataclasses import dataclass, field
+
+import interpreter.src.expr as expr
+import interpreter.src.stmt as stmt
+from interpreter.src.expr import Expr
+from interpreter.src.stmt import Stmt
+from interpreter.src.token_type import TokenType
+
+# A place a name may be bound in: how many scopes to climb from the current one, and the slot in that scope
+type SlotRef = tuple[int, int]
+
+
+@dataclass
+class ScopeLayout:
+    """The slots of a block or function scope, one per name that may be bound in it."""
+    names: list[str] = field(default_factory=list)
+    slots: dict[str, int] = field(default_factory=dict)
+
+    def declare(self, name: str) -> int:
+        if name not in self.slots:
+            self.slots[name] = len(self.names)
+            self.names.append(name)
+        return self.slots[name]
+
+
+@dataclass
+class Resolution:
+    """
+    The resolver's output, keyed by the `id` of the resolved AST nodes.
+
+    `bindings` maps each name use to the slots that may hold the name, innermost first.
+    The root environment is not slotted - every name falls back to it by name once no slot holds a value.
+    `scopes` maps each `Block` to its layout, or `None` when nothing can be bound in it and no scope is needed.
+    `functions` maps each `FuncBody` to the layout of its call environment (parameters first).
+    """
+    bindings: dict[int, tuple[SlotRef, ...]] = field(default_factory=dict)
+    scopes: dict[int, ScopeLayout | None] = field(default_factory=dict)
+    functions: dict[int, ScopeLayout] = field(default_factory=dict)
+
+
+class Resolver:
+    """
+    Maps every variable use to the scopes that can hold it, so that the compiled code indexes
+    scope arrays directly instead of walking the environment chain with a dictionary lookup per scope.
+
+    The resolution keeps the environment's dynamic rules: a name may be declared in a scope but not yet
+    assigned at runtime, so a use lists every enclosing scope that declares it and the first one holding
+    a value wins, just like `Environment.get` and `Environment.assign` walking the chain.
+    Function bodies are resolved on their own, since they only see the root environment.
+
+    A block only declares the names that are not already bound around it - an assignment to a bound name
+    always updates the existing binding, so e.g. a loop body that only updates its function's locals
+    needs no scope of its own.
+    """
+
+    def __init__(self):
+        self._resolution = Resolution()
+        # Enclosing slotted scopes, innermost last. The root environment is never on the stack
+        self._scopes: list[ScopeLayout] = []
+        # Names that are certainly bound somewhere along the current environment chain
+        self._bound: set[str] = set()
+
+    def resolve(self, statements: list[Stmt]) -> Resolution:
+        self._resolution = Resolution()
+        self._scopes = []
+        self._bound = set()
+        self.__resolve_statements(statements)
+        return self._resolution
+
+    def resolve_function(self, func: stmt.FuncBody) -> Resolution:
+        """Resolves a single function, for function values that were defined without being resolved."""
+        self._resolution = Resolution()
+        self._scopes = []
+        self._bound = set()
+        self.__resolve_function(func)
+        return self._resolution
+
+    def __resolve_statements(self, statements: list[Stmt]) -> None:
+        for statement in statements:
+            self.__resolve_statement(statement)
+            # Only unconditional assignments are certain to have bound their name (here or further out)
+            if isinstance(statement, stmt.Assignment):
+                self._bound.add(statement.name)
+
+    def __resolve_statement(self, statement: Stmt) -> None:
+        match statement:
+            case stmt.Print() | stmt.Expression():
+                self.__resolve_expression(statement.expression)
+            case stmt.Assignment():
+                self.__resolve_expression(statement.value)
+                self.__bind(statement, statement.name)
+            case stmt.ArrayAssignment():
+                self.__resolve_expression(statement.value)
+                self.__bind(statement, statement.name)
+                self.__resolve_expression(statement.idx)
+            case stmt.Block():
+                self.__resolve_block(statement)
+            case stmt.If():
+                self.__resolve_expression(statement.condition)
+                self.__resolve_statement(statement.then_block)
+                if statement.else_block is not None:
+                    self.__resolve_statement(statement.else_block)
+            case stmt.While():
+                self.__resolve_expression(statement.condition)
+                self.__resolve_statement(statement.body)
+            case stmt.FuncDef():
+                self.__resolve_function(statement.func)
+            case stmt.Return():
+                self.__resolve_expression(statement.ret_val)
+
+    def __resolve_block(self, block: stmt.Block) -> None:
+        layout = ScopeLayout()
+        self.__declare_all(block.statements, layout)
+        # Whatever the block binds is gone once it ends
+        enclosing_bound = self._bound
+        self._bound = set(enclosing_bound)
+
+        if not layout.names:
+            # Nothing can ever be bound here, so the block runs in the enclosing scope
+            self._resolution.scopes[id(block)] = None
+            self.__resolve_statements(block.statements)
+        else:
+            self._resolution.scopes[id(block)] = layout
+            self._scopes.append(layout)
+            self.__resolve_statements(block.statements)
+            self._scopes.pop()
+
+        self._bound = enclosing_bound
+
+    def __resolve_function(self, func: stmt.FuncBody) -> None:
+        if isinstance(func.body, stmt.Builtin):
+            return
+
+        layout = ScopeLayout()
+        for param in func.params:
+            layout.declare(param)
+        # The body is not nested in the current chain, so nothing is known to be bound around it
+        enclosing_bound = self._bound
+        self._bound = set()
+        self.__declare_all(func.body.statements, layout)
+        self._bound = enclosing_bound
+        self._resolution.functions[id(func)] = layout
+
+        enclosing_scopes, enclosing_bound = self._scopes, self._bound
+        self._scopes, self._bound = [layout], set(func.params)
+        self.__resolve_statements(func.body.statements)
+        self._scopes, self._bound = enclosing_scopes, enclosing_bound
+
+    def __declare_all(self, statements: list[Stmt], layout: ScopeLayout) -> None:
+        for statement in statements:
+            self.__declare(statement, layout)
+
+    def __declare(self, statement: Stmt, layout: ScopeLayout) -> None:
+        """Declares the names a statement can bind in the scope it runs in (nested blocks have their own)."""
+        match statement:
+            case stmt.Assignment():
+                if statement.name not in self._bound:
+                    layout.declare(statement.name)
+            case stmt.If():
+                self.__declare(statement.then_block, layout)
+                if statement.else_block is not None:
+                    self.__declare(statement.else_block, layout)
+            case stmt.While():
+                self.__declare(statement.body, layout)
+
+    def __bind(self, node, name: str) -> None:
+        refs = []
+        for depth, layout in enumerate(reversed(self._scopes)):
+            slot = layout.slots.get(name)
+            if slot is not None:
+                refs.append((depth, slot))
+        self._resolution.bindings[id(node)] = tuple(refs)
+
+    def __resolve_expression(self, ast: Expr) -> None:
+        match ast:
+            case expr.Literal():
+                if ast.value.tokenType == TokenType.IDENTIFIER:
+                    self.__bind(ast, ast.value.lexeme)
+            case expr.ArrayLiteral():
+                for elt in ast.elts:
+                    self.__resolve_expression(elt)
+            case expr.ArrayAccess():
+                self.__bind(ast, ast.name)
+                self.__resolve_expression(ast.idx)
+            case expr.Length():
+                self.__bind(ast, ast.name)
+            case expr.Grouping():
+                self.__resolve_expression(ast.expression)
+            case expr.Unary():
+                self.__resolve_expression(ast.expression)
+            case expr.Logical() | expr.Binary():
+                self.__resolve_expression(ast.left)
+                self.__resolve_expression(ast.right)
+            case expr.FuncCall():
+                self.__bind(ast, ast.func_name)
+                for param in ast.params:
+                    self.__resolve_expression(param)
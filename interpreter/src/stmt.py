@@ -1,8 +1,8 @@
 from __future__ import annotations
 
-from enum import Enum
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from types import BuiltinMethodType
+from typing import Callable
 
 from interpreter.src.expr import Expr
 
@@ -36,7 +36,9 @@ class Block:
 @dataclass
 class FuncBody:
     params: list[str]
-    body: Block | BuiltinFunctions
+    body: Block | Builtin
+    # Closure form of `body`, filled in when the function is defined by compiled code (see `compiler.py`)
+    compiled: Callable | None = field(default=None, compare=False, repr=False)
 
 @dataclass
 class FuncDef:
@@ -58,8 +60,13 @@ class While:
     condition: Expr
     body: Stmt
 
-class BuiltinFunctions(Enum):
-    MOD = 1
-    LOG = 2
-    FLOOR = 3
-    CEIL = 4
\ No newline at end of file
+# The body of a builtin function (see `builtin_functions.py`)
+@dataclass(frozen=True)
+class Builtin:
+    name: str
+    # Called with the argument values, in the order the parameters are declared
+    implementation: Callable = field(compare=False, repr=False)
+    # Arguments are evaluated last to first (`log` evaluates its second argument first)
+    reversed_arguments: bool = False
+    # Array builtins record one `BuiltinCallEvent`, instead of the events of a loop over the elements
+    journaled: bool = False
@@ -0,0 +1,352 @@
+import interpreter.src.stmt as stmt
+from interpreter.src.bytecode import CodeObject, Op, compile_unresolved
+from interpreter.src.environment import UNSET, SlotEnvironment
+from interpreter.src.eval import Eval
+from interpreter.src.interpreter_exception import InterpreterException
+from interpreter.src.journal.journal_events import (
+    IF_END,
+    ArrayModificationEvent,
+    IfEndEvent,
+    IfStartEvent,
+    PrintEvent,
+    VariableAssignmentEvent,
+    WhileEndEvent,
+    WhileStartEvent,
+)
+from interpreter.src.number_array import NumberArray, make_array
+
+# Plain integers compare faster than enum members in the dispatch loop
+CONST = int(Op.CONST)
+POP = int(Op.POP)
+LOAD_LOCAL = int(Op.LOAD_LOCAL)
+LOAD_ROOT = int(Op.LOAD_ROOT)
+LOAD_VAR = int(Op.LOAD_VAR)
+STORE_LOCAL = int(Op.STORE_LOCAL)
+STORE_ROOT = int(Op.STORE_ROOT)
+STORE_VAR = int(Op.STORE_VAR)
+BINARY = int(Op.BINARY)
+UNARY = int(Op.UNARY)
+CHECK_BOOL = int(Op.CHECK_BOOL)
+JUMP = int(Op.JUMP)
+JUMP_IF_FALSE = int(Op.JUMP_IF_FALSE)
+JUMP_IF_TRUE_KEEP = int(Op.JUMP_IF_TRUE_KEEP)
+JUMP_IF_FALSE_KEEP = int(Op.JUMP_IF_FALSE_KEEP)
+RAISE = int(Op.RAISE)
+PRINT = int(Op.PRINT)
+EMIT = int(Op.EMIT)
+IF_START = int(Op.IF_START)
+IF_MISS = int(Op.IF_MISS)
+WHILE_START = int(Op.WHILE_START)
+WHILE_ITERATION_END = int(Op.WHILE_ITERATION_END)
+WHILE_END = int(Op.WHILE_END)
+ENTER_SCOPE = int(Op.ENTER_SCOPE)
+EXIT_SCOPE = int(Op.EXIT_SCOPE)
+BUILD_ARRAY = int(Op.BUILD_ARRAY)
+LOAD_ARRAY = int(Op.LOAD_ARRAY)
+INDEX = int(Op.INDEX)
+STORE_INDEX = int(Op.STORE_INDEX)
+LENGTH = int(Op.LENGTH)
+DEFINE = int(Op.DEFINE)
+LOAD_FUNC = int(Op.LOAD_FUNC)
+JUMP_IF_BUILTIN = int(Op.JUMP_IF_BUILTIN)
+JUMP_IF_REVERSED = int(Op.JUMP_IF_REVERSED)
+CALL_BUILTIN = int(Op.CALL_BUILTIN)
+CALL_BUILTIN_REVERSED = int(Op.CALL_BUILTIN_REVERSED)
+PREPARE_CALL = int(Op.PREPARE_CALL)
+BIND_PARAM = int(Op.BIND_PARAM)
+CALL = int(Op.CALL)
+RETURN = int(Op.RETURN)
+
+
+def _lookup(ev: Eval, name: str, refs):
+    """Reads `name` like `Environment.get`: the first slot holding a value, then the root scope by name."""
+    env = ev._environment
+    climbed = 0
+    for depth, slot in refs:
+        while climbed < depth:
+            env = env.parent
+            climbed += 1
+        value = env.slots[slot]
+        if value is not UNSET:
+            return value
+    return ev._root_environment.get(name)
+
+
+def _store(ev: Eval, name: str, refs, local_slot: int | None, value, want_old_value: bool):
+    """Assigns `name` like `Environment.assign` and returns the previous value (None unless `want_old_value`)."""
+    env = ev._environment
+    climbed = 0
+    for depth, slot in refs:
+        while climbed < depth:
+            env = env.parent
+            climbed += 1
+        old_value = env.slots[slot]
+        if old_value is not UNSET:
+            env.slots[slot] = value
+            return old_value
+
+    root = ev._root_environment
+    old_value = root.get(name) if want_old_value else None
+    if not root.try_assign(name, value):
+        if local_slot is None:
+            root.assign(name, value)
+        else:
+            ev._environment.slots[local_slot] = value
+    return old_value
+
+
+class VM:
+    """
+    Runs `CodeObject`s produced by `BytecodeCompiler` on a single value stack.
+
+    Like compiled closures, the VM keeps no interpreter state of its own - it runs on an `Eval`'s environment and
+    emits events through its listeners. User function calls push a frame instead of recursing in Python.
+    """
+
+    def run(self, ev: Eval, program: CodeObject) -> None:
+        entry_env = ev._environment
+        try:
+            self.__run(ev, program)
+        except BaseException:
+            # Frames and scopes opened by the failed code are abandoned along with it
+            ev._environment = entry_env
+            raise
+
+    def __run(self, ev: Eval, program: CodeObject) -> None:
+        emit = ev._emit_event
+        count_step = ev._count_step
+        # `ev._wanted_events` is read for every event, it changes while a program runs (see `Eval.filter_events`)
+        code = program.code
+        consts = program.consts
+        pc = 0
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        # (code, consts, pc, environment, stack size) of each caller
+        frames = []
+
+        while True:
+            if pc >= len(code):
+                return
+
+            op = code[pc]
+            arg = code[pc + 1]
+            pc += 2
+
+            if op == LOAD_LOCAL:
+                name, slot = consts[arg]
+                value = ev._environment.slots[slot]
+                if value is UNSET:
+                    value = ev._root_environment.get(name)
+                if value is None:
+                    raise InterpreterException("variable '{}' is not defined".format(name))
+                push(value)
+            elif op == CONST:
+                push(consts[arg])
+            elif op == BINARY:
+                right = pop()
+                stack[-1] = consts[arg](stack[-1], right)
+            elif op == LOAD_ROOT:
+                name = consts[arg]
+                value = ev._root_environment.get(name)
+                if value is None:
+                    raise InterpreterException("variable '{}' is not defined".format(name))
+                push(value)
+            elif op == JUMP_IF_FALSE:
+                if not pop():
+                    pc = arg
+            elif op == JUMP:
+                pc = arg
+            elif op == STORE_LOCAL:
+                name, slot = consts[arg]
+                value = pop()
+                slots = ev._environment.slots
+                old_value = slots[slot]
+                emit_assignment = VariableAssignmentEvent in ev._wanted_events
+                if old_value is UNSET:
+                    root = ev._root_environment
+                    old_value = root.get(name) if emit_assignment else None
+                    if not root.try_assign(name, value):
+                        slots[slot] = value
+                else:
+                    slots[slot] = value
+                if emit_assignment:
+                    emit(VariableAssignmentEvent(name, old_value, value))
+            elif op == STORE_ROOT:
+                name = consts[arg]
+                value = pop()
+                root = ev._root_environment
+                if VariableAssignmentEvent in ev._wanted_events:
+                    emit(VariableAssignmentEvent(name, root.get(name), value))
+                root.assign(name, value)
+            elif op == EMIT:
+                event = consts[arg]
+                if type(event) in ev._wanted_events:
+                    emit(event)
+            elif op == LOAD_VAR:
+                name, refs = consts[arg]
+                value = _lookup(ev, name, refs)
+                if value is None:
+                    raise InterpreterException("variable '{}' is not defined".format(name))
+                push(value)
+            elif op == STORE_VAR:
+                name, refs, local_slot = consts[arg]
+                value = pop()
+                emit_assignment = VariableAssignmentEvent in ev._wanted_events
+                old_value = _store(ev, name, refs, local_slot, value, emit_assignment)
+                if emit_assignment:
+                    emit(VariableAssignmentEvent(name, old_value, value))
+            elif op == LOAD_ARRAY:
+                name, refs = consts[arg]
+                array = _lookup(ev, name, refs)
+                if array is None:
+                    raise InterpreterException("variable '{}' is not defined".format(name))
+                if type(array) is not list and type(array) is not NumberArray:
+                    raise InterpreterException("Trying to access a non-array variable")
+                push(array)
+            elif op == INDEX:
+                index = int(pop())
+                array = stack[-1]
+                # The elements are indexed directly (a `NumberArray`'s `items`), not through the array's methods
+                items = array if type(array) is list else array.items
+                if index < 1 or index > len(items):
+                    raise InterpreterException("Invalid array indexing, exceeding array size")
+                stack[-1] = items[index - 1]
+            elif op == STORE_INDEX:
+                index = int(pop())
+                array = pop()
+                value = pop()
+                items = array if type(array) is list else array.items
+                if index < 1 or index > len(items):
+                    raise InterpreterException("Invalid array indexing, exceeding array size")
+                old_value = items[index - 1]
+                if type(value) is not float and type(items) is not list:
+                    # Only numbers fit in the array('d'), the array switches to a list in place
+                    items = array.items = items.tolist()
+                items[index - 1] = value
+                if ArrayModificationEvent in ev._wanted_events:
+                    emit(ArrayModificationEvent(consts[arg], index, old_value, value, array))
+            elif op == IF_START:
+                condition = pop()
+                if condition:
+                    if IfStartEvent in ev._wanted_events:
+                        emit(IfStartEvent(condition))
+                else:
+                    pc = arg
+            elif op == WHILE_ITERATION_END:
+                stack[-1] += 1
+                event = consts[arg]
+                if type(event) in ev._wanted_events:
+                    emit(event)
+                count_step()
+            elif op == CHECK_BOOL:
+                if not isinstance(stack[-1], bool):
+                    raise InterpreterException(consts[arg])
+            elif op == JUMP_IF_TRUE_KEEP:
+                if stack[-1] is True:
+                    pc = arg
+                else:
+                    pop()
+            elif op == JUMP_IF_FALSE_KEEP:
+                if stack[-1] is False:
+                    pc = arg
+                else:
+                    pop()
+            elif op == UNARY:
+                stack[-1] = consts[arg](stack[-1])
+            elif op == LOAD_FUNC:
+                name, refs, argc = consts[arg]
+                func = _lookup(ev, name, refs)
+                if func is None:
+                    raise InterpreterException("variable '{}' is not defined".format(name))
+                if type(func) is not stmt.FuncBody:
+                    raise InterpreterException("""An internal error has occurred, a function was used that was indeed not defined as a
+             function! For support please incessantly call 053-337-1749, thank you.""")
+                if len(func.params) != argc:
+                    raise InterpreterException("""Error: mismatched number of parameters and arguments given!
+             For support please incessantly call 053-337-1749, thank you.""")
+                push(func)
+            elif op == JUMP_IF_BUILTIN:
+                if type(stack[-1].body) is stmt.Builtin:
+                    pc = arg
+            elif op == PREPARE_CALL:
+                func = stack[-1]
+                # Functions defined by another engine carry no bytecode
+                callee = func.compiled if isinstance(func.compiled, CodeObject) else compile_unresolved("<function>", func)
+                stack[-1] = callee
+                push(SlotEnvironment(callee.names, ev._root_environment))
+            elif op == BIND_PARAM:
+                value = pop()
+                func_env = stack[-1]
+                callee = stack[-2]
+                slot = callee.param_slots[arg]
+                # Binding a parameter is an assignment: it updates a global of the same name if there is one
+                if func_env.slots[slot] is not UNSET or not ev._root_environment.try_assign(callee.params[arg], value):
+                    func_env.slots[slot] = value
+            elif op == CALL:
+                count_step()
+                func_env = pop()
+                callee = pop()
+                frames.append((code, consts, pc, ev._environment, len(stack)))
+                ev._environment = func_env
+                code = callee.code
+                consts = callee.consts
+                pc = 0
+            elif op == RETURN:
+                value = pop()
+                code, consts, pc, ev._environment, stack_size = frames.pop()
+                del stack[stack_size:]
+                push(value)
+            elif op == ENTER_SCOPE:
+                ev._environment = SlotEnvironment(consts[arg], ev._environment)
+            elif op == EXIT_SCOPE:
+                ev._environment = ev._environment.parent
+            elif op == POP:
+                pop()
+            elif op == PRINT:
+                value = pop()
+                if PrintEvent in ev._wanted_events:
+                    emit(PrintEvent(value))
+                print(value)
+            elif op == IF_MISS:
+                if IfStartEvent in ev._wanted_events:
+                    emit(IfStartEvent(False))
+                if IfEndEvent in ev._wanted_events:
+                    emit(IF_END)
+            elif op == WHILE_START:
+                if WhileStartEvent in ev._wanted_events:
+                    emit(WhileStartEvent("missing"))
+                push(0)
+            elif op == WHILE_END:
+                iterations = pop()
+                if WhileEndEvent in ev._wanted_events:
+                    emit(WhileEndEvent(iterations))
+            elif op == BUILD_ARRAY:
+                elts = stack[len(stack) - arg:]
+                del stack[len(stack) - arg:]
+                push(make_array(elts))
+            elif op == LENGTH:
+                name, refs = consts[arg]
+                variable = _lookup(ev, name, refs)
+                if variable is None:
+                    raise InterpreterException("variable '{}' is not defined".format(name))
+                push(float(len(variable)))
+            elif op == JUMP_IF_REVERSED:
+                if stack[-1].body.reversed_arguments:
+                    pc = arg
+            elif op == CALL_BUILTIN:
+                args = stack[len(stack) - arg:]
+                del stack[len(stack) - arg:]
+                stack[-1] = ev._call_builtin(stack[-1].body, args)
+            elif op == CALL_BUILTIN_REVERSED:
+                args = stack[len(stack) - arg:]
+                del stack[len(stack) - arg:]
+                args.reverse()
+                stack[-1] = ev._call_builtin(stack[-1].body, args)
+            elif op == DEFINE:
+                name, func = consts[arg]
+                ev._define_function(name, func)
+            elif op == RAISE:
+                raise InterpreterException(consts[arg])
+            else:
+                raise InterpreterException("Invalid instruction: {}".format(op))
@@ -0,0 +1,48 @@
+from interpreter.src.ast_cache import AstCache
+from interpreter.src.interpreter_handler import Interpreter
+from interpreter.src.journal.journal import JournalSettings
+
+SRC = """
+function double(x)
+    return x * 2
+arr <- [1, 2, 3]
+arr[2] <- double(arr[2])
+print(arr)
+"""
+
+
+def test_cache_hits_and_misses():
+    cache = AstCache()
+
+    first = cache.parse(SRC)
+    assert cache.parse(SRC) is first
+    cache.parse("print(1)")
+
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_cache_evicts_least_recently_used():
+    cache = AstCache(max_entries=2)
+
+    cache.parse("print(1)")
+    cache.parse("print(2)")
+    cache.parse("print(1)")
+    cache.parse("print(3)")
+    assert len(cache) == 2
+
+    cache.parse("print(1)")
+    cache.parse("print(2)")
+    assert (cache.hits, cache.misses) == (2, 4)
+
+
+def test_cached_ast_is_reusable():
+    cache = AstCache()
+
+    journals = [
+        Interpreter(JournalSettings(), True, ast_cache=cache).feedBlock(SRC).serialize()
+        for _ in range(2)
+    ]
+
+    assert journals[0] == journals[1]
+    assert journals[0] == Interpreter(JournalSettings(), True).feedBlock(SRC).serialize()
+    assert cache.hits == 1
@@ -0,0 +1,65 @@
+import contextlib
+import io
+import threading
+
+import pytest
+
+from interpreter.src.cancellation import CancellationToken
+from interpreter.src.interpreter_handler import Engine, Interpreter
+from interpreter.src.journal.journal import JournalSettings
+
+SRC_LOOP = """
+i <- 0
+while (true)
+    i <- i + 1
+    if (mod(i, 3) = 0)
+        print(i)
+"""
+
+SRC_RECURSION = """
+function down(n)
+    print(n)
+    return down(n - 1)
+down(10)
+"""
+
+
+def feed(engine: Engine, source: str, max_steps=None, cancellation_token=None) -> dict:
+    interpreter = Interpreter(JournalSettings(max_length=10_000, max_depth=100), True, engine)
+    with contextlib.redirect_stdout(io.StringIO()):
+        return interpreter.feedBlock(source, max_steps, cancellation_token).serialize()
+
+
+def last_event(events: list) -> dict:
+    # The error is added in the scopes the program was stopped in
+    while events[-1].get("children"):
+        events = events[-1]["children"]
+    return events[-1]
+
+
+@pytest.mark.parametrize("source", [SRC_LOOP, SRC_RECURSION])
+def test_engines_stop_at_the_same_step(source):
+    journals = [feed(engine, source, max_steps=20) for engine in Engine]
+
+    assert last_event(journals[0]["events"]) == {"type": "ERROR", "info": "Execution stopped after 20 steps"}
+    assert journals[1] == journals[0]
+    assert journals[2] == journals[0]
+
+
+@pytest.mark.parametrize("engine", list(Engine))
+def test_budget_is_per_block(engine):
+    interpreter = Interpreter(JournalSettings(), True, engine)
+    source = "i <- 0\nwhile (i < 5)\n    i <- i + 1\n"
+
+    for _ in range(3):
+        events = interpreter.feedBlock(source, max_steps=5).serialize()["events"]
+        assert last_event(events)["type"] != "ERROR"
+
+
+@pytest.mark.parametrize("engine", list(Engine))
+def test_cancelled_from_another_thread(engine):
+    token = CancellationToken()
+    threading.Timer(0.2, token.cancel).start()
+
+    events = feed(engine, SRC_LOOP, cancellation_token=token)["events"]
+    assert last_event(events) == {"type": "ERROR", "info": "Execution was cancelled"}
@@ -0,0 +1,120 @@
+import contextlib
+import io
+
+import pytest
+
+from interpreter.src import builtin_functions
+from interpreter.src.builtin_functions import builtin
+from interpreter.src.interpreter_handler import Engine, Interpreter
+from interpreter.src.journal.journal import JournalSettings
+
+
+def run(source: str, engine: Engine) -> list:
+    with contextlib.redirect_stdout(io.StringIO()):
+        return Interpreter(JournalSettings(), True, engine).feedBlock(source).serialize()["events"]
+
+
+def printed(events: list) -> list:
+    return [event["value"] for event in events if event["type"] == "PRINT"]
+
+
+@pytest.mark.parametrize("engine", list(Engine))
+def test_array_builtins(engine):
+    source = (
+        "A <- [3, -1, 2.5, 7]\n"
+        "print(sum(A))\n"
+        "print(min(A))\n"
+        "print(max(A))\n"
+        "B <- copy(A)\n"
+        "sort(A)\n"
+        "print(A)\n"
+        "reverse(B)\n"
+        "print(B)\n"
+        "fill(B, \"x\")\n"
+        "print(B)\n"
+        "print(range(2, 5))\n"
+        "print(range(0.5, 2))\n"
+        "R <- range(3, 1)\n"
+        "print(length(R))\n"
+    )
+
+    assert printed(run(source, engine)) == [
+        11.5, -1.0, 7.0,
+        [-1.0, 2.5, 3.0, 7.0],
+        [7.0, 2.5, -1.0, 3.0],
+        ["x", "x", "x", "x"],
+        [2.0, 3.0, 4.0, 5.0],
+        [0.5, 1.5],
+        0.0,
+    ]
+
+
+@pytest.mark.parametrize("engine", list(Engine))
+def test_array_builtins_record_one_event_each(engine):
+    events = run("A <- [3, 1, 2]\nsort(A)\nprint(sum(A))\nprint(mod(7, 4))\n", engine)
+
+    assert [event["type"] for event in events] == ["VARIABLE_ASSIGNMENT", "BUILTIN_CALL", "BUILTIN_CALL", "PRINT", "PRINT"]
+    sort, total = events[1], events[2]
+    assert (sort["name"], sort["params"]) == ("sort", ["[1.0, 2.0, 3.0]"])
+    assert (total["name"], total["result"]) == ("sum", "6.0")
+
+
+@pytest.mark.parametrize("engine", list(Engine))
+@pytest.mark.parametrize("source, error", [
+    ("print(sum(1))", "sum expects an array"),
+    ("print(max([1, \"a\"]))", "max expects an array of numbers"),
+    ("print(min(range(2, 1)))", "min of an empty array"),
+    ("print(range(1, \"a\"))", "range expects numbers"),
+    ("print(range(1, 100000000))", "range of more than"),
+])
+def test_array_builtins_report_invalid_arguments(source, error, engine):
+    events = run(source, engine)
+
+    assert events[-1]["type"] == "ERROR"
+    assert error in events[-1]["info"]
+
+
+@pytest.mark.parametrize("engine", list(Engine))
+def test_log_evaluates_its_second_argument_first(engine):
+    source = (
+        "function show(x)\n"
+        "    print(x)\n"
+        "    return x\n"
+        "print(log(show(2), show(8)))\n"
+    )
+
+    assert printed(run(source, engine)) == [8.0, 2.0, 3.0]
+
+
+@pytest.mark.parametrize("engine", list(Engine))
+def test_programs_can_define_functions_named_like_builtins(engine):
+    source = (
+        "function max(a, b)\n"
+        "    if (a > b)\n"
+        "        return a\n"
+        "    return b\n"
+        "function sort(A)\n"
+        "    A[1] <- 0\n"
+        "B <- [3, 1, 2]\n"
+        "sort(B)\n"
+        "print(max(3, 5))\n"
+        "print(B)\n"
+    )
+
+    assert printed(run(source, engine)) == [5.0, [0.0, 1.0, 2.0]]
+
+
+@pytest.mark.parametrize("engine", list(Engine))
+def test_program_functions_cannot_be_redefined(engine):
+    events = run("function max(a)\n    return a\nfunction max(b)\n    return b\n", engine)
+
+    assert "redefinition of previously defined function max" in events[-1]["info"]
+
+
+@pytest.mark.parametrize("engine", list(Engine))
+def test_registered_builtins_are_available_to_programs(engine, monkeypatch):
+    # Unregistered again after the test
+    monkeypatch.setitem(builtin_functions.BUILTIN_FUNCTIONS, "twice", None)
+    builtin("twice", ["x"])(lambda x: x * 2)
+
+    assert printed(run("print(twice(21))", engine)) == [42.0]
@@ -0,0 +1,86 @@
+import os
+
+import pytest
+
+from interpreter.src.compiler import Compiler
+from interpreter.src.eval import Eval
+from interpreter.src.interpreter_exception import InterpreterException
+from interpreter.src.journal.journal import Journal, JournalSettings
+from interpreter.src.parser import Parser
+from interpreter.src.resolver import Resolver
+from interpreter.src.Scanner import Scanner
+
+PROGRAMS = ["quicksort.txt", "merge_search_test.txt"]
+
+SRC_ERROR = """
+i <- 0
+while (i < 3)
+    i <- i + 1
+    if (i = 2)
+        print(1/0)
+"""
+
+# Parameters and assignments update the nearest existing binding, including globals
+SRC_SCOPING = """
+i <- 100
+function f(i, k)
+    i <- i + 1
+    k <- k + 1
+    return k
+print(f(1, 2))
+print(i)
+x <- 1
+if (true)
+    if (true)
+        x <- x + 1
+        y <- x
+        if (true)
+            y <- y + 1
+        print(y)
+print(x)
+n <- 0
+while (n < 3)
+    if (n > 0)
+        print(seen)
+    seen <- n
+    n <- n + 1
+"""
+
+
+def run(source: str, compiled: bool) -> tuple[dict, str | None]:
+    statements = Parser(Scanner(source).scan_tokens()).parse()
+    journal = Journal(JournalSettings())
+    evaluator = Eval()
+    evaluator.subscribe(journal.add_event)
+
+    error = None
+    try:
+        if compiled:
+            evaluator.execute(Compiler().compile(statements, Resolver().resolve(statements)))
+        else:
+            evaluator.evaluate(statements)
+    except InterpreterException as e:
+        error = str(e)
+    return journal.serialize(), error
+
+
+@pytest.mark.parametrize("program", PROGRAMS)
+def test_compiled_journal_matches_tree_walker(program):
+    with open(os.path.join(os.path.dirname(__file__), program), "r") as file:
+        source = file.read()
+
+    assert run(source, compiled=True) == run(source, compiled=False)
+
+
+def test_compiled_error_matches_tree_walker():
+    journal, error = run(SRC_ERROR, compiled=True)
+
+    assert error == "Division by zero"
+    assert (journal, error) == run(SRC_ERROR, compiled=False)
+
+
+def test_compiled_scoping_matches_tree_walker():
+    journal, error = run(SRC_SCOPING, compiled=True)
+
+    assert error == "variable 'seen' is not defined"
+    assert (journal, error) == run(SRC_SCOPING, compiled=False)
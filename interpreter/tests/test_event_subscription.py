@@ -0,0 +1,151 @@
+import contextlib
+import io
+import math
+
+import pytest
+
+from interpreter.src.environment import Environment
+from interpreter.src.eval import Eval
+from interpreter.src.interpreter_handler import Engine, Interpreter
+from interpreter.src.journal.journal import Journal, JournalSettings
+from interpreter.src.journal.journal_events import (
+    ELSE_END,
+    ELSE_START,
+    IF_END,
+    WHILE_ITERATION_END,
+    WHILE_ITERATION_START,
+    ArrayModificationEvent,
+    ErrorEvent,
+    PrintEvent,
+    VariableAssignmentEvent,
+    WhileIterationStartEvent,
+)
+from interpreter.src.parser import Parser
+from interpreter.src.Scanner import Scanner
+
+SRC = """
+arr <- [3, 1, 2]
+i <- 1
+while (i <= length(arr))
+    if (arr[i] > 1)
+        arr[i] <- arr[i] - 1
+    else
+        print(arr[i])
+    i <- i + 1
+print(arr)
+print(1 / 0)
+"""
+
+
+def feed(engine: Engine, whitelist) -> dict:
+    with contextlib.redirect_stdout(io.StringIO()):
+        return Interpreter(JournalSettings(whitelist), True, engine).feedBlock(SRC).serialize()
+
+
+@pytest.mark.parametrize("engine", list(Engine))
+@pytest.mark.parametrize("whitelist", [
+    [PrintEvent, ErrorEvent],
+    [VariableAssignmentEvent],
+    [ArrayModificationEvent, WhileIterationStartEvent],
+])
+def test_only_subscribed_events_are_emitted(engine, whitelist):
+    events = feed(engine, whitelist)["events"]
+    unfiltered = feed(engine, None)["events"]
+
+    def keep(entries):
+        kept = []
+        for entry in entries:
+            children = keep(entry.pop("children", []))
+            if entry["type"] in {event_type.EVENT_TYPE for event_type in whitelist}:
+                kept.append(entry)
+            kept.extend(children)
+        return kept
+
+    assert keep(events) == keep(unfiltered)
+    assert {event["type"] for event in events} <= {event_type.EVENT_TYPE for event_type in whitelist}
+
+
+def test_listeners_get_the_event_types_they_subscribed_to():
+    evaluator = Eval()
+    prints, everything = [], []
+    evaluator.subscribe(prints.append, [PrintEvent])
+    evaluator.subscribe(everything.append)
+    with contextlib.redirect_stdout(io.StringIO()):
+        evaluator.evaluate(Parser(Scanner("x <- 1\nprint(x)\n").scan_tokens()).parse())
+
+    assert [type(event) for event in prints] == [PrintEvent]
+    assert [type(event) for event in everything] == [VariableAssignmentEvent, PrintEvent]
+
+    evaluator.unsubscribe(everything.append)
+    assert evaluator._wanted_events == {PrintEvent}
+
+
+class RecordingJournal(Journal):
+    """Keeps every event added to it, the events the evaluator created."""
+    def __init__(self, settings: JournalSettings):
+        super().__init__(settings)
+        self.added = []
+
+    def add_event(self, event):
+        self.added.append(event)
+        super().add_event(event)
+
+
+LOOP_SRC = """
+i <- 0
+while (i < 50)
+    j <- 0
+    while (j < 5)
+        if (j < 2)
+            print(j)
+        j <- j + 1
+    i <- i + 1
+print(i)
+"""
+
+
+@pytest.mark.parametrize("engine", list(Engine))
+@pytest.mark.parametrize("settings", [JournalSettings(max_length=15), JournalSettings(max_depth=2)])
+def test_events_past_the_journal_limits_are_not_created(engine, settings):
+    unlimited = RecordingJournal(JournalSettings(max_length=math.inf, max_depth=math.inf))
+    limited = RecordingJournal(settings)
+    with contextlib.redirect_stdout(io.StringIO()):
+        Interpreter(unlimited.settings, engine=engine, journal=unlimited).feedBlock(LOOP_SRC)
+        Interpreter(settings, engine=engine, journal=limited).feedBlock(LOOP_SRC)
+
+    # The left out events are still counted, as if all of them were added
+    expected = Journal(settings)
+    for event in unlimited.added:
+        expected.add_event(event)
+    assert limited.serialize() == expected.serialize()
+    assert len(limited.added) < len(unlimited.added) / 3
+
+
+@pytest.mark.parametrize("engine", list(Engine))
+def test_events_without_fields_are_the_shared_ones(engine):
+    journal = RecordingJournal(JournalSettings())
+    with contextlib.redirect_stdout(io.StringIO()):
+        Interpreter(journal.settings, engine=engine, journal=journal).feedBlock(SRC)
+
+    shared = {type(event): event for event in [IF_END, ELSE_START, ELSE_END, WHILE_ITERATION_START, WHILE_ITERATION_END]}
+    alike = [event for event in journal.added if type(event) in shared]
+    assert {type(event) for event in alike} == set(shared)
+    assert all(event is shared[type(event)] for event in alike)
+
+
+@pytest.mark.parametrize("engine", list(Engine))
+@pytest.mark.parametrize("whitelist, looked_up", [([PrintEvent, ErrorEvent], False), (None, True)])
+def test_assignments_look_up_the_old_value_only_for_their_event(engine, monkeypatch, whitelist, looked_up):
+    names = []
+    get = Environment.get
+
+    def recording_get(self, name):
+        names.append(name)
+        return get(self, name)
+
+    monkeypatch.setattr(Environment, "get", recording_get)
+    source = "x <- 1\nfunction f()\n    y <- 2\nf()\n"
+    with contextlib.redirect_stdout(io.StringIO()):
+        Interpreter(JournalSettings(whitelist), True, engine).feedBlock(source)
+
+    assert {"x", "y"} & set(names) == ({"x", "y"} if looked_up else set())
@@ -0,0 +1,129 @@
+import dataclasses
+import random
+
+import pytest
+
+from interpreter.src import incremental_front_end
+from interpreter.src.incremental_front_end import IncrementalFrontEnd
+from interpreter.src.parser import Parser
+from interpreter.src.Scanner import Scanner
+from interpreter.src.Token import Token
+
+PROGRAM = """\
+|> sums the first n numbers
+function total(n)
+    s <- 0
+    while (n > 0)
+        s <- s + n
+        n <- n - 1
+    return s
+
+A <- [3, 1, 2]
+if (total(3) > 5)
+    print("big")
+else
+    print("small")
+
+while (A[1] < 10)
+    A[1] <- A[1] * 2
+x <- "a string"
+print(x)
+"""
+
+# Snippets inserted by the randomized edits, meant to open and close blocks, strings and brackets
+SNIPPETS = ["\n", "    ", "if (x)\n", "else\n", "\"", "(", ")", "[", "x <- 1\n", "print(x)", "|> ", " + 2", "\n\n"]
+
+
+@pytest.fixture(autouse=True)
+def chunk_per_statement(monkeypatch):
+    """Gives the short test programs a chunk per top-level statement, instead of a single chunk."""
+    monkeypatch.setattr(incremental_front_end, "MIN_CHUNK_LENGTH", 1)
+
+
+def dump(node):
+    """The contents of a statement, with its tokens but not their positions."""
+    if isinstance(node, Token):
+        return node.tokenType, node.lexeme, node.literal
+    if isinstance(node, list):
+        return [dump(item) for item in node]
+    if dataclasses.is_dataclass(node) and not isinstance(node, type):
+        return type(node).__name__, [dump(getattr(node, field.name)) for field in dataclasses.fields(node)]
+    return node
+
+
+def token_fields(token: Token):
+    return token.tokenType, token.lexeme, token.literal, token.line, token.char_range
+
+
+def full_parse(source: str):
+    tokens = Scanner(source).scan_tokens()
+    return tokens, Parser(tokens).parse()
+
+
+def error_of(parse, source):
+    try:
+        parse(source)
+    except Exception as error:
+        return type(error), str(error)
+    return None
+
+
+def assert_same_as_full_parse(front_end: IncrementalFrontEnd, source: str):
+    full_error = error_of(full_parse, source)
+    previous = front_end.source
+    assert error_of(front_end.update, source) == full_error
+    if full_error is not None:
+        assert front_end.source == previous
+        return
+
+    tokens, statements = full_parse(source)
+    assert [token_fields(token) for token in front_end.tokens] == [token_fields(token) for token in tokens]
+    assert dump(front_end.statements) == dump(statements)
+
+
+def test_edit_only_rescans_the_statement_it_touches():
+    front_end = IncrementalFrontEnd()
+    front_end.update(PROGRAM)
+    before = list(front_end.statements)
+
+    source = PROGRAM.replace("x <- \"a string\"", "x <- \"another string\"")
+    assert_same_as_full_parse(front_end, source)
+
+    assert front_end.last_rescanned == len("x <- \"another string\"\n")
+    changed = [index for index, statement in enumerate(front_end.statements) if statement is not before[index]]
+    assert changed == [4]
+
+
+def test_edit_that_finishes_a_statement_reaches_past_it():
+    front_end = IncrementalFrontEnd()
+    front_end.update("x <- 1\nprint(x)\n")
+
+    assert_same_as_full_parse(front_end, "if (x)\nprint(x)\n")
+    assert_same_as_full_parse(front_end, "x <- \"\nprint(x)\n")
+    assert_same_as_full_parse(front_end, "x <- \"\nprint(x)\"\n")
+
+
+def test_non_ascii_source():
+    front_end = IncrementalFrontEnd()
+
+    assert_same_as_full_parse(front_end, "x <- \"שלום\"\nprint(x)\n")
+    assert_same_as_full_parse(front_end, "x <- \"שלום\"\nprint(x)\ny <- 2\n")
+    assert_same_as_full_parse(front_end, "x <- 1\nprint(x)\ny <- 2\n")
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_random_edits_match_a_full_parse(seed):
+    rng = random.Random(seed)
+    front_end = IncrementalFrontEnd()
+    source = PROGRAM
+    assert_same_as_full_parse(front_end, source)
+
+    for _ in range(40):
+        start = rng.randrange(len(source) + 1)
+        end = min(len(source), start + rng.choice([0, 0, 1, 3, 10]))
+        inserted = rng.choice(SNIPPETS) if rng.random() < 0.7 else ""
+        source = source[:start] + inserted + source[end:]
+        # Most edits keep the program valid, by undoing the edit before it
+        if rng.random() < 0.3:
+            source = PROGRAM
+        assert_same_as_full_parse(front_end, source)
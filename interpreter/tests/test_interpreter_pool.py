@@ -0,0 +1,69 @@
+import pytest
+
+from interpreter.src.eval import BUILTINS
+from interpreter.src.interpreter_handler import Engine
+from interpreter.src.interpreter_pool import InterpreterPool
+from interpreter.src.journal.journal import JournalSettings
+from interpreter.src.journal.journal_events import PrintEvent
+
+DEFINITIONS = """
+function double(x)
+    return x * 2
+x <- 21
+"""
+USES = """
+print(mod(7, 4))
+print(x)
+"""
+
+
+def printed(journal) -> list:
+    return [event["value"] for event in journal.serialize()["events"] if event["type"] == "PRINT"]
+
+
+@pytest.mark.parametrize("engine", list(Engine))
+def test_checked_out_interpreters_start_fresh(engine):
+    pool = InterpreterPool(engine, max_idle=1)
+
+    with pool.interpreter(JournalSettings()) as interpreter:
+        first = interpreter
+        interpreter.feedBlock(DEFINITIONS)
+        assert printed(interpreter.feedBlock("print(double(x))")) == [42]
+
+    with pool.interpreter(JournalSettings()) as interpreter:
+        assert interpreter is first
+        events = interpreter.feedBlock(USES).serialize()["events"]
+    # `x` is not defined anymore
+    assert [event["value"] for event in events if event["type"] == "PRINT"] == [3]
+    assert events[-1]["type"] == "ERROR"
+    assert (pool.created, pool.reused) == (1, 1)
+
+
+def test_shared_builtins_are_never_changed():
+    pool = InterpreterPool(Engine.BYTECODE)
+    builtins = dict(BUILTINS)
+
+    with pool.interpreter(JournalSettings()) as interpreter:
+        interpreter.feedBlock("mod <- 3\nprint(mod)")
+    with pool.interpreter(JournalSettings()) as interpreter:
+        assert printed(interpreter.feedBlock("print(mod(7, 4))")) == [3]
+    assert dict(BUILTINS) == builtins
+
+
+def test_checked_out_interpreters_use_the_given_settings():
+    pool = InterpreterPool(Engine.COMPILED, max_idle=1, prestart=1)
+
+    with pool.interpreter(JournalSettings()) as interpreter:
+        assert len(interpreter.feedBlock("x <- 1\nprint(x)").serialize()["events"]) > 1
+    with pool.interpreter(JournalSettings([PrintEvent])) as interpreter:
+        assert interpreter.feedBlock("x <- 1\nprint(x)").serialize()["events"] == [{"type": "PRINT", "value": 1.0}]
+    assert (pool.created, pool.reused) == (1, 2)
+
+
+def test_pool_keeps_at_most_max_idle_interpreters():
+    pool = InterpreterPool(Engine.BYTECODE, max_idle=1)
+
+    with pool.interpreter(JournalSettings()), pool.interpreter(JournalSettings()):
+        assert len(pool) == 0
+    assert len(pool) == 1
+    assert pool.created == 2
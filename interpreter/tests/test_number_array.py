@@ -0,0 +1,81 @@
+import contextlib
+import io
+import json
+from array import array
+
+import pytest
+
+from interpreter.src.interpreter_handler import Engine, Interpreter
+from interpreter.src.journal.journal import JournalSettings
+from interpreter.src.journal.journal_events import snapshot_value
+from interpreter.src.number_array import NumberArray, make_array, plain_value
+
+
+def run(source: str, engine: Engine) -> list:
+    with contextlib.redirect_stdout(io.StringIO()):
+        return Interpreter(JournalSettings(), True, engine).feedBlock(source).serialize()["events"]
+
+
+def test_arrays_of_numbers_are_stored_unboxed():
+    numbers = make_array([3.0, -1.5, 2.0])
+
+    assert type(numbers) is NumberArray
+    assert numbers.items == array("d", [3.0, -1.5, 2.0])
+    assert type(make_array([1.0, "a"])) is list
+    # `True` would be stored as 1.0
+    assert type(make_array([1.0, True])) is list
+    assert type(make_array([])) is list
+
+
+def test_number_array_behaves_like_a_list():
+    numbers = make_array([3.0, 1.0])
+
+    assert (len(numbers), numbers[1], list(numbers)) == (2, 1.0, [3.0, 1.0])
+    assert str(numbers) == str([3.0, 1.0])
+    assert str([numbers, "a"]) == str([[3.0, 1.0], "a"])
+    assert numbers == [3.0, 1.0] and [3.0, 1.0] == numbers
+    assert numbers == make_array([3.0, 1.0]) and numbers != [3.0]
+    assert plain_value(["a", numbers]) == ["a", [3.0, 1.0]]
+
+
+def test_storing_a_non_number_switches_to_a_list_in_place():
+    numbers = make_array([3.0, 1.0])
+    alias = numbers
+
+    alias[0] = "a"
+
+    assert type(numbers.items) is list
+    assert numbers == ["a", 1.0]
+    assert str(numbers) == str(["a", 1.0])
+
+
+def test_snapshots_are_not_changed_by_later_stores():
+    numbers = make_array([3.0, 1.0])
+    nested = [numbers, 2.0]
+
+    snapshot, nested_snapshot = snapshot_value(numbers), snapshot_value(nested)
+    numbers[0] = 5.0
+
+    assert snapshot == [3.0, 1.0]
+    assert nested_snapshot == [[3.0, 1.0], 2.0]
+
+
+@pytest.mark.parametrize("engine", list(Engine))
+def test_programs_see_number_arrays_as_arrays(engine):
+    source = (
+        "function set(A, i, value)\n"
+        "    A[i] <- value\n"
+        "arr <- [3, 1, 2]\n"
+        "set(arr, 2, 5)\n"
+        "print(arr[2] + length(arr))\n"
+        "set(arr, 1, \"a\")\n"
+        "print(arr)\n"
+        "print(arr = [\"a\", 5, 2])\n"
+    )
+
+    events = run(source, engine)
+
+    assert [event["value"] for event in events if event["type"] == "PRINT"] == [8.0, ["a", 5.0, 2.0], True]
+    modifications = [event for event in events if event["type"] == "ARRAY_MODIFICATION"]
+    assert [(event["before"], event["after"]) for event in modifications] == [("1.0", "5.0"), ("3.0", "a")]
+    json.dumps(events)
@@ -0,0 +1,107 @@
+import contextlib
+import glob
+import io
+import os
+
+import pytest
+
+import interpreter.src.expr as expr
+import interpreter.src.stmt as stmt
+from interpreter.src.interpreter_handler import Engine, Interpreter
+from interpreter.src.journal.journal import JournalSettings
+from interpreter.src.optimizer import Optimizer
+from interpreter.src.parser import Parser
+from interpreter.src.Scanner import Scanner
+
+TESTS_DIR = os.path.dirname(__file__)
+PROGRAMS = sorted(
+    glob.glob(os.path.join(TESTS_DIR, "*.txt"))
+    + glob.glob(os.path.join(TESTS_DIR, "*", "*.txt"))
+    + glob.glob(os.path.join(TESTS_DIR, "..", "examples", "*.txt"))
+)
+
+SOURCES = [
+    "print(-(-10)*-2)\n",
+    "x <- (1 + 2) * 3 - 4 / 2\nprint(x)\n",
+    "print(\"a\" + \"b\")\nprint(1 = 1)\nprint(2 != 2)\nprint(!false)\n",
+    "if (true)\n    print(1)\nelse\n    print(2)\nprint(3)\n",
+    "if (1 > 2)\n    print(1)\nelse\n    print(2)\n",
+    "if (false)\n    x <- 1\nprint(3)\n",
+    "if (0)\n    print(1)\n",
+    "i <- 0\nwhile (i < 3 and true)\n    if (false or i = 1)\n        print(i)\n    i <- i + 1\n",
+    "x <- 2\nprint(true and x > 1)\nprint(false and y)\nprint(true or y)\n",
+    "function f(n)\n    if (2 > 1)\n        return n * (2 + 3)\n    return 0\nprint(f(2))\n",
+    "arr <- [1 + 1, 2 * 2, -3]\narr[1 + 1] <- 10 / 4\nprint(arr)\n",
+    # Errors are still raised when the failing operation runs
+    "print(1)\nprint(1 / 0)\nprint(2)\n",
+    "x <- 1\nif (x > 1)\n    print(1 / (2 - 2))\nprint(1 + \"a\")\n",
+    "print(!5)\n",
+    "print(-true)\n",
+    "print(true and 1)\n",
+    "print(nil)\n",
+]
+
+
+def run(source: str, engine: Engine) -> dict:
+    with contextlib.redirect_stdout(io.StringIO()):
+        return Interpreter(JournalSettings(), True, engine).feedBlock(source).serialize()
+
+
+def optimize(source: str) -> list:
+    return Optimizer().optimize(Parser(Scanner(source).scan_tokens()).parse())
+
+
+@pytest.mark.parametrize("engine", list(Engine))
+@pytest.mark.parametrize("source", SOURCES)
+def test_optimized_program_emits_the_same_events(source, engine, monkeypatch):
+    optimized = run(source, engine)
+    monkeypatch.setattr(Optimizer, "optimize", lambda self, statements: statements)
+
+    assert optimized == run(source, engine)
+
+
+@pytest.mark.parametrize("path", PROGRAMS, ids=os.path.basename)
+def test_optimized_programs_emit_the_same_events(path, monkeypatch):
+    with open(path, "r", encoding="utf-8") as file:
+        source = file.read()
+
+    optimized = [run(source, engine) for engine in Engine]
+    monkeypatch.setattr(Optimizer, "optimize", lambda self, statements: statements)
+
+    assert optimized == [run(source, engine) for engine in Engine]
+
+
+def test_constant_expressions_are_folded():
+    [assignment, printed] = optimize("x <- -(-10)*-2\nprint((1 < 2) and (\"a\" + \"b\" = \"ab\"))\n")
+
+    assert assignment.value == expr.Constant(-20.0)
+    assert printed.expression == expr.Constant(True)
+
+
+def test_failing_operations_are_not_folded():
+    [printed] = optimize("print(2 * (1 / 0))\n")
+
+    division = printed.expression.right
+    assert isinstance(printed.expression, expr.Binary)
+    assert (division.left, division.right) == (expr.Constant(1.0), expr.Constant(0.0))
+
+
+def test_branches_that_never_run_are_dropped():
+    [always, never] = optimize(
+        "if (true)\n    print(1)\nelse\n    print(2)\n"
+        "if (1 > 2)\n    print(3)\nelse\n    print(4)\n"
+    )
+
+    assert always.else_block is None
+    assert always.then_block == stmt.Block([stmt.Print(expr.Constant(1.0))])
+    assert never.then_block == stmt.Block([])
+    assert never.else_block == stmt.Block([stmt.Print(expr.Constant(4.0))])
+
+
+def test_parsed_program_is_not_modified():
+    statements = Parser(Scanner("x <- 1 + 2\nif (true)\n    print(x)\n").scan_tokens()).parse()
+    parsed = repr(statements)
+
+    Optimizer().optimize(statements)
+
+    assert repr(statements) == parsed
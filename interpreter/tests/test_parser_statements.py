@@ -0,0 +1,41 @@
+import pytest
+
+import interpreter.src.expr as expr
+import interpreter.src.stmt as stmt
+from interpreter.src.interpreter_exception import InterpreterException
+from interpreter.src.parser import Parser
+from interpreter.src.Scanner import Scanner
+
+
+def parse(source: str) -> list:
+    return Parser(Scanner(source).scan_tokens()).parse()
+
+
+def test_array_assignment():
+    [assignment] = parse("arr[i + 1] <- 5\n")
+
+    assert isinstance(assignment, stmt.ArrayAssignment)
+    assert assignment.name == "arr"
+    assert isinstance(assignment.idx, expr.Binary)
+
+
+@pytest.mark.parametrize("source", ["arr[1] = 2\nx <- 1\n", "arr[1] = 2\n", "arr[1]"])
+def test_statement_starting_with_an_array_read_is_an_expression(source):
+    statements = parse(source)
+
+    assert isinstance(statements[0], stmt.Expression)
+    assert isinstance(statements[0].expression, (expr.Binary, expr.ArrayAccess))
+    assert all(not isinstance(statement, stmt.ArrayAssignment) for statement in statements)
+
+
+def test_array_assignment_after_array_reads():
+    [read, assignment] = parse("arr[1] > 2\narr[arr[2]] <- arr[3]\n")
+
+    assert isinstance(read, stmt.Expression)
+    assert isinstance(assignment.idx, expr.ArrayAccess)
+    assert isinstance(assignment.value, expr.ArrayAccess)
+
+
+def test_unclosed_array_index_is_an_error():
+    with pytest.raises(InterpreterException, match="expected ']'"):
+        parse("arr[1 <- 2\n")
@@ -0,0 +1,61 @@
+import glob
+import os
+import random
+
+import pytest
+
+from interpreter.src.interpreter_exception import InterpreterException
+from interpreter.src.Scanner import Scanner
+
+TESTS_DIR = os.path.dirname(__file__)
+PROGRAMS = sorted(
+    glob.glob(os.path.join(TESTS_DIR, "*.txt"))
+    + glob.glob(os.path.join(TESTS_DIR, "*", "*.txt"))
+    + glob.glob(os.path.join(TESTS_DIR, "..", "examples", "*.txt"))
+)
+
+SOURCES = [
+    "",
+    "x <- 1",
+    "IF (x >= 2 AnD y != 3) |> comment <- ==\n    print(\"a\nb\")\n\n  z <- 1.5.2\n",
+    "while (i <= length(arr))\n\tarr[i] <- -i ^ 2; i <- i+1 !x <y >z\r\n",
+    "function f(a, b)\n    if (a)\n        return b\n\n    return a\nprint(f(1, 2))\n",
+    "s <- \"unterminated\n\nstring",
+    "a | b",
+    "x <- _private",
+    "x <- 3 @ 4",
+    "|> שלום עולם\nx <- \"héllo\"\n",
+    "café <- 1",
+    "x <- 12²",
+]
+
+ALPHABET = list("abz019 \t\n\r\"|>.<-=!()[],+*/;^_#é") + ["while", "IF", "  ", "\n    "]
+
+
+def scan(source: str, by_character: bool):
+    scanner = Scanner(source)
+    try:
+        tokens = scanner.scan_tokens_by_character() if by_character else scanner.scan_tokens()
+    except (InterpreterException, ValueError) as e:
+        return type(e), str(e)
+    return [(t.tokenType, t.lexeme, t.literal, t.line, t.char_range) for t in tokens]
+
+
+@pytest.mark.parametrize("path", PROGRAMS, ids=os.path.basename)
+def test_pattern_scan_matches_character_scan_on_programs(path):
+    with open(path, "r", encoding="utf-8") as file:
+        source = file.read()
+
+    assert scan(source, by_character=False) == scan(source, by_character=True)
+
+
+@pytest.mark.parametrize("source", SOURCES)
+def test_pattern_scan_matches_character_scan(source):
+    assert scan(source, by_character=False) == scan(source, by_character=True)
+
+
+def test_pattern_scan_matches_character_scan_on_random_sources():
+    rng = random.Random(0)
+    for _ in range(500):
+        source = "".join(rng.choices(ALPHABET, k=rng.randint(0, 40)))
+        assert scan(source, by_character=False) == scan(source, by_character=True), repr(source)
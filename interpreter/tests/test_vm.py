@@ -0,0 +1,86 @@
+import os
+
+import pytest
+
+from interpreter.src.bytecode import BytecodeCompiler
+from interpreter.src.eval import Eval
+from interpreter.src.interpreter_exception import InterpreterException
+from interpreter.src.journal.journal import Journal, JournalSettings
+from interpreter.src.parser import Parser
+from interpreter.src.resolver import Resolver
+from interpreter.src.Scanner import Scanner
+from interpreter.src.vm import VM
+
+PROGRAMS = ["quicksort.txt", "merge_search_test.txt"]
+
+SRC_ERROR = """
+arr <- [1, 2, 3]
+i <- 1
+while (i < 5)
+    arr[i] <- arr[i] * 2
+    i <- i + 1
+"""
+
+SRC_CALLS = """
+i <- 100
+function f(i, k)
+    i <- i + 1
+    if (k > 0)
+        return f(i, k - 1) + log(2, 8)
+    return mod(k + 7, 4)
+print(f(1, 3))
+print(i)
+print(floor(2.5) + ceil(2.5))
+print(true or 1 = 1)
+"""
+
+SRC_DEEP_RECURSION = """
+function down(n)
+    if (n = 0)
+        return 0
+    return down(n - 1) + 1
+print(down(5000))
+"""
+
+
+def run(source: str, bytecode: bool) -> tuple[dict, str | None]:
+    statements = Parser(Scanner(source).scan_tokens()).parse()
+    journal = Journal(JournalSettings())
+    evaluator = Eval()
+    evaluator.subscribe(journal.add_event)
+
+    error = None
+    try:
+        if bytecode:
+            VM().run(evaluator, BytecodeCompiler().compile(statements, Resolver().resolve(statements)))
+        else:
+            evaluator.evaluate(statements)
+    except InterpreterException as e:
+        error = str(e)
+    return journal.serialize(), error
+
+
+@pytest.mark.parametrize("program", PROGRAMS)
+def test_vm_journal_matches_tree_walker(program):
+    with open(os.path.join(os.path.dirname(__file__), program), "r") as file:
+        source = file.read()
+
+    assert run(source, bytecode=True) == run(source, bytecode=False)
+
+
+def test_vm_error_matches_tree_walker():
+    journal, error = run(SRC_ERROR, bytecode=True)
+
+    assert error == "Invalid array indexing, exceeding array size"
+    assert (journal, error) == run(SRC_ERROR, bytecode=False)
+
+
+def test_vm_calls_match_tree_walker():
+    assert run(SRC_CALLS, bytecode=True) == run(SRC_CALLS, bytecode=False)
+
+
+def test_vm_deep_recursion(capsys):
+    _, error = run(SRC_DEEP_RECURSION, bytecode=True)
+
+    assert error is None
+    assert capsys.readouterr().out == "5000.0\n"
@@ -0,0 +1,112 @@
+import math
+import threading
+
+# Used until the first task finishes
+DEFAULT_SERVICE_SECONDS = 0.5
+# How much each finished task moves the service time estimate
+SERVICE_TIME_SMOOTHING = 0.2
+MIN_RETRY_AFTER_SECONDS = 1
+
+
+class AdmissionRejected(Exception):
+    """A task turned away, with the HTTP status to answer and the seconds after which the client may retry."""
+
+    def __init__(self, status_code: int, retry_after: int, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.message = message
+
+    def result(self) -> dict:
+        return {"status": "error", "message": self.message, "retry_after": self.retry_after}
+
+
+class AdmissionController:
+    """
+    Decides which submitted tasks are run, safe to use from any thread.
+
+    At most `workers` tasks run at once and `max_queued` more wait for a worker, anything past that is rejected
+    with 503. Each client may have at most `max_per_client` tasks running or waiting, so one client can't fill the
+    queue for everyone else - its extra tasks are rejected with 429. Rejections carry a Retry-After estimated from
+    the measured time tasks take to run (see `record_service_time`) and the tasks ahead in the queue.
+    """
+
+    def __init__(self, workers: int, max_queued: int, max_per_client: int):
+        self._workers = workers
+        self._max_queued = max_queued
+        self._max_per_client = max_per_client
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._per_client: dict[str, int] = {}
+        self._service_seconds = DEFAULT_SERVICE_SECONDS
+        self.admitted = 0
+        self.rejected_busy = 0
+        self.rejected_client = 0
+
+    def admit(self, client_id: str) -> None:
+        """Counts a task of `client_id` as in flight, or raises `AdmissionRejected`. Pair with `release`."""
+        with self._lock:
+            if self._per_client.get(client_id, 0) >= self._max_per_client:
+                self.rejected_client += 1
+                # One of the client's own tasks is done by then, at the latest
+                retry_after = self._retry_after(self._queued() + 1)
+                raise AdmissionRejected(429, retry_after, "Too many tasks from this client, try again later")
+            if self._in_flight >= self._workers + self._max_queued:
+                raise self._busy()
+
+            self._in_flight += 1
+            self._per_client[client_id] = self._per_client.get(client_id, 0) + 1
+            self.admitted += 1
+
+    def release(self, client_id: str) -> None:
+        """Marks a task of `client_id` as done (or never started)."""
+        with self._lock:
+            self._in_flight -= 1
+            remaining = self._per_client[client_id] - 1
+            if remaining:
+                self._per_client[client_id] = remaining
+            else:
+                del self._per_client[client_id]
+
+    def busy(self) -> AdmissionRejected:
+        """The rejection for a task turned away because the server is out of room, e.g. out of memory."""
+        with self._lock:
+            return self._busy()
+
+    def _busy(self) -> AdmissionRejected:
+        self.rejected_busy += 1
+        # By then the queue drained enough to take another task
+        retry_after = self._retry_after(self._queued() - self._max_queued + 1)
+        return AdmissionRejected(503, retry_after, "Server too busy, try again later")
+
+    def record_service_time(self, seconds: float) -> None:
+        """Adds how long a task took to run, not counting the time it waited for a worker."""
+        with self._lock:
+            self._service_seconds += SERVICE_TIME_SMOOTHING * (seconds - self._service_seconds)
+
+    def _queued(self) -> int:
+        return max(self._in_flight - self._workers, 0)
+
+    def _retry_after(self, tasks_ahead: int) -> int:
+        # Every round of `workers` tasks takes about one service time
+        rounds = max(tasks_ahead, 1) / self._workers
+        return max(math.ceil(rounds * self._service_seconds), MIN_RETRY_AFTER_SECONDS)
+
+    @property
+    def service_seconds(self) -> float:
+        """The estimated time a task takes to run."""
+        with self._lock:
+            return self._service_seconds
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "in_flight": self._in_flight,
+                "queued": self._queued(),
+                "max_queued": self._max_queued,
+                "clients": len(self._per_client),
+                "service_seconds": self._service_seconds,
+                "admitted": self.admitted,
+                "rejected_busy": self.rejected_busy,
+                "rejected_client": self.rejected_client,
+            }
@@ -0,0 +1,168 @@
+"""
+An asyncio (ASGI) entry point to the interpreter service, with the same API as `multithread_server`:
+/api/submit, /api/result/<task_id>, /api/events/<task_id>, /api/parse and /api/status.
+
+Tasks run exactly as they do there (in the same executor and task store), but clients waiting for a result are
+coroutines awaiting the task's future rather than threads. Serve it with any ASGI server, e.g.
+    uvicorn server.asgi_server:app
+"""
+import asyncio
+import json
+import time
+from urllib.parse import parse_qs
+
+from server import multithread_server as service
+from server.admission import AdmissionRejected
+
+JSON_HEADERS = [(b"content-type", b"application/json")]
+# Like flask_cors' defaults in `multithread_server`
+CORS_HEADERS = [
+    (b"access-control-allow-origin", b"*"),
+    (b"access-control-allow-methods", b"GET, POST, OPTIONS"),
+    (b"access-control-allow-headers", b"content-type, x-client-id"),
+]
+
+
+async def wait_for_task(future, timeout: float) -> bool:
+    """Waits up to `timeout` seconds for a task without blocking a thread, and returns whether it is done."""
+    if not future.done():
+        # `asyncio.wait` doesn't cancel the task when the wait times out (or the client goes away)
+        await asyncio.wait([asyncio.wrap_future(future)], timeout=timeout)
+    return future.done()
+
+
+async def send_response(send, status: int, body: str, headers=JSON_HEADERS) -> None:
+    await send({"type": "http.response.start", "status": status, "headers": headers + CORS_HEADERS})
+    await send({"type": "http.response.body", "body": body.encode()})
+
+
+async def send_json(send, status: int, value, headers=()) -> None:
+    await send_response(send, status, json.dumps(value, sort_keys=True), JSON_HEADERS + list(headers))
+
+
+async def read_json(receive):
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body", False):
+            return json.loads(body or b"null")
+
+
+async def submit_task(client_id: str, receive, send) -> None:
+    try:
+        request_json = await read_json(receive)
+        request_data = request_json.get("data")
+        is_debug = request_json.get("is_debug")
+    except (ValueError, AttributeError):
+        return await send_json(send, 400, {"status": "error", "message": "Invalid JSON"})
+
+    try:
+        task_id, future = service.start_task(request_data, is_debug, client_id)
+    except AdmissionRejected as rejection:
+        return await send_json(send, rejection.status_code, rejection.result(), [
+            (b"retry-after", str(rejection.retry_after).encode()),
+        ])
+
+    # A quick task is returned right away, like /api/result would return it
+    if await wait_for_task(future, service.MIN_TASK_WAIT_SECONDS):
+        return await send_response(send, 200, service.encode_result(service.collect_result(task_id, future)))
+    await send_json(send, 200, {"status": "accepted", "task_id": task_id})
+
+
+async def parse_code(receive, send) -> None:
+    try:
+        request_json = await read_json(receive)
+        session_id = request_json.get("session_id")
+        source = request_json.get("data")
+    except (ValueError, AttributeError):
+        return await send_json(send, 400, {"status": "error", "message": "Invalid JSON"})
+
+    # Parsing a session's first version of a long program takes a while, it doesn't block the event loop
+    result, status_code = await asyncio.to_thread(service.check_syntax, session_id, source)
+    await send_json(send, status_code, result)
+
+
+async def get_result(task_id: str, query: dict, send) -> None:
+    task = service.task_store.get(task_id)
+    if task is None:
+        return await send_json(send, 404, {"status": "error", "message": "Task not found"})
+
+    future, elapsed = task
+    try:
+        wait_seconds = min(float(query.get("wait", ["0"])[0]), service.MAX_RESULT_WAIT_SECONDS)
+    except ValueError:
+        wait_seconds = 0
+    if wait_seconds > 0:
+        started = time.monotonic()
+        await wait_for_task(future, wait_seconds)
+        elapsed += time.monotonic() - started
+
+    if not future.done():
+        return await send_json(send, 200, {"status": "pending", "elapsed_seconds": elapsed})
+    await send_response(send, 200, service.encode_result(service.collect_result(task_id, future)))
+
+
+async def task_events(task_id: str, send) -> None:
+    task = service.task_store.get(task_id)
+    if task is None:
+        return await send_json(send, 404, {"status": "error", "message": "Task not found"})
+
+    future, elapsed = task
+    started = time.time() - elapsed
+    headers = [(b"content-type", b"text/event-stream"), (b"cache-control", b"no-cache")]
+    await send({"type": "http.response.start", "status": 200, "headers": headers + CORS_HEADERS})
+
+    async def send_event(event: str, data: str, more_body: bool = True) -> None:
+        body = "event: " + event + "\ndata: " + data + "\n\n"
+        await send({"type": "http.response.body", "body": body.encode(), "more_body": more_body})
+
+    while not await wait_for_task(future, service.EVENTS_PENDING_INTERVAL_SECONDS):
+        await send_event("pending", json.dumps({"status": "pending", "elapsed_seconds": time.time() - started}))
+    await send_event("result", service.encode_result(service.collect_result(task_id, future)), more_body=False)
+
+
+async def handle_http(scope, receive, send) -> None:
+    method = scope["method"]
+    path = scope["path"]
+    query = parse_qs(scope.get("query_string", b"").decode())
+
+    if method == "OPTIONS":
+        return await send_response(send, 204, "", headers=[])
+
+    if path == "/api/submit" and method == "POST":
+        # The client's IP address, like Flask's `request.remote_addr`
+        client = scope.get("client")
+        client_id_header = dict(scope.get("headers", [])).get(b"x-client-id")
+        client_id = service.client_id_of(
+            client[0] if client else None, client_id_header.decode() if client_id_header else None)
+        return await submit_task(client_id, receive, send)
+    if path.startswith("/api/result/") and method == "GET":
+        return await get_result(path[len("/api/result/"):], query, send)
+    if path.startswith("/api/events/") and method == "GET":
+        return await task_events(path[len("/api/events/"):], send)
+    if path == "/api/parse" and method == "POST":
+        return await parse_code(receive, send)
+    if path == "/api/status" and method == "GET":
+        return await send_json(send, 200, service.status())
+    await send_json(send, 404, {"status": "error", "message": "Not found"})
+
+
+async def handle_lifespan(receive, send) -> None:
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            if service.USE_PROCESS_POOL:
+                # Started before taking requests, so the first task doesn't wait for the workers
+                await asyncio.to_thread(service.get_process_pool)
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send) -> None:
+    if scope["type"] == "http":
+        await handle_http(scope, receive, send)
+    elif scope["type"] == "lifespan":
+        await handle_lifespan(receive, send)
@@ -0,0 +1,46 @@
+import threading
+from typing import Optional
+
+import psutil
+
+DEFAULT_SAMPLE_INTERVAL_SECONDS = 1
+
+
+class HostMetrics:
+    """
+    The host's CPU and memory usage, sampled every `interval` seconds by a daemon thread once `start` is called,
+    so reading them (on every submitted task and status request) costs nothing.
+    """
+
+    def __init__(self, interval: float = DEFAULT_SAMPLE_INTERVAL_SECONDS):
+        self._interval = interval
+        self._sampler: Optional[threading.Thread] = None
+        self._stop_sampler = threading.Event()
+        # The first CPU reading is always 0, it only starts the measured interval
+        psutil.cpu_percent()
+        self.cpu_percent = 0.0
+        self.memory_percent = psutil.virtual_memory().percent
+
+    def sample(self) -> None:
+        # The CPU usage since the previous sample
+        self.cpu_percent = psutil.cpu_percent()
+        self.memory_percent = psutil.virtual_memory().percent
+
+    def start(self) -> None:
+        if self._sampler is not None:
+            return
+
+        def sample_periodically():
+            while not self._stop_sampler.wait(self._interval):
+                self.sample()
+
+        self._sampler = threading.Thread(target=sample_periodically, name="host-metrics-sampler", daemon=True)
+        self._sampler.start()
+
+    def stop(self) -> None:
+        if self._sampler is None:
+            return
+        self._stop_sampler.set()
+        self._sampler.join()
+        self._sampler = None
+        self._stop_sampler.clear()
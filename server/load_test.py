@@ -0,0 +1,147 @@
+"""
+Load-tests a running server: `--clients` concurrent clients each submit a program and long-poll for its result,
+over and over for `--seconds`. Reports the completed tasks per second, latency percentiles, how many submits
+were turned away as busy (429/503), and the server's thread count.
+
+The clients all share one address, so each sends its own X-Client-Id. Start the server with
+TRUST_CLIENT_ID_HEADER=1 so it counts them as separate clients, otherwise its per-client limit turns most of their
+submits away with 429 and the test measures that limit instead of the server.
+
+Run against either entry point, e.g.
+    TRUST_CLIENT_ID_HEADER=1 python -m server.multithread_server          # Flask, port 5000
+    TRUST_CLIENT_ID_HEADER=1 uvicorn server.asgi_server:app --port 8000    # ASGI
+    python -m server.load_test http://localhost:5000 --clients 200
+    python -m server.load_test http://localhost:8000 --clients 200
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from urllib.parse import urlsplit
+
+# Takes a while in every engine, so clients spend most of their time waiting for results
+DEFAULT_SOURCE = """
+i <- 0
+total <- 0
+while (i < 20000)
+    total <- total + i
+    i <- i + 1
+print(total)
+"""
+RESULT_WAIT_SECONDS = 10
+
+
+class Stats:
+    def __init__(self):
+        self.latencies: list[float] = []
+        self.busy = 0
+        self.errors = 0
+
+
+async def http_request(
+    host: str, port: int, method: str, path: str, body=None, client_id: str = "load-test",
+) -> tuple[int, dict]:
+    """Sends one request on a new connection and returns the response's status and JSON body."""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        payload = json.dumps(body).encode() if body is not None else b""
+        head = (
+            f"{method} {path} HTTP/1.1\r\nHost: {host}:{port}\r\nConnection: close\r\n"
+            f"X-Client-Id: {client_id}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n\r\n"
+        )
+        writer.write(head.encode() + payload)
+        await writer.drain()
+        response = await reader.read()
+    finally:
+        writer.close()
+
+    head, _, body = response.partition(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    if b"transfer-encoding: chunked" in head.lower():
+        body = dechunk(body)
+    return status, json.loads(body)
+
+
+def dechunk(body: bytes) -> bytes:
+    chunks = []
+    while body:
+        size, _, body = body.partition(b"\r\n")
+        size = int(size, 16)
+        if size == 0:
+            break
+        chunks.append(body[:size])
+        body = body[size + 2:]
+    return b"".join(chunks)
+
+
+async def run_client(host: str, port: int, source: str, deadline: float, stats: Stats, client_id: str) -> None:
+    while time.monotonic() < deadline:
+        start = time.monotonic()
+        try:
+            status, result = await http_request(
+                host, port, "POST", "/api/submit", {"data": source, "is_debug": False}, client_id)
+            if status in (429, 503):
+                stats.busy += 1
+                # Like a well-behaved client, going by the response's Retry-After
+                await asyncio.sleep(result.get("retry_after", 1))
+                continue
+            task_id = result.get("task_id")
+            while result.get("status") in ("accepted", "pending"):
+                status, result = await http_request(
+                    host, port, "GET", f"/api/result/{task_id}?wait={RESULT_WAIT_SECONDS}", client_id=client_id)
+        except (OSError, ValueError, IndexError):
+            stats.errors += 1
+            await asyncio.sleep(0.5)
+            continue
+        if result.get("status") == "completed":
+            stats.latencies.append(time.monotonic() - start)
+        else:
+            stats.errors += 1
+
+
+async def load_test(url: str, clients: int, seconds: float, source: str) -> None:
+    address = urlsplit(url)
+    host, port = address.hostname, address.port or 80
+    stats = Stats()
+    deadline = time.monotonic() + seconds
+
+    clients_task = asyncio.gather(*(
+        run_client(host, port, source, deadline, stats, f"load-test-{i}") for i in range(clients)
+    ))
+    # Sampled halfway through, while every client is connected
+    await asyncio.sleep(seconds / 2)
+    _, server_status = await http_request(host, port, "GET", "/api/status")
+    await clients_task
+
+    latencies = sorted(stats.latencies)
+    print(f"{url}: {clients} clients for {seconds:g}s")
+    print(f"  completed      {len(latencies)} ({len(latencies) / seconds:.1f}/s)")
+    print(f"  busy (429/503) {stats.busy}")
+    print(f"  errors         {stats.errors}")
+    if latencies:
+        quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+        print(f"  latency        p50 {quantiles[49]:.2f}s  p95 {quantiles[94]:.2f}s  max {latencies[-1]:.2f}s")
+    print(f"  server threads {server_status.get('threads')}")
+    # Each client has one task at a time, so any of these mean the server ignored their X-Client-Id
+    print(f"  per-client 429 {server_status.get('admission', {}).get('rejected_client')}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("url", help="The server's base URL, e.g. http://localhost:5000")
+    parser.add_argument("--clients", type=int, default=100, help="Concurrent clients")
+    parser.add_argument("--seconds", type=float, default=20, help="How long to run")
+    parser.add_argument("--source", help="A file with the program to submit")
+    args = parser.parse_args()
+
+    source = DEFAULT_SOURCE
+    if args.source is not None:
+        with open(args.source, "r", encoding="utf-8") as file:
+            source = file.read()
+    asyncio.run(load_test(args.url, args.clients, args.seconds, source))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,129 +1,398 @@
 import random
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, request, jsonify, send_from_directory
 import concurrent.futures
-import uuid
+import io
+import json
+import os
+import queue
+import threading
 import time
 from flask_cors import CORS
-import psutil
-from functools import wraps
-from interpreter.src.interpreter_handler import Interpreter
-from interpreter.src.journal.journal import JournalSettings
+from interpreter.src.ast_cache import AstCache
+from interpreter.src.cancellation import CancellationToken
+from interpreter.src.interpreter_handler import Engine, Interpreter
+from interpreter.src.interpreter_pool import InterpreterPool
+from interpreter.src.journal.journal import JournalSettings, StreamingJournal
 from interpreter.src.journal.journal_events import ErrorEvent, PrintEvent
+from server.admission import AdmissionController, AdmissionRejected
+from server.host_metrics import HostMetrics
+from server.parse_sessions import ParseSessions
+from server.process_pool import ProcessPool
+from server.task_store import TaskStore
 
 app = Flask(__name__, static_folder="../client/dep_web/dist", static_url_path="/")
 CORS(app)  # Allow requests from React frontend
 
 # If the task takes less than this time, we just return it on submit (to prevent extra requests)
 MIN_TASK_WAIT_SECONDS = 0.1
-MAX_WORKERS = 4
+# The longest /api/result waits for a task when asked to (?wait=<seconds>), before answering "pending"
+MAX_RESULT_WAIT_SECONDS = 30
+# How often /api/events reports a task that is still pending
+EVENTS_PENDING_INTERVAL_SECONDS = 1
+# Tasks run in worker processes, one per core
+MAX_WORKERS = os.cpu_count() or 4
+# Tasks waiting for a worker, past them submitted tasks are turned away with 503
+MAX_QUEUED_TASKS = 4 * MAX_WORKERS
+# Tasks running or waiting per client (IP address), past them its tasks are turned away with 429
+MAX_TASKS_PER_CLIENT = 4
+# Whether a request's X-Client-Id header, when it has one, names its client instead of its address. Anyone can
+# send it, so this is only for a proxy that sets it, or for load tests simulating many clients from one address
+# (see `load_test.py`). Set with the TRUST_CLIENT_ID_HEADER environment variable
+TRUST_CLIENT_ID_HEADER = os.environ.get("TRUST_CLIENT_ID_HEADER") == "1"
 MAX_VRAM_USAGE_PERCENT = 99
 DEFAULT_TIMEOUT_SECONDS = 5
+# The VM keeps user function calls off the Python stack, so deep recursion in submitted code doesn't crash the worker
+EXECUTION_ENGINE = Engine.BYTECODE
+AST_CACHE_SIZE = 256
+# Chunks of a streamed journal waiting to be sent, a slower client makes the task wait
+MAX_STREAM_QUEUED_CHUNKS = 64
+# Submitted tasks run in pre-started worker processes, which are killed on timeout. Otherwise (and always for
+# streamed tasks) they run in this process' threads, where a timed out task keeps running until it ends
+USE_PROCESS_POOL = True
+TASK_CPU_SECONDS = DEFAULT_TIMEOUT_SECONDS + 1
+TASK_MEMORY_BYTES = 512 * 1024 * 1024
+# Loop iterations and function calls a task may run, it is stopped with an error past them
+MAX_TASK_STEPS = 10_000_000
 
 whitelist = [
     PrintEvent,
     ErrorEvent,
 ]
-RUN_JOURNAL_SETTINGS = JournalSettings(whitelist)
+# Nothing past the journal's length limit is shown in run mode, so the program is stopped there
+RUN_JOURNAL_SETTINGS = JournalSettings(whitelist, stop_when_full=True)
 DEBUG_JOURNAL_SETTINGS = JournalSettings()
 
+# Parsed programs are shared by all tasks, resubmitting a program (e.g. to debug it after running it) skips parsing
+ast_cache = AstCache(AST_CACHE_SIZE)
+# The code of the clients' editors, checked for syntax errors as it is edited
+MAX_PARSE_SESSIONS = 256
+parse_sessions = ParseSessions(MAX_PARSE_SESSIONS)
+# Interpreters for the tasks run in this process' threads, one for each of them
+interpreter_pool = InterpreterPool(EXECUTION_ENGINE, ast_cache, max_idle=MAX_WORKERS)
+
 # Configure thread pool
 executor = concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS)
+# Started with the server, or by the first submitted task
+process_pool = None
+process_pool_lock = threading.Lock()
+
+# Submitted tasks until their results are collected. Results nobody collects expire
+MAX_STORED_TASKS = 1024
+RESULT_TTL_SECONDS = 60
+task_store = TaskStore(MAX_STORED_TASKS, RESULT_TTL_SECONDS)
+task_store.start_reaper()
+
+admission = AdmissionController(MAX_WORKERS, MAX_QUEUED_TASKS, MAX_TASKS_PER_CLIENT)
+# Sampled in the background, so checking them on every request is free
+host_metrics = HostMetrics()
+host_metrics.start()
+
+def completed_result(journal):
+    # The journal is encoded here instead of building its serialized form for `jsonify`, which takes far more memory
+    encoded_journal = io.StringIO()
+    journal.write_json(encoded_journal)
+    return {"status": "completed", "result_json": encoded_journal.getvalue()}
+
+def encode_result(result):
+    """The JSON text of a task's result, with the already encoded journal of a completed task inserted as is."""
+    if "result_json" not in result:
+        return json.dumps(result, sort_keys=True)
+    return '{"status": "completed", "result": ' + result["result_json"] + '}'
+
+def result_response(result):
+    return Response(encode_result(result), mimetype="application/json")
+
+def collect_result(task_id, future):
+    """Removes a finished task from the store and returns its result."""
+    task_store.pop(task_id)
+    try:
+        return future.result(timeout=0)
+    except concurrent.futures.TimeoutError:
+        return {"status": "timeout", "message": "Task timed out"}
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
 
-task_results = {}
-
-def timeout_handler(seconds):
-    def decorator(func):
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            future = executor.submit(func, *args, **kwargs)
-            try:
-                return future.result(timeout=seconds)
-            except concurrent.futures.TimeoutError:
-                return {"status": "timeout", "message": f"Task exceeded {seconds} seconds"}
-        return wrapper
-    return decorator
-
-@timeout_handler(DEFAULT_TIMEOUT_SECONDS)
-def execute_code(request_data):
+def run_code(request_data, journal_settings, max_steps=None, timeout=None):
+    """
+    Runs a task on the calling (worker) thread. The interpreter checks the deadline itself, so a timed out task
+    stops and frees its worker without anything else waiting on it.
+    """
+    timeout = DEFAULT_TIMEOUT_SECONDS if timeout is None else timeout
+    max_steps = MAX_TASK_STEPS if max_steps is None else max_steps
+    cancellation_token = CancellationToken(timeout)
     try:
-        interpreter = Interpreter(RUN_JOURNAL_SETTINGS, True)
-        journal = interpreter.feedBlock(request_data)
-        return {"status": "completed", "result": journal.serialize()}
+        with interpreter_pool.interpreter(journal_settings) as interpreter:
+            journal = interpreter.feedBlock(request_data, max_steps, cancellation_token)
+        if cancellation_token.timed_out():
+            return {"status": "timeout", "message": f"Task exceeded {timeout} seconds"}
+        return completed_result(journal)
     except Exception as e:
         print(f'[Server Error] {e}')
         return {"status": "error", "message": "Unhandled exception"}
 
-@timeout_handler(DEFAULT_TIMEOUT_SECONDS)
-def debug_code(request_data):
+def execute_code(request_data, max_steps=None, timeout=None):
+    return run_code(request_data, RUN_JOURNAL_SETTINGS, max_steps, timeout)
+
+def debug_code(request_data, max_steps=None, timeout=None):
+    return run_code(request_data, DEBUG_JOURNAL_SETTINGS, max_steps, timeout)
+
+def get_process_pool():
+    global process_pool
+    with process_pool_lock:
+        if process_pool is None:
+            process_pool = ProcessPool(MAX_WORKERS, EXECUTION_ENGINE, TASK_CPU_SECONDS, TASK_MEMORY_BYTES)
+    return process_pool
+
+def run_code_in_process(request_data, journal_settings, max_steps=None, timeout=None):
+    """Runs a task in a worker process, the calling thread only waits for its result (or kills it on timeout)."""
+    timeout = DEFAULT_TIMEOUT_SECONDS if timeout is None else timeout
+    max_steps = MAX_TASK_STEPS if max_steps is None else max_steps
+    return get_process_pool().run(request_data, journal_settings, timeout, max_steps)
+
+def execute_code_in_process(request_data, max_steps=None, timeout=None):
+    return run_code_in_process(request_data, RUN_JOURNAL_SETTINGS, max_steps, timeout)
+
+def debug_code_in_process(request_data, max_steps=None, timeout=None):
+    return run_code_in_process(request_data, DEBUG_JOURNAL_SETTINGS, max_steps, timeout)
+
+class StreamClosedError(Exception):
+    pass
+
+class QueueSink:
+    """A writable sink handing the chunks of a `StreamingJournal` to the response that streams them."""
+    END = None
+
+    def __init__(self):
+        self.chunks = queue.Queue(maxsize=MAX_STREAM_QUEUED_CHUNKS)
+        self.closed = False
+
+    def write(self, chunk: str) -> None:
+        # Aborts the task once nobody reads the stream anymore
+        if self.closed:
+            raise StreamClosedError()
+        self.chunks.put(chunk)
+
+    def close(self) -> None:
+        self.closed = True
+        # Unblock the task if it waits for room in the queue
+        while not self.chunks.empty():
+            self.chunks.get_nowait()
+
+def stream_code(request_data, journal: StreamingJournal, sink: QueueSink, cancellation_token: CancellationToken):
+    failed = False
     try:
-        interpreter = Interpreter(DEBUG_JOURNAL_SETTINGS, True)
-        journal = interpreter.feedBlock(request_data)
-        return {"status": "completed", "result": journal.serialize()}
+        interpreter = Interpreter(journal.settings, engine=EXECUTION_ENGINE, ast_cache=ast_cache, journal=journal)
+        interpreter.feedBlock(request_data, MAX_TASK_STEPS, cancellation_token)
+    except StreamClosedError:
+        return
     except Exception as e:
         print(f'[Server Error] {e}')
-        return {"status": "error", "message": "Unhandled exception"}
+        failed = True
 
-@app.route('/api/submit', methods=['POST'])
-def submit_task():
-    memory_usage = psutil.virtual_memory().percent
+    try:
+        if failed:
+            journal.add_event(ErrorEvent("Unhandled exception"))
+        journal.close()
+        sink.write(QueueSink.END)
+    except StreamClosedError:
+        pass
 
-    if memory_usage > MAX_VRAM_USAGE_PERCENT:
-        return jsonify({"status": "error", "message": "Server too busy, try again later"}), 503
-    
-    if len(task_results) >= MAX_WORKERS:
-        return jsonify({"status": "error", "message": "Server too busy, try again later"}), 503
-    
-    request_data = request.json.get('data')
-    is_debug = request.json.get('is_debug')
-    code_handler_func = debug_code if is_debug else execute_code
+def client_id_of(address, client_id_header):
+    """The client a request is counted against by admission, see `TRUST_CLIENT_ID_HEADER`."""
+    if TRUST_CLIENT_ID_HEADER and client_id_header:
+        return client_id_header
+    return address
+
+def admit(client_id):
+    """Counts a task of the client as in flight, or raises `AdmissionRejected` when there is no room for it."""
+    if host_metrics.memory_percent > MAX_VRAM_USAGE_PERCENT:
+        raise admission.busy()
+    admission.admit(client_id)
+
+def release_when_done(future, client_id):
+    # Also when the task is cancelled before it started
+    future.add_done_callback(lambda _: admission.release(client_id))
+
+def timed(code_handler_func):
+    """Wraps a task to measure how long it runs, for the admission's Retry-After estimates."""
+    def run(*args):
+        started = time.monotonic()
+        try:
+            return code_handler_func(*args)
+        finally:
+            admission.record_service_time(time.monotonic() - started)
+    return run
+
+def start_task(request_data, is_debug, client_id):
+    """
+    Schedules a task and stores it, returning its id and future - or raises `AdmissionRejected`.
+    Shared by every server entry point, it never blocks.
+    """
+    admit(client_id)
     
-    task_id = str(uuid.uuid4())
+    if USE_PROCESS_POOL:
+        code_handler_func = debug_code_in_process if is_debug else execute_code_in_process
+    else:
+        code_handler_func = debug_code if is_debug else execute_code
     
     # Submit and store task
-    future = executor.submit(code_handler_func, request_data)
-    task_results[task_id] = {
-        "future": future,
-        "submitted_at": time.time()
-    }
+    future = executor.submit(timed(code_handler_func), request_data)
+    release_when_done(future, client_id)
+    task_id = task_store.add(future)
+    if task_id is None:
+        future.cancel()
+        raise admission.busy()
+    return task_id, future
+
+def request_client_id():
+    return client_id_of(request.remote_addr, request.headers.get('X-Client-Id'))
+
+def rejected_response(rejection: AdmissionRejected):
+    return jsonify(rejection.result()), rejection.status_code, {"Retry-After": str(rejection.retry_after)}
+
+@app.route('/api/submit', methods=['POST'])
+def submit_task():
+    try:
+        task_id, future = start_task(request.json.get('data'), request.json.get('is_debug'), request_client_id())
+    except AdmissionRejected as rejection:
+        return rejected_response(rejection)
+
+    # A quick task is returned right away, like /api/result would return it
+    concurrent.futures.wait([future], timeout=MIN_TASK_WAIT_SECONDS)
+    if future.done():
+        return result_response(collect_result(task_id, future))
     
     return jsonify({"status": "accepted", "task_id": task_id})
 
+@app.route('/api/stream', methods=['POST'])
+def stream_task():
+    """
+    Runs the code and streams its journal while it runs, as a chunked response holding the same JSON
+    `/api/result` returns in "result". A stream cut short by the timeout is not valid JSON.
+    """
+    client_id = request_client_id()
+    try:
+        admit(client_id)
+    except AdmissionRejected as rejection:
+        return rejected_response(rejection)
+
+    request_data = request.json.get('data')
+    is_debug = request.json.get('is_debug')
+
+    sink = QueueSink()
+    journal = StreamingJournal(DEBUG_JOURNAL_SETTINGS if is_debug else RUN_JOURNAL_SETTINGS, sink)
+    cancellation_token = CancellationToken(DEFAULT_TIMEOUT_SECONDS)
+    future = executor.submit(stream_code, request_data, journal, sink, cancellation_token)
+    release_when_done(future, client_id)
+
+    def generate():
+        deadline = time.time() + DEFAULT_TIMEOUT_SECONDS
+        try:
+            while True:
+                chunk = sink.chunks.get(timeout=max(deadline - time.time(), 0))
+                if chunk is QueueSink.END:
+                    return
+                yield chunk
+        except queue.Empty:
+            print(f'[Server Error] Streamed task exceeded {DEFAULT_TIMEOUT_SECONDS} seconds')
+        finally:
+            # Also reached when the client disconnects
+            cancellation_token.cancel()
+            sink.close()
+
+    return Response(generate(), mimetype="application/json")
+
 @app.route('/api/result/<task_id>', methods=['GET'])
 def get_result(task_id):
-    if task_id not in task_results:
+    """
+    The task's result, or "pending" while it runs. With ?wait=<seconds> a pending task is waited for
+    (up to MAX_RESULT_WAIT_SECONDS), so the result is returned as soon as it is ready.
+    """
+    task = task_store.get(task_id)
+    if task is None:
         return jsonify({"status": "error", "message": "Task not found"}), 404
     
-    task = task_results[task_id]
-    future = task["future"]
+    future, elapsed = task
+    wait_seconds = min(request.args.get('wait', 0, type=float), MAX_RESULT_WAIT_SECONDS)
+    if wait_seconds > 0:
+        concurrent.futures.wait([future], timeout=wait_seconds)
+        elapsed += wait_seconds
     
     if not future.done():
-        elapsed = time.time() - task["submitted_at"]
         return jsonify({"status": "pending", "elapsed_seconds": elapsed})
     
-    try:
-        result = future.result(timeout=0)
-        del task_results[task_id]
-        return jsonify(result)
-    except concurrent.futures.TimeoutError:
-        return jsonify({"status": "timeout", "message": "Task timed out"})
-    except Exception as e:
-        return jsonify({"status": "error", "message": str(e)})
+    return result_response(collect_result(task_id, future))
+
+@app.route('/api/events/<task_id>', methods=['GET'])
+def task_events(task_id):
+    """
+    Server-sent events for a task: a "pending" event every EVENTS_PENDING_INTERVAL_SECONDS while it runs,
+    then a "result" event holding what /api/result returns, after which the stream ends.
+    """
+    task = task_store.get(task_id)
+    if task is None:
+        return jsonify({"status": "error", "message": "Task not found"}), 404
+
+    future, elapsed = task
+    started = time.time() - elapsed
+
+    def generate():
+        while not concurrent.futures.wait([future], timeout=EVENTS_PENDING_INTERVAL_SECONDS).done:
+            pending = {"status": "pending", "elapsed_seconds": time.time() - started}
+            yield "event: pending\ndata: " + json.dumps(pending) + "\n\n"
+        # The encoded JSON holds no line breaks, it fits a single data line
+        yield "event: result\ndata: " + encode_result(collect_result(task_id, future)) + "\n\n"
+
+    return Response(generate(), mimetype="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+def check_syntax(session_id, source):
+    """The result of /api/parse: "ok", or "error" with the first syntax error in the source."""
+    if not isinstance(session_id, str) or not isinstance(source, str):
+        return {"status": "error", "message": "Expected a session_id and data"}, 400
+    error = parse_sessions.check(session_id, source)
+    if error is not None:
+        return {"status": "error", "message": error}, 200
+    return {"status": "ok"}, 200
+
+@app.route('/api/parse', methods=['POST'])
+def parse_code():
+    """
+    Checks the code in a client's editor for syntax errors. Each editor sends its own session id with every
+    version of its code, only the parts changed since its last request are parsed again.
+    """
+    result, status_code = check_syntax(request.json.get('session_id'), request.json.get('data'))
+    return jsonify(result), status_code
+
+def status():
+    return {
+        "active_tasks": task_store.unfinished(),
+        "stored_tasks": len(task_store),
+        "expired_tasks": task_store.expired,
+        "memory_usage": host_metrics.memory_percent,
+        "cpu_usage": host_metrics.cpu_percent,
+        "admission": admission.stats(),
+        "max_workers": MAX_WORKERS,
+        "worker_processes": len(process_pool) if process_pool is not None else 0,
+        "ast_cache_hits": ast_cache.hits,
+        "ast_cache_misses": ast_cache.misses,
+        "ast_cache_size": len(ast_cache),
+        "interpreters_created": interpreter_pool.created,
+        "interpreters_reused": interpreter_pool.reused,
+        "parse_sessions": len(parse_sessions),
+        # Grows with the clients waiting on a WSGI server, not on the ASGI one
+        "threads": threading.active_count(),
+    }
 
 @app.route('/api/status', methods=['GET'])
 def server_status():
-    memory_usage = psutil.virtual_memory().percent
-    cpu_usage = psutil.cpu_percent()
-    
-    return jsonify({
-        "active_tasks": len(task_results),
-        "memory_usage": memory_usage,
-        "cpu_usage": cpu_usage,
-        "max_workers": MAX_WORKERS
-    })
+    return jsonify(status())
 
 @app.route('/')
 def home():
     return send_from_directory(app.static_folder, "index.html")
 
 if __name__ == '__main__':
+    # The reloader runs the server in a child process, only that one needs the workers
+    if USE_PROCESS_POOL and os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        get_process_pool()
     app.run(debug=True)
\ No newline at end of file
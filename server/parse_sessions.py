@@ -0,0 +1,51 @@
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from interpreter.src.incremental_front_end import IncrementalFrontEnd
+
+DEFAULT_CAPACITY = 256
+
+
+class _Session:
+    def __init__(self):
+        self.front_end = IncrementalFrontEnd()
+        # A session's requests can come in concurrently (e.g. from two tabs), its front end takes one at a time
+        self.lock = threading.Lock()
+
+
+class ParseSessions:
+    """
+    The incremental front ends of live editing sessions, safe to use from any thread. Each session's code is
+    parsed again on every edit, only its changed parts are rescanned and reparsed (see `IncrementalFrontEnd`).
+
+    At most `capacity` sessions are kept, the least recently used one is dropped past it. A dropped session's next
+    request just parses its whole code again.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self._capacity = capacity
+        self._sessions: OrderedDict[str, _Session] = OrderedDict()
+        self._lock = threading.Lock()
+        self.created = 0
+
+    def check(self, session_id: str, source: str) -> Optional[str]:
+        """Parses the session's current code, and returns its syntax error, or None when it has none."""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._sessions[session_id] = _Session()
+                self.created += 1
+                while len(self._sessions) > self._capacity:
+                    self._sessions.popitem(last=False)
+            self._sessions.move_to_end(session_id)
+
+        with session.lock:
+            try:
+                session.front_end.update(source)
+            except Exception as e:
+                return str(e)
+        return None
+
+    def __len__(self) -> int:
+        return len(self._sessions)
@@ -0,0 +1,163 @@
+import io
+import math
+import multiprocessing
+import queue
+
+try:
+    import resource
+except ImportError:  # Not available on Windows, tasks there are only limited by the timeout
+    resource = None
+
+from interpreter.src.ast_cache import AstCache
+from interpreter.src.interpreter_handler import Engine
+from interpreter.src.interpreter_pool import InterpreterPool
+from interpreter.src.journal.journal import JournalSettings
+
+# Workers are started from a clean server process rather than forked from the (multithreaded) web server
+START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+WORKER_AST_CACHE_SIZE = 64
+
+TIMEOUT_MESSAGE = "Task exceeded {} seconds"
+LIMIT_MESSAGE = "Task exceeded its CPU or memory limit"
+UNHANDLED_MESSAGE = "Unhandled exception"
+
+
+def _limit_memory(memory_bytes: int) -> None:
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        memory_bytes = min(memory_bytes, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, hard))
+
+
+def _limit_cpu(cpu_seconds: float) -> None:
+    # The limit is on the CPU time of the whole process, so it is moved past what previous tasks used.
+    # Only the soft limit is set (the process gets SIGXCPU, which kills it), the hard one could never be raised again
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    soft = math.ceil(usage.ru_utime + usage.ru_stime + cpu_seconds)
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def _worker_main(conn, engine: Engine, memory_bytes: int | None) -> None:
+    """Runs the tasks sent over `conn` one after the other, and sends back each one's encoded journal."""
+    if resource is not None and memory_bytes is not None:
+        _limit_memory(memory_bytes)
+    ast_cache = AstCache(WORKER_AST_CACHE_SIZE)
+    # The worker runs one task at a time, on the same interpreter
+    interpreter_pool = InterpreterPool(engine, ast_cache, max_idle=1)
+
+    while True:
+        try:
+            source, settings, max_steps, cpu_seconds = conn.recv()
+        except EOFError:
+            # The pool was closed
+            return
+
+        if resource is not None and cpu_seconds is not None:
+            _limit_cpu(cpu_seconds)
+        try:
+            with interpreter_pool.interpreter(settings) as interpreter:
+                journal = interpreter.feedBlock(source, max_steps)
+            encoded_journal = io.StringIO()
+            journal.write_json(encoded_journal)
+            conn.send(("completed", encoded_journal.getvalue()))
+        except MemoryError:
+            # Nothing the worker holds can be trusted after running out of memory, the pool starts a new one
+            conn.send(("exited", LIMIT_MESSAGE))
+            return
+        except Exception as e:
+            print(f'[Server Error] {e}')
+            conn.send(("error", UNHANDLED_MESSAGE))
+
+
+class _Worker:
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+
+
+class ProcessPool:
+    """
+    Runs programs in a fixed number of pre-started worker processes, so tasks run on separate cores.
+
+    A task that runs past its timeout has its worker killed and replaced. Each worker is also limited to
+    `memory_bytes` of address space, and each task to `cpu_seconds` of CPU time, past which the OS kills the worker.
+    `run` blocks the calling thread until a worker is free and the task is done, and returns the task's result
+    in the server's format. Results are sent back as encoded journals, the same text `Journal.write_json` writes.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        engine: Engine,
+        cpu_seconds: float | None = None,
+        memory_bytes: int | None = None,
+    ):
+        self._context = multiprocessing.get_context(START_METHOD)
+        if START_METHOD == "forkserver":
+            # Workers are forked with the interpreter already imported
+            self._context.set_forkserver_preload([__name__])
+        self._engine = engine
+        self._cpu_seconds = cpu_seconds
+        self._memory_bytes = memory_bytes
+        self._workers = [self._start_worker() for _ in range(workers)]
+        self._idle: queue.Queue[_Worker] = queue.Queue()
+        for worker in self._workers:
+            self._idle.put(worker)
+
+    def _start_worker(self) -> _Worker:
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(child_conn, self._engine, self._memory_bytes),
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        return _Worker(process, parent_conn)
+
+    def _replace(self, worker: _Worker) -> _Worker:
+        worker.process.kill()
+        worker.process.join()
+        worker.conn.close()
+        replacement = self._start_worker()
+        self._workers[self._workers.index(worker)] = replacement
+        return replacement
+
+    def run(self, source: str, settings: JournalSettings, timeout: float, max_steps: int | None = None) -> dict:
+        worker = self._idle.get()
+        try:
+            if not worker.process.is_alive():
+                worker = self._replace(worker)
+            worker.conn.send((source, settings, max_steps, self._cpu_seconds))
+            # Also returns (and `recv` raises) when the worker was killed by its limits
+            if not worker.conn.poll(timeout):
+                worker = self._replace(worker)
+                return {"status": "timeout", "message": TIMEOUT_MESSAGE.format(timeout)}
+            status, payload = worker.conn.recv()
+            if status == "exited":
+                worker = self._replace(worker)
+        except (EOFError, OSError):
+            worker = self._replace(worker)
+            return {"status": "error", "message": LIMIT_MESSAGE}
+        finally:
+            self._idle.put(worker)
+
+        if status == "completed":
+            return {"status": "completed", "result_json": payload}
+        return {"status": "error", "message": payload}
+
+    def close(self) -> None:
+        """Stops every worker. Tasks still running are killed."""
+        for worker in self._workers:
+            worker.conn.close()
+        for worker in self._workers:
+            worker.process.join(timeout=1)
+            if worker.process.is_alive():
+                worker.process.kill()
+                worker.process.join()
+
+    def __len__(self) -> int:
+        return len(self._workers)
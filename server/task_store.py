@@ -0,0 +1,127 @@
+import concurrent.futures
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, Optional
+
+DEFAULT_CAPACITY = 1024
+# How long a finished task's result waits to be collected
+DEFAULT_RESULT_TTL_SECONDS = 60
+# How long any task is kept, finished or not. Tasks stop by themselves long before, this only drops stuck ones
+DEFAULT_TASK_TTL_SECONDS = 600
+DEFAULT_REAP_INTERVAL_SECONDS = 5
+
+
+class _Task:
+    def __init__(self, future: concurrent.futures.Future, submitted_at: float):
+        self.future = future
+        self.submitted_at = submitted_at
+        self.finished_at: Optional[float] = None
+
+
+class TaskStore:
+    """
+    The submitted tasks whose results were not collected yet, safe to use from any thread.
+
+    At most `capacity` tasks are kept. A finished task is dropped `result_ttl` seconds after it finished,
+    and any task `task_ttl` seconds after it was submitted, so tasks abandoned by their clients don't pile up.
+    Expired tasks are dropped when the store is full, and by `reap`, which `start_reaper` runs periodically.
+    """
+
+    def __init__(
+        self,
+        capacity: int = DEFAULT_CAPACITY,
+        result_ttl: float = DEFAULT_RESULT_TTL_SECONDS,
+        task_ttl: float = DEFAULT_TASK_TTL_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._capacity = capacity
+        self._result_ttl = result_ttl
+        self._task_ttl = task_ttl
+        self._clock = clock
+        self._tasks: OrderedDict[str, _Task] = OrderedDict()
+        self._lock = threading.Lock()
+        self._unfinished = 0
+        self.expired = 0
+        self._reaper: Optional[threading.Thread] = None
+        self._stop_reaper = threading.Event()
+
+    def add(self, future: concurrent.futures.Future) -> Optional[str]:
+        """Stores the task and returns its id, or None (and leaves the task alone) when the store is full."""
+        if len(self) >= self._capacity:
+            self.reap()
+        with self._lock:
+            if len(self._tasks) >= self._capacity:
+                return None
+            task_id = str(uuid.uuid4())
+            task = _Task(future, self._clock())
+            self._tasks[task_id] = task
+            self._unfinished += 1
+        future.add_done_callback(lambda _: self._finished(task))
+        return task_id
+
+    def _finished(self, task: _Task) -> None:
+        with self._lock:
+            task.finished_at = self._clock()
+            self._unfinished -= 1
+
+    def get(self, task_id: str) -> Optional[tuple[concurrent.futures.Future, float]]:
+        """The task's future and the seconds since it was submitted, or None for an unknown (or expired) task."""
+        with self._lock:
+            task = self._tasks.get(task_id)
+            if task is None:
+                return None
+            return task.future, self._clock() - task.submitted_at
+
+    def pop(self, task_id: str) -> Optional[concurrent.futures.Future]:
+        with self._lock:
+            task = self._tasks.pop(task_id, None)
+            return task.future if task is not None else None
+
+    def unfinished(self) -> int:
+        """How many submitted tasks are still queued or running, including expired ones."""
+        with self._lock:
+            return self._unfinished
+
+    def reap(self) -> int:
+        """Drops the expired tasks and returns how many were dropped."""
+        with self._lock:
+            now = self._clock()
+            expired = [
+                task_id for task_id, task in self._tasks.items()
+                if now - task.submitted_at >= self._task_ttl
+                or (task.finished_at is not None and now - task.finished_at >= self._result_ttl)
+            ]
+            futures = [self._tasks.pop(task_id).future for task_id in expired]
+            self.expired += len(expired)
+
+        # Only stops the tasks that didn't start yet, running ones stop at their own deadline.
+        # Outside the lock, cancelling runs the future's callbacks right away
+        for future in futures:
+            future.cancel()
+        return len(expired)
+
+    def start_reaper(self, interval: float = DEFAULT_REAP_INTERVAL_SECONDS) -> None:
+        """Starts a daemon thread dropping expired tasks every `interval` seconds."""
+        if self._reaper is not None:
+            return
+
+        def reap_periodically():
+            while not self._stop_reaper.wait(interval):
+                self.reap()
+
+        self._reaper = threading.Thread(target=reap_periodically, name="task-store-reaper", daemon=True)
+        self._reaper.start()
+
+    def stop_reaper(self) -> None:
+        if self._reaper is None:
+            return
+        self._stop_reaper.set()
+        self._reaper.join()
+        self._reaper = None
+        self._stop_reaper.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._tasks)
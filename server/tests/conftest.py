@@ -0,0 +1,25 @@
+import concurrent.futures
+
+import pytest
+
+from server import multithread_server as server
+from server.admission import AdmissionController
+from server.parse_sessions import ParseSessions
+from server.task_store import TaskStore
+
+WORKERS = 4
+TIMEOUT_SECONDS = 1
+
+
+@pytest.fixture
+def thread_server(monkeypatch):
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=WORKERS)
+    monkeypatch.setattr(server, "USE_PROCESS_POOL", False)
+    monkeypatch.setattr(server, "executor", executor)
+    # Never turns tasks away, all of the tests' tasks come from the same client
+    monkeypatch.setattr(server, "admission", AdmissionController(WORKERS, 64, 64))
+    monkeypatch.setattr(server, "DEFAULT_TIMEOUT_SECONDS", TIMEOUT_SECONDS)
+    monkeypatch.setattr(server, "task_store", TaskStore())
+    monkeypatch.setattr(server, "parse_sessions", ParseSessions())
+    yield server
+    executor.shutdown(wait=True)
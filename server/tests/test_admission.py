@@ -0,0 +1,49 @@
+import pytest
+
+from server.admission import AdmissionController, AdmissionRejected
+
+
+def rejection(admission: AdmissionController, client_id: str) -> AdmissionRejected:
+    with pytest.raises(AdmissionRejected) as rejected:
+        admission.admit(client_id)
+    return rejected.value
+
+
+def test_full_queue_is_rejected_with_503():
+    admission = AdmissionController(workers=2, max_queued=2, max_per_client=10)
+    for i in range(4):
+        admission.admit(f"client {i}")
+
+    assert rejection(admission, "client 5").status_code == 503
+    admission.release("client 0")
+    admission.admit("client 5")
+    assert admission.stats()["queued"] == 2
+
+
+def test_one_client_cannot_take_the_whole_queue():
+    admission = AdmissionController(workers=2, max_queued=8, max_per_client=3)
+    for _ in range(3):
+        admission.admit("greedy")
+
+    assert rejection(admission, "greedy").status_code == 429
+    # Other clients still get in
+    admission.admit("other")
+    admission.release("greedy")
+    admission.admit("greedy")
+    assert admission.stats()["rejected_client"] == 1
+
+
+def test_retry_after_follows_the_measured_service_time():
+    admission = AdmissionController(workers=2, max_queued=4, max_per_client=10)
+    for _ in range(50):
+        admission.record_service_time(4)
+    for i in range(6):
+        admission.admit(str(i))
+
+    assert admission.service_seconds == pytest.approx(4, abs=0.01)
+    # One round of two workers has to finish before a queue slot frees up
+    assert rejection(admission, "late").retry_after == 2
+
+    for _ in range(50):
+        admission.record_service_time(0.01)
+    assert rejection(admission, "late").retry_after == 1
@@ -0,0 +1,82 @@
+import asyncio
+import json
+import time
+
+from server import asgi_server
+from server.admission import AdmissionController
+
+QUICK_SOURCE = "print(1)\n"
+SLOW_SOURCE = "i <- 0\nwhile (true)\n    i <- i + 1\n"
+
+
+def request(method: str, path: str, body=None, query: str = "") -> tuple[int, bytes]:
+    """Runs one request through the ASGI app and returns its status and whole body."""
+    scope = {"type": "http", "method": method, "path": path, "query_string": query.encode()}
+    received = [{"type": "http.request", "body": json.dumps(body).encode() if body is not None else b""}]
+    sent = []
+
+    async def receive():
+        return received.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(asgi_server.app(scope, receive, send))
+    return sent[0]["status"], b"".join(message.get("body", b"") for message in sent[1:])
+
+
+def request_json(method: str, path: str, body=None, query: str = "") -> tuple[int, dict]:
+    status, body = request(method, path, body, query)
+    return status, json.loads(body)
+
+
+def test_quick_task_is_returned_on_submit(thread_server):
+    assert request_json("POST", "/api/submit", {"data": QUICK_SOURCE, "is_debug": False}) == (200, {
+        "status": "completed",
+        "result": {"events": [{"type": "PRINT", "value": 1.0}]},
+    })
+    assert len(thread_server.task_store) == 0
+
+
+def test_long_poll_returns_once_the_task_is_done(thread_server):
+    _, submitted = request_json("POST", "/api/submit", {"data": SLOW_SOURCE, "is_debug": False})
+    task_id = submitted["task_id"]
+
+    assert request_json("GET", f"/api/result/{task_id}", query="wait=0.2")[1]["status"] == "pending"
+    start = time.monotonic()
+    assert request_json("GET", f"/api/result/{task_id}", query="wait=10")[1]["status"] == "timeout"
+    assert time.monotonic() - start < thread_server.DEFAULT_TIMEOUT_SECONDS + 1
+    assert request_json("GET", f"/api/result/{task_id}")[0] == 404
+
+
+def test_events_stream_ends_with_the_result(thread_server, monkeypatch):
+    monkeypatch.setattr(thread_server, "EVENTS_PENDING_INTERVAL_SECONDS", 0.1)
+    _, submitted = request_json("POST", "/api/submit", {"data": SLOW_SOURCE, "is_debug": False})
+
+    status, body = request("GET", f"/api/events/{submitted['task_id']}")
+    events = [event.split("\n") for event in body.decode().strip().split("\n\n")]
+
+    assert status == 200
+    assert {event[0] for event in events[:-1]} == {"event: pending"}
+    assert events[-1][0] == "event: result"
+    assert json.loads(events[-1][1][len("data: "):])["status"] == "timeout"
+
+
+def test_busy_and_bad_requests(thread_server, monkeypatch):
+    assert request_json("POST", "/api/submit", "not an object")[0] == 400
+    assert request_json("GET", "/api/nowhere")[0] == 404
+
+    monkeypatch.setattr(thread_server, "admission", AdmissionController(1, 0, max_per_client=0))
+    status, result = request_json("POST", "/api/submit", {"data": QUICK_SOURCE, "is_debug": False})
+    assert status == 429
+    assert result["retry_after"] >= 1
+
+
+def test_parse_reports_syntax_errors(thread_server):
+    assert request_json("POST", "/api/parse", {"session_id": "editor", "data": QUICK_SOURCE}) == (200, {"status": "ok"})
+
+    status, result = request_json("POST", "/api/parse", {"session_id": "editor", "data": "print(1\n"})
+    assert (status, result["status"]) == (200, "error")
+    assert "expected ')'" in result["message"]
+
+    assert request_json("POST", "/api/parse", {"data": QUICK_SOURCE})[0] == 400
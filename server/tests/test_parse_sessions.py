@@ -0,0 +1,36 @@
+from server.parse_sessions import ParseSessions
+
+SOURCE = "x <- 1\nif (x > 0)\n    print(x)\n"
+
+
+def test_reports_syntax_errors_of_each_version():
+    sessions = ParseSessions()
+
+    assert sessions.check("editor", SOURCE) is None
+    error = sessions.check("editor", SOURCE.replace("(x > 0)", "(x > 0"))
+    assert "Expected ')'" in error
+    assert sessions.check("editor", SOURCE + "print(x)\n") is None
+
+
+def test_sessions_are_separate():
+    sessions = ParseSessions()
+    sessions.check("first", SOURCE)
+    sessions.check("second", "x <-\n")
+
+    assert sessions.check("first", SOURCE) is None
+    assert sessions.check("second", "x <-\n") is not None
+
+
+def test_least_recently_used_session_is_dropped():
+    sessions = ParseSessions(capacity=2)
+    sessions.check("first", SOURCE)
+    sessions.check("second", SOURCE)
+    sessions.check("first", SOURCE)
+    sessions.check("third", SOURCE)
+
+    assert len(sessions) == 2
+    # Only the dropped session starts over
+    sessions.check("first", SOURCE)
+    assert sessions.created == 3
+    sessions.check("second", SOURCE)
+    assert sessions.created == 4
@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+from interpreter.src.interpreter_handler import Engine
+from interpreter.src.journal.journal import JournalSettings
+from interpreter.src.journal.journal_events import ErrorEvent, PrintEvent
+from server.process_pool import ProcessPool
+
+RUN_SETTINGS = JournalSettings([PrintEvent, ErrorEvent])
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = ProcessPool(2, Engine.BYTECODE, cpu_seconds=2, memory_bytes=512 * 1024 * 1024)
+    yield pool
+    pool.close()
+
+
+def test_runs_programs(pool):
+    result = pool.run("x <- 2\nprint(x * 3)\nprint(1 / 0)\n", RUN_SETTINGS, timeout=5)
+
+    assert result["status"] == "completed"
+    assert json.loads(result["result_json"]) == {"events": [
+        {"type": "PRINT", "value": 6.0},
+        {"type": "ERROR", "info": "Division by zero"},
+    ]}
+
+
+def test_kills_tasks_past_their_timeout(pool):
+    result = pool.run("while (true)\n    x <- 1\n", RUN_SETTINGS, timeout=0.5)
+    assert result["status"] == "timeout"
+
+    # The worker is replaced
+    assert pool.run("print(1)", RUN_SETTINGS, timeout=5)["status"] == "completed"
+    assert len(pool) == 2
+
+
+def test_kills_tasks_past_their_cpu_limit(pool):
+    result = pool.run("while (true)\n    x <- 1\n", RUN_SETTINGS, timeout=10)
+    assert result == {"status": "error", "message": "Task exceeded its CPU or memory limit"}
+
+    assert pool.run("print(1)", RUN_SETTINGS, timeout=5)["status"] == "completed"
+
+
+def test_stops_tasks_past_their_memory_limit(pool):
+    source = "s <- \"ab\"\nwhile (true)\n    s <- s + s\n"
+    result = pool.run(source, RUN_SETTINGS, timeout=10)
+    assert result == {"status": "error", "message": "Task exceeded its CPU or memory limit"}
+
+    assert pool.run("print(1)", RUN_SETTINGS, timeout=5)["status"] == "completed"
+
+
+def test_stops_tasks_past_their_step_budget(pool):
+    result = pool.run("while (true)\n    x <- 1\n", RUN_SETTINGS, timeout=5, max_steps=100)
+
+    assert json.loads(result["result_json"]) == {"events": [
+        {"type": "ERROR", "info": "Execution stopped after 100 steps"},
+    ]}
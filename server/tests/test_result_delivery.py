@@ -0,0 +1,86 @@
+import json
+import time
+
+import pytest
+
+from server.admission import AdmissionController
+
+QUICK_SOURCE = "print(1)\n"
+SLOW_SOURCE = "i <- 0\nwhile (true)\n    i <- i + 1\n"
+
+
+def submit(thread_server, source: str) -> dict:
+    client = thread_server.app.test_client()
+    return client.post("/api/submit", json={"data": source, "is_debug": False}).get_json()
+
+
+def test_quick_task_is_returned_on_submit(thread_server):
+    assert submit(thread_server, QUICK_SOURCE) == {
+        "status": "completed",
+        "result": {"events": [{"type": "PRINT", "value": 1.0}]},
+    }
+    assert len(thread_server.task_store) == 0
+
+
+def time_out(request_data):
+    return {"status": "timeout", "message": "Task exceeded 1 seconds"}
+
+
+def crash(request_data):
+    raise RuntimeError("Worker crashed")
+
+
+@pytest.mark.parametrize("task, expected", [
+    (time_out, {"status": "timeout", "message": "Task exceeded 1 seconds"}),
+    (crash, {"status": "error", "message": "Worker crashed"}),
+])
+def test_results_without_a_journal_are_returned_as_json(thread_server, monkeypatch, task, expected):
+    monkeypatch.setattr(thread_server, "execute_code", task)
+    client = thread_server.app.test_client()
+
+    response = client.post("/api/submit", json={"data": QUICK_SOURCE, "is_debug": False})
+    assert response.status_code == 200
+    assert response.mimetype == "application/json"
+    assert response.get_json() == expected
+
+
+def test_long_poll_returns_once_the_task_is_done(thread_server):
+    task_id = submit(thread_server, SLOW_SOURCE)["task_id"]
+    client = thread_server.app.test_client()
+
+    assert client.get(f"/api/result/{task_id}?wait=0.2").get_json()["status"] == "pending"
+    start = time.monotonic()
+    result = client.get(f"/api/result/{task_id}?wait=10").get_json()
+    # Returned when the task timed out, not after the whole wait
+    assert result["status"] == "timeout"
+    assert time.monotonic() - start < thread_server.DEFAULT_TIMEOUT_SECONDS + 1
+    assert client.get(f"/api/result/{task_id}").status_code == 404
+
+
+def test_events_stream_ends_with_the_result(thread_server, monkeypatch):
+    monkeypatch.setattr(thread_server, "EVENTS_PENDING_INTERVAL_SECONDS", 0.1)
+    task_id = submit(thread_server, SLOW_SOURCE)["task_id"]
+    client = thread_server.app.test_client()
+
+    response = client.get(f"/api/events/{task_id}")
+    assert response.mimetype == "text/event-stream"
+    events = [event.split("\n") for event in response.get_data(as_text=True).strip().split("\n\n")]
+
+    assert {event[0] for event in events[:-1]} == {"event: pending"}
+    assert events[-1][0] == "event: result"
+    assert json.loads(events[-1][1][len("data: "):])["status"] == "timeout"
+
+
+@pytest.mark.parametrize("trusted, second_client_status", [(True, 200), (False, 429)])
+def test_client_id_header_names_the_client_only_when_trusted(thread_server, monkeypatch, trusted, second_client_status):
+    monkeypatch.setattr(thread_server, "TRUST_CLIENT_ID_HEADER", trusted)
+    monkeypatch.setattr(thread_server, "admission", AdmissionController(4, 64, max_per_client=1))
+    client = thread_server.app.test_client()
+
+    def submit_as(client_id: str) -> int:
+        body = {"data": SLOW_SOURCE, "is_debug": False}
+        return client.post("/api/submit", json=body, headers={"X-Client-Id": client_id}).status_code
+
+    assert submit_as("first") == 200
+    assert submit_as("first") == 429
+    assert submit_as("second") == second_client_status
@@ -0,0 +1,55 @@
+import threading
+import time
+
+from server import multithread_server as server
+
+QUICK_SOURCE = "i <- 0\nwhile (i < 100)\n    i <- i + 1\nprint(i)\n"
+ENDLESS_SOURCE = "while (true)\n    x <- 1\n"
+
+
+def submit_and_wait(source: str, is_debug: bool) -> dict:
+    client = server.app.test_client()
+    submitted = client.post("/api/submit", json={"data": source, "is_debug": is_debug}).get_json()
+    if submitted["status"] != "accepted":
+        # Returned right away
+        return submitted
+    task_id = submitted["task_id"]
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        result = client.get(f"/api/result/{task_id}").get_json()
+        if result["status"] != "pending":
+            return result
+        time.sleep(0.01)
+    raise AssertionError("task never finished")
+
+
+def test_timed_out_task_frees_its_worker(thread_server):
+    timeout = thread_server.DEFAULT_TIMEOUT_SECONDS
+    start = time.monotonic()
+    assert submit_and_wait(ENDLESS_SOURCE, False)["status"] == "timeout"
+    assert time.monotonic() - start < timeout + 1
+    # Nothing is left running on the pool
+    assert thread_server.executor.submit(lambda: True).result(timeout=1)
+
+
+def test_concurrent_submissions_all_finish(thread_server):
+    timeout = thread_server.DEFAULT_TIMEOUT_SECONDS
+    workers = thread_server.executor._max_workers
+    # More tasks than workers, half of them only stopped by the timeout
+    sources = [ENDLESS_SOURCE if i % 2 else QUICK_SOURCE for i in range(4 * workers)]
+    results = [None] * len(sources)
+
+    def client_thread(i):
+        results[i] = submit_and_wait(sources[i], is_debug=i % 4 == 0)
+
+    threads = [threading.Thread(target=client_thread, args=(i,)) for i in range(len(sources))]
+    start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for source, result in zip(sources, results):
+        assert result["status"] == ("timeout" if source == ENDLESS_SOURCE else "completed")
+    # The endless tasks take one worker each, in two rounds of `workers`
+    assert time.monotonic() - start < 2 * timeout + 2
@@ -0,0 +1,88 @@
+import concurrent.futures
+import threading
+
+from server.task_store import TaskStore
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_finished_results_expire():
+    clock = FakeClock()
+    store = TaskStore(capacity=10, result_ttl=60, task_ttl=600, clock=clock)
+    finished, running = concurrent.futures.Future(), concurrent.futures.Future()
+    finished_id, running_id = store.add(finished), store.add(running)
+    assert store.unfinished() == 2
+
+    clock.now = 10
+    finished.set_result("done")
+    assert store.unfinished() == 1
+    clock.now = 69
+    assert store.reap() == 0
+    clock.now = 70
+    assert store.reap() == 1
+
+    assert store.get(finished_id) is None
+    assert store.get(running_id) == (running, 70)
+    assert len(store) == 1
+
+
+def test_abandoned_tasks_expire():
+    clock = FakeClock()
+    store = TaskStore(capacity=10, result_ttl=60, task_ttl=600, clock=clock)
+    queued = concurrent.futures.Future()
+    store.add(queued)
+
+    clock.now = 600
+    assert store.reap() == 1
+    assert queued.cancelled()
+    assert store.unfinished() == 0
+    assert store.expired == 1
+
+
+def test_full_store_drops_expired_tasks_first():
+    clock = FakeClock()
+    store = TaskStore(capacity=2, result_ttl=60, task_ttl=600, clock=clock)
+    futures = [concurrent.futures.Future() for _ in range(4)]
+    assert store.add(futures[0]) is not None
+    assert store.add(futures[1]) is not None
+    assert store.add(futures[2]) is None
+
+    futures[0].set_result("done")
+    clock.now = 60
+    assert store.add(futures[3]) is not None
+    assert len(store) == 2
+
+
+def test_collected_tasks_are_removed():
+    store = TaskStore()
+    future = concurrent.futures.Future()
+    task_id = store.add(future)
+    future.set_result("done")
+
+    assert store.pop(task_id) is future
+    assert store.pop(task_id) is None
+    assert len(store) == 0
+
+
+def test_reaper_thread():
+    clock = FakeClock()
+    store = TaskStore(result_ttl=0, clock=clock)
+    reaped = threading.Event()
+    future = concurrent.futures.Future()
+    future.set_result("done")
+    store.add(future)
+
+    original_reap = store.reap
+    store.reap = lambda: original_reap() and reaped.set()
+    store.start_reaper(interval=0.01)
+    try:
+        assert reaped.wait(timeout=5)
+    finally:
+        store.stop_reaper()
+    assert len(store) == 0